@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from agro_math import AgroMathVetorial, FATOR_RAD
+
+# ==============================================================================
+# AGREGAÇÃO DIÁRIA DA PREVISÃO 3-HORÁRIA
+# Consome os 40 passos do /forecast numa única passada vetorizada e produz
+# min/média/máx diários, ETc e chuva somadas e índices por janela (slot).
+# ==============================================================================
+FUSO_BRASIL = timezone(timedelta(hours=-3))
+PASSO_HORAS = 3
+PASSOS_DIA = 24 // PASSO_HORAS
+DELTA_T_IDEAL = (2, 8)  # Janela de pulverização (°C)
+
+
+def extrair_serie(payload):
+    """Converte o JSON do /forecast em arrays (ordem cronológica da API)."""
+    lst = payload['list']
+    n = len(lst)
+    return {
+        'dt': np.fromiter((it['dt'] for it in lst), dtype=np.int64, count=n),
+        'temp': np.fromiter((it['main']['temp'] for it in lst), dtype=float, count=n),
+        'umid': np.fromiter((it['main']['humidity'] for it in lst), dtype=float, count=n),
+        'chuva': np.fromiter((it.get('rain', {}).get('3h', 0) for it in lst), dtype=float, count=n)
+    }
+
+
+def indices_slots(serie, kc=1.0, fator_rad=FATOR_RAD):
+    """Índices por janela de 3h. A ETc diária é rateada pela fração do dia coberta pelo passo."""
+    t, u = serie['temp'], serie['umid']
+    delta_t = AgroMathVetorial.calc_delta_t(t, u, casas=None)
+    return {
+        **serie,
+        'vpd': AgroMathVetorial.calc_vpd(t, u, casas=None),
+        'delta_t': delta_t,
+        'etc': AgroMathVetorial.calc_etc(t, kc, fator_rad, casas=None) * PASSO_HORAS / 24,
+        'janela_pulv': (delta_t >= DELTA_T_IDEAL[0]) & (delta_t <= DELTA_T_IDEAL[1])
+    }
+
+
+def agregar_diario(serie, kc=1.0, t_base=10.0, fuso=FUSO_BRASIL, fator_rad=FATOR_RAD, descartar_ultimo_incompleto=True):
+    """
+    Agrupa a série por dia local (fuso) e devolve (diario, slots) como dicts de arrays.
+    O último dia costuma ter só 1-2 passos; por padrão é descartado se não cobrir 24h.
+    O primeiro começa na hora da rodada: fica (é o "hoje" do laudo), marcado em 'parcial', com
+    chuva e ETc escaladas para o dia inteiro pelo número de passos.
+    """
+    slots = indices_slots(serie, kc, fator_rad)
+    offset = int(fuso.utcoffset(None).total_seconds())
+    dia = (slots['dt'] + offset) // 86400
+    slots['dia'] = dia
+
+    inicio = np.flatnonzero(np.r_[True, dia[1:] != dia[:-1]])
+    n_slots = np.diff(np.r_[inicio, len(dia)])
+    soma = lambda x: np.add.reduceat(x, inicio)
+
+    t = slots['temp']
+    t_min = np.minimum.reduceat(t, inicio)
+    t_max = np.maximum.reduceat(t, inicio)
+    # Dia incompleto no início: totais proporcionais às horas cobertas viram total do dia
+    escala = np.ones(len(n_slots))
+    parcial = np.zeros(len(n_slots), dtype=bool)
+    if len(n_slots) > 1 and n_slots[0] < PASSOS_DIA:
+        escala[0], parcial[0] = PASSOS_DIA / n_slots[0], True
+    diario = {
+        'dia': dia[inicio],
+        'n_slots': n_slots,
+        'parcial': parcial,
+        'temp_min': t_min,
+        'temp_med': soma(t) / n_slots,
+        'temp_max': t_max,
+        'umid_min': np.minimum.reduceat(slots['umid'], inicio),
+        'umid_med': soma(slots['umid']) / n_slots,
+        'umid_max': np.maximum.reduceat(slots['umid'], inicio),
+        'vpd_med': soma(slots['vpd']) / n_slots,
+        'vpd_max': np.maximum.reduceat(slots['vpd'], inicio),
+        'delta_t_med': soma(slots['delta_t']) / n_slots,
+        'etc': soma(slots['etc']) * escala,
+        'chuva': soma(slots['chuva']) * escala,
+        'gda': AgroMathVetorial.calc_gda((t_min + t_max) / 2, t_base),
+        'janelas_pulv': soma(slots['janela_pulv'].astype(int))
+    }
+    if descartar_ultimo_incompleto and len(n_slots) > 1 and n_slots[-1] * PASSO_HORAS < 24:
+        diario = {k: v[:-1] for k, v in diario.items()}
+    return diario, slots
+
+
+class PrevisaoDiaria(list):
+    """Lista de registros diários; `attrs['slots']` guarda os passos 3-horários (como o df.attrs do dashboard)."""
+    attrs = None
+
+
+def previsao_diaria(payload, fuso=FUSO_BRASIL):
+    """Registros diários do laudo/histórico (ETc com Kc=1 e sem fator de radiação -> 'et0')."""
+    serie = extrair_serie(payload)
+    diario, _ = agregar_diario(serie, kc=1.0, fuso=fuso, fator_rad=1)
+    previsoes = PrevisaoDiaria()
+    previsoes.attrs = {'slots': serie}
+    for n, dia in enumerate(diario['dia']):
+        previsoes.append({
+            'data': rotulo_dia(dia), 'dia': rotulo_dia(dia, '%Y-%m-%d'),
+            'temp': round(float(diario['temp_med'][n]), 1),
+            'temp_min': round(float(diario['temp_min'][n]), 1), 'temp_max': round(float(diario['temp_max'][n]), 1),
+            'umid': round(float(diario['umid_med'][n])), 'umid_max': int(diario['umid_max'][n]),
+            'vpd': round(float(diario['vpd_med'][n]), 2), 'delta_t': round(float(diario['delta_t_med'][n]), 1),
+            'janelas_pulv': int(diario['janelas_pulv'][n]),
+            'chuva': round(float(diario['chuva'][n]), 1), 'et0': round(float(diario['etc'][n]), 2),
+            'parcial': bool(diario['parcial'][n])
+        })
+    return previsoes
+
+
+def tabela_previsao(serie, kc, t_base):
+    """DataFrame diário do dashboard (colunas das abas); os passos 3-horários vão em df.attrs['slots']."""
+    import pandas as pd  # só o dashboard e os benchmarks usam: o job de laudos roda sem pandas
+    diario, slots = agregar_diario(serie, kc, t_base)
+    df = pd.DataFrame({
+        'Data': [rotulo_dia(d) for d in diario['dia']],
+        'Temp': diario['temp_med'].round(1),
+        'Temp Min': diario['temp_min'].round(1),
+        'Temp Max': diario['temp_max'].round(1),
+        'Umid': diario['umid_med'].round().astype(int),
+        'VPD': diario['vpd_med'].round(2),
+        'Delta T': diario['delta_t_med'].round(1),
+        'ETc': diario['etc'].round(2),
+        'GDA': diario['gda'].round(1),
+        'Chuva': diario['chuva'].round(1),
+        'Janelas Pulv': diario['janelas_pulv']
+    })
+    df.attrs['slots'] = pd.DataFrame({
+        'Hora': [rotulo_slot(t) for t in slots['dt']],
+        'dt': slots['dt'],
+        'Temp': slots['temp'].round(1),
+        'Umid': slots['umid'],
+        'Chuva': slots['chuva'],
+        'Delta T': slots['delta_t'].round(1),
+        'VPD': slots['vpd'].round(2),
+        'Pulverizar': slots['janela_pulv']
+    })
+    return df
+
+
+def rotulo_dia(dia, fmt='%d/%m'):
+    # `dia` é o número de dias locais desde a época: meia-noite UTC desse número = data local
+    return datetime.fromtimestamp(int(dia) * 86400, tz=timezone.utc).strftime(fmt)
+
+
+def rotulo_slot(dt, fuso=FUSO_BRASIL, fmt='%d/%m %Hh'):
+    return datetime.fromtimestamp(int(dt), tz=timezone.utc).astimezone(fuso).strftime(fmt)
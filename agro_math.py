@@ -0,0 +1,58 @@
+import numpy as np
+
+# ==============================================================================
+# MOTOR CIENTÍFICO VETORIZADO (NUMPY)
+# Mesmas fórmulas de AgroMath (app.py) e calc_agro (clima_alerta.py), aplicadas
+# a arrays inteiros: previsão completa, séries históricas e lotes de talhões.
+# ==============================================================================
+FATOR_RAD = 23  # Radiação extraterrestre média usada no Hargreaves-Samani do dashboard
+
+
+class AgroMathVetorial:
+    @staticmethod
+    def calc_vpd(temp, umid, casas=2):
+        temp = np.asarray(temp, dtype=float)
+        umid = np.asarray(umid, dtype=float)
+        es = 0.61078 * np.exp((17.27 * temp) / (temp + 237.3))
+        vpd = es - es * (umid / 100)
+        return vpd if casas is None else np.round(vpd, casas)
+
+    @staticmethod
+    def calc_delta_t(temp, umid, casas=1):
+        temp = np.asarray(temp, dtype=float)
+        umid = np.asarray(umid, dtype=float)
+        tw = temp * np.arctan(0.151977 * np.sqrt(umid + 8.313659)) + np.arctan(temp + umid) - np.arctan(umid - 1.676331) \
+            + 0.00391838 * umid ** 1.5 * np.arctan(0.023101 * umid) - 4.686035
+        dt = temp - tw
+        return dt if casas is None else np.round(dt, casas)
+
+    @staticmethod
+    def calc_et0(temp, fator_rad=FATOR_RAD, casas=None):
+        # Hargreaves-Samani adaptado para trópicos (temperaturas negativas não geram demanda)
+        temp = np.asarray(temp, dtype=float)
+        et0 = 0.0023 * (temp + 17.8) * np.sqrt(np.maximum(temp, 0)) * 0.408 * fator_rad
+        return et0 if casas is None else np.round(et0, casas)
+
+    @staticmethod
+    def calc_etc(temp, kc, fator_rad=FATOR_RAD, casas=2):
+        etc = AgroMathVetorial.calc_et0(temp, fator_rad) * np.asarray(kc, dtype=float)
+        return etc if casas is None else np.round(etc, casas)
+
+    @staticmethod
+    def calc_gda(temp, t_base):
+        return np.maximum(0, np.asarray(temp, dtype=float) - np.asarray(t_base, dtype=float))
+
+    @staticmethod
+    def calc_lote(temp, umid, kc, t_base, fator_rad=FATOR_RAD):
+        """Calcula VPD, Delta T, ETc e GDA numa única passada. kc/t_base podem ser escalares ou arrays."""
+        return {
+            'VPD': AgroMathVetorial.calc_vpd(temp, umid),
+            'Delta T': AgroMathVetorial.calc_delta_t(temp, umid),
+            'ETc': AgroMathVetorial.calc_etc(temp, kc, fator_rad),
+            'GDA': AgroMathVetorial.calc_gda(temp, t_base)
+        }
+
+    @staticmethod
+    def calc_df(df, kc, t_base, col_temp='Temp', col_umid='Umid', fator_rad=FATOR_RAD):
+        """Devolve uma cópia do DataFrame com as colunas VPD, Delta T, ETc e GDA."""
+        return df.assign(**AgroMathVetorial.calc_lote(df[col_temp].to_numpy(), df[col_umid].to_numpy(), kc, t_base, fator_rad))
@@ -1,17 +1,26 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-import requests
 import math
-import google.generativeai as genai
-from PIL import Image
-from datetime import datetime, date, timedelta
-import folium
-from folium.plugins import LocateControl, Fullscreen, Draw, MiniMap
-from streamlit_folium import st_folium
+import numpy as np
+from datetime import date
 import base64
 import io
+import hashlib
+from cache_api import CacheTTL
+from cliente_owm import ClienteOWM
+from radar import buscar_radar, gerar_estacoes_virtuais, estacoes_pendentes
+from agregacao import extrair_serie, previsao_diaria, tabela_previsao
+from historico import HistoricoAgro, id_local
+from gda import AcumuladorGDA, estimativa_climatologica
+from catalogo import FonteCatalogo
+from deposito_clima import deposito_padrao
+from grade_espacial import GRADE
+from diagnostico_ia import ClienteGemini, PipelineDiagnostico
+from climatologia import CacheClimatologia, comparar_safras, reduzir_pontos, agregar_soma, SAFRAS_PADRAO
+from balanco_hidrico import SOLOS, SOLO_PADRAO, EFICIENCIA_PADRAO, parametros_talhoes, simular
+from pressao_sanitaria import avaliar_fazendas
+from talhoes import RegistroTalhoes, camada_mapa, janela_aproximada, janela_folium
+from tiles_satelite import url_mapa
 
 # ==============================================================================
 # 1. ARQUITETURA E CONFIGURAÇÃO DO SISTEMA
@@ -114,6 +123,7 @@ class UIAssets:
         .alert-box {{ padding: 20px; border-radius: 8px; margin-bottom: 20px; font-weight: 500; }}
         .alert-danger {{ background: #fee2e2; color: #991b1b; border-left: 8px solid #ef4444; }}
         .alert-success {{ background: #dcfce7; color: #166534; border-left: 8px solid #22c55e; }}
+        .alert-warning {{ background: #fef3c7; color: #92400e; border-left: 8px solid #f59e0b; }}
 
         /* KPI CARDS */
         div[data-testid="metric-container"] {{
@@ -131,165 +141,13 @@ UIAssets.apply_enterprise_css('fundo_agro.jpg')
 # ==============================================================================
 # 2. BANCO DE DADOS AGRONÔMICO OMNI (EXPANDIDO)
 # ==============================================================================
-# Estrutura completa para evitar erros de renderização
-BANCO_TITAN = {
-    # --- GRÃOS (COMMODITIES) ---
-    "Soja (Glycine max)": {
-        "t_base": 10,
-        "vars": {
-            "Intacta 2 Xtend": {"kc": 1.15, "gda_meta": 1400, "info": "Tecnologia I2X. Resistência a lagartas e herbicida Dicamba. Refúgio obrigatório."},
-            "Brasmax": {"kc": 1.15, "gda_meta": 1350, "info": "Alto teto produtivo. Exige fertilidade corrigida (Sat. Bases > 60%)."},
-            "Conkesta Enlist": {"kc": 1.15, "gda_meta": 1450, "info": "Sistema Enlist (2,4-D Colina). Tolerância a lagartas complexas."}
-        },
-        "fases": {
-            "Emergência (VE)": {
-                "desc": "Cotilédones acima do solo.",
-                "fisiologia": "Início da autotrofia. Radícula pivotante em descida rápida. Sensível a compactação.",
-                "manejo": "Monitorar Damping-off (Rhizoctonia/Pythium) e Lagarta Elasmo em solos arenosos.",
-                "quimica": [
-                    {"Alvo": "Damping-off", "Ativo": "Carboxina + Tiram", "Grupo": "Carboxamida", "Tipo": "Tratamento Sementes"},
-                    {"Alvo": "Elasmo", "Ativo": "Fipronil", "Grupo": "Pirazol", "Tipo": "TS / Sulco"}
-                ]
-            },
-            "Vegetativo (V3-V6)": {
-                "desc": "Desenvolvimento de nós e folhas trifolioladas.",
-                "fisiologia": "Estabelecimento da FBN (Fixação Biológica). Alta demanda de P e K.",
-                "manejo": "Manejo de daninhas (Glifosato/Dicamba). Monitorar Lagartas (Helicoverpa/Spodoptera).",
-                "quimica": [
-                    {"Alvo": "Lagartas", "Ativo": "Benzoato de Emamectina", "Grupo": "Avermectina", "Tipo": "Ingestão"},
-                    {"Alvo": "Lagartas", "Ativo": "Clorantraniliprole", "Grupo": "Diamida", "Tipo": "Sistêmico"},
-                    {"Alvo": "Buva", "Ativo": "Diclosulam", "Grupo": "ALS", "Tipo": "Herbicida"}
-                ]
-            },
-            "Reprodutivo (R1-R2)": {
-                "desc": "Florescimento pleno.",
-                "fisiologia": "Definição do número de vagens. Estresse hídrico causa abortamento severo.",
-                "manejo": "Entrada de Fungicidas para Ferrugem Asiática (Phakopsora pachyrhizi).",
-                "quimica": [
-                    {"Alvo": "Ferrugem", "Ativo": "Protioconazol + Trifloxistrobina", "Grupo": "Triazol + Estrobilurina", "Tipo": "Sistêmico"},
-                    {"Alvo": "Manchas", "Ativo": "Mancozebe", "Grupo": "Ditiocarbamato", "Tipo": "Protetor Multissítio"}
-                ]
-            },
-            "Enchimento (R5)": {
-                "desc": "Formação de grãos.",
-                "fisiologia": "Máxima translocação. Definição do PMG (Peso de Mil Grãos).",
-                "manejo": "Controle de Percevejos (Marrom/Verde) para evitar grão picado e retenção foliar.",
-                "quimica": [
-                    {"Alvo": "Percevejo", "Ativo": "Acefato", "Grupo": "Organofosforado", "Tipo": "Choque"},
-                    {"Alvo": "Percevejo", "Ativo": "Tiametoxam + Lambda", "Grupo": "Neo + Piretroide", "Tipo": "Sistêmico"}
-                ]
-            }
-        }
-    },
-    
-    # --- FRUTAS VERMELHAS (BERRIES) ---
-    "Amora Preta (Blackberry)": {
-        "t_base": 7,
-        "vars": {
-            "Tupy": {"kc": 1.0, "gda_meta": 1500, "info": "Exige horas de frio. Alta produtividade. Presença de espinhos."},
-            "BRS Xingu": {"kc": 1.05, "gda_meta": 1400, "info": "Cultivar sem espinhos. Facilita manejo e colheita."}
-        },
-        "fases": {
-            "Brotação": {
-                "desc": "Emissão de novas hastes produtivas.",
-                "fisiologia": "Alta demanda de Nitrogênio para vigor.",
-                "manejo": "Seleção de hastes. Monitoramento de Ferrugem.",
-                "quimica": [
-                    {"Alvo": "Ferrugem", "Ativo": "Tebuconazol", "Grupo": "Triazol", "Tipo": "Curativo"},
-                    {"Alvo": "Cochonilha", "Ativo": "Óleo Mineral", "Grupo": "Físico", "Tipo": "Contato"}
-                ]
-            },
-            "Frutificação": {
-                "desc": "Formação e maturação de bagas.",
-                "fisiologia": "Acúmulo de sólidos solúveis (Brix).",
-                "manejo": "Controle de Drosophila suzukii (SWD) e Botrytis.",
-                "quimica": [
-                    {"Alvo": "SWD (Mosca)", "Ativo": "Espinosade", "Grupo": "Espinocina", "Tipo": "Isca Biológica"},
-                    {"Alvo": "Botrytis", "Ativo": "Iprodiona", "Grupo": "Dicarboximida", "Tipo": "Contato"}
-                ]
-            }
-        }
-    },
-    "Framboesa (Raspberry)": {
-        "t_base": 7, "vars": {"Heritage": {"kc": 1.1, "gda_meta": 1300, "info": "Remontante (Produz na haste do ano)."}},
-        "fases": {
-            "Vegetativo": {"desc": "Crescimento de canas.", "fisiologia": "Estruturação.", "manejo": "Ácaro Vermelho.", "quimica": [{"Alvo": "Ácaro", "Ativo": "Abamectina", "Grupo": "Avermectina", "Tipo": "Translaminar"}]},
-            "Produção": {"desc": "Flores e Frutos.", "fisiologia": "Sensível a chuva na flor.", "manejo": "Podridão Cinzenta.", "quimica": [{"Alvo": "Botrytis", "Ativo": "Ciprodinil + Fludioxonil", "Grupo": "Switch", "Tipo": "Sistêmico Local"}]}
-        }
-    },
-    "Mirtilo (Blueberry)": {
-        "t_base": 7, "vars": {"Emerald": {"kc": 0.95, "gda_meta": 1800, "info": "Exige pH ácido (4.5)."}},
-        "fases": {
-            "Florada": {"desc": "Polinização.", "fisiologia": "Dependente de mamangavas (Bombus).", "manejo": "Botrytis.", "quimica": [{"Alvo": "Botrytis", "Ativo": "Fludioxonil", "Grupo": "Fenilpirrol", "Tipo": "Contato"}]}
-        }
-    },
-    "Morango": {
-        "t_base": 7, "vars": {"Albion": {"kc": 0.85, "gda_meta": 1250, "info": "Dia neutro. Sabor excelente."}},
-        "fases": {
-            "Colheita": {"desc": "Produção contínua.", "fisiologia": "Alta extração K e Ca.", "manejo": "Ácaro Rajado e Mofo Cinzento.", "quimica": [{"Alvo": "Ácaro", "Ativo": "Etoxazol", "Grupo": "Inibidor de Crescimento", "Tipo": "Contato"}, {"Alvo": "Oídio", "Ativo": "Enxofre", "Grupo": "Inorgânico", "Tipo": "Protetor"}]}
-        }
-    },
-
-    # --- HORTIFRUTI (HF) ---
-    "Batata (Solanum tuberosum)": {
-        "t_base": 7,
-        "vars": {
-            "Orchestra": {"kc": 1.15, "gda_meta": 1600, "info": "Pele lisa premium. Exige K para acabamento."},
-            "Cupido": {"kc": 1.10, "gda_meta": 1400, "info": "Ciclo curto. Sensibilidade extrema à Requeima."},
-            "Atlantic": {"kc": 1.15, "gda_meta": 1650, "info": "Indústria (Chips)."}
-        },
-        "fases": {
-            "Estolonização": {
-                "desc": "Crescimento vegetativo.",
-                "fisiologia": "Alta demanda N.",
-                "manejo": "Amontoa. Vaquinha (Diabrotica).",
-                "quimica": [{"Alvo": "Vaquinha", "Ativo": "Tiametoxam", "Grupo": "Neonicotinoide", "Tipo": "Sistêmico"}]
-            },
-            "Tuberização": {
-                "desc": "Início do Gancho.",
-                "fisiologia": "Inversão hormonal. Crítico água.",
-                "manejo": "Requeima (Phytophthora infestans).",
-                "quimica": [
-                    {"Alvo": "Requeima", "Ativo": "Metalaxil-M + Mancozeb", "Grupo": "Sistêmico + Protetor", "Tipo": "Curativo"},
-                    {"Alvo": "Requeima", "Ativo": "Mandipropamida", "Grupo": "CAA", "Tipo": "Translaminar"}
-                ]
-            },
-            "Enchimento": {
-                "desc": "Engorda.",
-                "fisiologia": "Translocação.",
-                "manejo": "Traça (Phthorimaea) e Mosca Branca.",
-                "quimica": [{"Alvo": "Traça", "Ativo": "Clorfenapir", "Grupo": "Pirrol", "Tipo": "Ingestão"}]
-            }
-        }
-    },
-    
-    # --- CULTURAS TROPICAIS ---
-    "Café (Coffea arabica)": {
-        "t_base": 10, "vars": {"Catuaí": {"kc": 1.1, "gda_meta": 3000, "info": "Suscetível a ferrugem."}, "Arara": {"kc": 1.2, "gda_meta": 2900, "info": "Resistente a ferrugem."}},
-        "fases": {
-            "Chumbinho": {"desc": "Expansão rápida.", "fisiologia": "Divisão celular.", "manejo": "Ferrugem e Cercospora.", "quimica": [{"Alvo": "Ferrugem", "Ativo": "Ciproconazol + Azoxistrobina", "Grupo": "Triazol+Estrob", "Tipo": "Sistêmico"}]},
-            "Granação": {"desc": "Enchimento de grão.", "fisiologia": "Sólidos.", "manejo": "Broca e Bicho Mineiro.", "quimica": [{"Alvo": "Broca", "Ativo": "Ciantraniliprole", "Grupo": "Diamida", "Tipo": "Sistêmico"}]}
-        }
-    },
-    "Citros (Limão/Laranja)": {
-        "t_base": 13, "vars": {"Tahiti": {"kc": 0.75, "gda_meta": 2000, "info": "Limão Ácido."}},
-        "fases": {
-            "Fluxo Vegetativo": {"desc": "Brotação.", "fisiologia": "Folhas novas.", "manejo": "Psilídeo (Greening) e Minadora.", "quimica": [{"Alvo": "Psilídeo", "Ativo": "Imidacloprido + Bifentrina", "Grupo": "Neo+Piretroide", "Tipo": "Choque"}]}
-        }
-    },
-    "Manga": {
-        "t_base": 13, "vars": {"Palmer": {"kc": 0.9, "gda_meta": 2800, "info": "Fibrosa."}},
-        "fases": {
-            "Florada": {"desc": "Panícula.", "fisiologia": "Polinização.", "manejo": "Oídio e Antracnose.", "quimica": [{"Alvo": "Oídio", "Ativo": "Enxofre", "Grupo": "Inorgânico", "Tipo": "Protetor"}]}
-        }
-    },
-    "Uva": {
-        "t_base": 10, "vars": {"Vitoria": {"kc": 0.85, "gda_meta": 1500, "info": "Sem semente."}},
-        "fases": {
-            "Maturação": {"desc": "Véraison (Mudança de cor).", "fisiologia": "Acúmulo de açúcar.", "manejo": "Podridão do Cacho.", "quimica": [{"Alvo": "Podridão", "Ativo": "Iprodiona", "Grupo": "Dicarboximida", "Tipo": "Contato"}]}
-        }
-    }
-}
+@st.cache_resource
+def get_catalogo():
+    # Uma fonte por processo; o catálogo é relido a quente quando banco_titan.json muda
+    return FonteCatalogo()
+
+CATALOGO = get_catalogo().recarregar()
+BANCO_TITAN = CATALOGO.banco
 
 # ==============================================================================
 # 3. MOTOR CIENTÍFICO (FÍSICA DE AMBIENTE)
@@ -318,73 +176,148 @@ class AgroMath:
 def get_credentials():
     return st.query_params.get("w_key", None), st.query_params.get("g_key", None)
 
+@st.cache_resource
+def get_cache():
+    # Instância única por processo: compartilhada entre todas as sessões do dashboard
+    return CacheTTL()
+
+@st.cache_resource
+def get_pipeline_ia(api_key):
+    # Um pipeline por chave e processo: cache de diagnósticos compartilhado entre sessões
+    return PipelineDiagnostico(ClienteGemini(api_key))
+
+@st.cache_resource
+def get_cliente_owm(key):
+    # Um cliente por chave e processo: pool keep-alive, disjuntores e respostas guardadas compartilhados.
+    # Prazos mais curtos que os do cron: a tela não espera 30 s por uma API degradada.
+    return ClienteOWM(key, timeout=(3.05, 5), tentativas=2)
+
+@st.cache_resource
+def get_deposito():
+    # Depósito compartilhado com o aquecedor.py (None se ele não roda nesta máquina)
+    return deposito_padrao(grade=GRADE)
+
+def cache_ou_deposito(key, endpoint, lat, lon, ao_baixar=None):
+    # Memória do processo -> depósito aquecido -> cliente HTTP; o TTL em memória desconta a idade da resposta.
+    # (lat, lon) já é o centro da célula da grade: sessões na mesma célula compartilham a busca.
+    # Sem depósito, a reserva é a do cliente: resposta vencida na hora e renovação em segundo plano.
+    cache, chave = get_cache(), CacheTTL.chave(endpoint, lat, lon)
+    GRADE.contar(pedidos=1)
+    payload = cache.get(chave)
+    if payload is None:
+        def buscar():
+            def rede(vencido_ok):
+                GRADE.contar(buscas=1)
+                return get_cliente_owm(key).buscar(endpoint, lat, lon, com_idade=True, vencido_ok=vencido_ok)
+            dep = get_deposito()
+            payload, idade = dep.obter(endpoint, lat, lon, lambda: rede(False)[0], com_idade=True) if dep is not None else rede(True)
+            cache.put(chave, payload, idade)
+            if idade == 0.0 and ao_baixar: ao_baixar(payload)
+            return payload
+        payload = GRADE.obter(chave, buscar)
+    return payload
+
 def get_coords(city, key):
     try:
-        r = requests.get(f"http://api.openweathermap.org/geo/1.0/direct?q={city}&limit=1&appid={key}", timeout=5).json()
+        r = get_cache().obter(CacheTTL.chave("geo", city.strip().lower()),
+                              lambda: get_cliente_owm(key).buscar("geo", q=city, limit=1))
         if r: return r[0]['lat'], r[0]['lon']
     except: pass
     return None, None
 
+def registrar_historico(lat, lon, payload):
+    # Cada previsão nova (miss no cache) vira uma rodada no histórico: alimenta o GDA observado
+    try:
+        with HistoricoAgro() as hist: hist.registrar_previsao(id_local(lat, lon), previsao_diaria(payload))
+    except: pass
+
+def fetch_forecast(key, lat, lon):
+    lat, lon = GRADE.centro(lat, lon)
+    # Previsões trazidas pelo aquecedor já entram no histórico por ele (mesmo id de local: a célula)
+    return cache_ou_deposito(key, "forecast", lat, lon, ao_baixar=lambda r: registrar_historico(lat, lon, r))
+
+@st.cache_resource
+def get_acumuladores():
+    return {}
+
+def get_gda(lat, lon, plantio, t_base):
+    # Acumulador por (local, plantio, t_base) vive no processo; cada rerun só acrescenta dias novos.
+    # Dias sem rodada gravada vêm da reanálise do local (ou da base fixa), nunca da previsão
+    lat, lon = GRADE.centro(lat, lon)
+    chave = (id_local(lat, lon), plantio, t_base)
+    acc = get_acumuladores().setdefault(chave, AcumuladorGDA(chave[0], plantio, t_base))
+    try: acc.atualizar(clima=estimativa_climatologica(get_climatologia(), lat, lon, t_base))
+    except: pass
+    return acc
+
+def fetch_weather(key, lat, lon):
+    lat, lon = GRADE.centro(lat, lon)
+    return cache_ou_deposito(key, "weather", lat, lon)
+
 def get_forecast(key, lat, lon, kc, t_base):
+    # Payload bruto vem do cache; trocar cultura/variedade/fase só recalcula as colunas derivadas.
+    # Usa os 40 passos 3-horários agregados por dia local; os passos ficam em df.attrs['slots'].
     try:
-        r = requests.get(f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={key}&units=metric&lang=pt_br", timeout=5).json()
-        data = []
-        for i in range(0, 40, 8):
-            item = r['list'][i]
-            t = item['main']['temp']
-            h = item['main']['humidity']
-            data.append({
-                'Data': datetime.fromtimestamp(item['dt']).strftime('%d/%m %Hh'),
-                'Temp': t,
-                'Umid': h,
-                'VPD': AgroMath.calc_vpd(t, h),
-                'Delta T': AgroMath.calc_delta_t(t, h),
-                'ETc': AgroMath.calc_etc(t, kc),
-                'GDA': max(0, t - t_base),
-                'Chuva': sum([r['list'][i+j].get('rain', {}).get('3h', 0) for j in range(8) if i+j < len(r['list'])])
-            })
-        return pd.DataFrame(data)
+        r = fetch_forecast(key, lat, lon)
+        serie = extrair_serie(r)
+        df = tabela_previsao(serie, kc, t_base)
+        # Identifica a rodada da previsão (chave do cache do laudo PDF)
+        df.attrs['snapshot'] = hashlib.blake2b(b"".join(serie[k].tobytes() for k in ('dt', 'temp', 'umid', 'chuva')) + f"{lat:.2f},{lon:.2f}".encode(), digest_size=16).hexdigest()
+        return df
     except: return pd.DataFrame()
 
-def get_radar(key, lat, lon):
-    pts = {"Norte": (lat+0.15, lon), "Sul": (lat-0.15, lon), "Leste": (lat, lon+0.15), "Oeste": (lat, lon-0.15)}
+def get_radar(key, lat, lon, n_pontos=4, raio=0.15):
+    # Estações virtuais consultadas em paralelo; as que estouram o prazo vão em dfr.attrs['pendentes']
+    pts = gerar_estacoes_virtuais(lat, lon, raio=raio, n=n_pontos)
+    resultados = buscar_radar(pts, carregar=lambda e: fetch_weather(key, e['lat'], e['lon']))
     res = []
-    for d, c in pts.items():
-        try:
-            r = requests.get(f"https://api.openweathermap.org/data/2.5/weather?lat={c[0]}&lon={c[1]}&appid={key}&units=metric", timeout=3).json()
-            res.append({"Dir": d, "Temp": r['main']['temp'], "Chuva": "Sim" if "rain" in r else "Não"})
+    for r in resultados:
+        if r['status'] != "ok": continue
+        try: res.append({"Dir": r['nome'], "Temp": r['dados']['main']['temp'], "Chuva": "Sim" if "rain" in r['dados'] else "Não"})
         except: pass
-    return pd.DataFrame(res)
-
-def generate_pdf_report(cultura, variedade, fase, dias, hoje_data, recomendacoes):
-    """Gera um relatório técnico PDF simplificado (Mockup funcional para o exemplo)"""
-    # Em produção, usaria FPDF, mas aqui simulamos a lógica de exportação
-    buffer = io.BytesIO()
-    report_content = f"""
-    RELATÓRIO TÉCNICO AGRO-INTEL TITAN
-    ----------------------------------
-    Data: {date.today()}
-    Propriedade: Fazenda Progresso (Simulada)
-    
-    CULTURA: {cultura}
-    VARIEDADE: {variedade}
-    FASE ATUAL: {fase}
-    IDADE: {dias} Dias
-    
-    CONDIÇÕES CLIMÁTICAS HOJE ({hoje_data['Data']}):
-    - Temperatura: {hoje_data['Temp']} C
-    - Umidade: {hoje_data['Umid']} %
-    - VPD: {hoje_data['VPD']} kPa
-    - Delta T: {hoje_data['Delta T']} C
-    
-    RECOMENDAÇÃO TÉCNICA:
-    {recomendacoes}
-    
-    Gerado por Agro-Intel System v25.0
+    dfr = pd.DataFrame(res)
+    dfr.attrs['pendentes'] = estacoes_pendentes(resultados)
+    return dfr
+
+@st.cache_resource
+def get_talhoes():
+    # Cadastro persistente (SQLite + R*Tree) compartilhado por todas as sessões
+    return RegistroTalhoes()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_url_tiles():
+    # Proxy de tiles do escritório (tiles_satelite.py) se estiver no ar; senão a Esri direto
+    return url_mapa()
+
+@st.cache_resource
+def get_climatologia():
+    # Cache em disco (float32 por ano) compartilhado por todas as sessões; a fonte vem de CLIMATOLOGIA_FONTE
+    return CacheClimatologia()
+
+@st.cache_data(ttl=6 * 3600, max_entries=16, show_spinner="Carregando safras anteriores...")
+def get_safras(lat, lon, inicio, dias, n_safras, kc, t_base):
+    lat, lon = GRADE.centro(lat, lon)
+    return comparar_safras(get_climatologia(), lat, lon, inicio, dias, n_safras, kc, t_base)
+
+@st.cache_data(ttl=6 * 3600, max_entries=16, show_spinner="Carregando série horária...")
+def get_series_longas(lat, lon, anos):
+    # Já reduzidas aqui: o navegador recebe no máximo PONTOS_MAX pontos por série, não anos de horas
+    lat, lon = GRADE.centro(lat, lon)
+    fim = date.today()
+    inicio = date(fim.year - anos + 1, 1, 1)
+    h = get_climatologia().horario(lat, lon, inicio, fim)
+    d = get_climatologia().diario(lat, lon, inicio, fim, completar=False)
+    return reduzir_pontos(h['hora'], h['temp']), agregar_soma(d['dia'], d['chuva'])
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def generate_pdf_report(cultura, variedade, fase, dias, snapshot, _df, _dados, _info):
+    """
+    Laudo técnico em PDF, gerado só quando o download é pedido.
+    Cacheado por (cultura, variedade, fase, idade, snapshot da previsão); os argumentos
+    com "_" não entram na chave: o snapshot já identifica a previsão usada no DataFrame.
     """
-    buffer.write(report_content.encode('utf-8'))
-    buffer.seek(0)
-    return buffer
+    from laudo_pdf import gerar_laudo_pdf  # fpdf só carrega no primeiro download (~0,4 s de import)
+    return gerar_laudo_pdf(io.BytesIO(), cultura, variedade, fase, dias, _df, _dados, _info).getvalue()
 
 # ==============================================================================
 # 5. UI/UX PRINCIPAL
@@ -417,7 +350,6 @@ c_loc, c_cult, c_time = st.columns([1.5, 1.5, 1])
 # Estado Inicial
 if 'loc_lat' not in st.session_state: st.session_state['loc_lat'] = -13.414
 if 'loc_lon' not in st.session_state: st.session_state['loc_lon'] = -41.285
-if 'pontos_mapa' not in st.session_state: st.session_state['pontos_mapa'] = []
 
 with c_loc:
     st.markdown('<div class="panel-label">📍 GEOLOCALIZAÇÃO</div>', unsafe_allow_html=True)
@@ -435,10 +367,10 @@ with c_loc:
 
 with c_cult:
     st.markdown('<div class="panel-label">🚜 UNIDADE PRODUTIVA</div>', unsafe_allow_html=True)
-    cult_sel = st.selectbox("Cultura", sorted(list(BANCO_TITAN.keys())))
+    cult_sel = st.selectbox("Cultura", CATALOGO.culturas)
     cv, cf = st.columns(2)
-    var_sel = cv.selectbox("Material Genético", list(BANCO_TITAN[cult_sel]['vars'].keys()))
-    fase_sel = cf.selectbox("Estágio Fenológico", list(BANCO_TITAN[cult_sel]['fases'].keys()))
+    var_sel = cv.selectbox("Material Genético", CATALOGO.variedades[cult_sel])
+    fase_sel = cf.selectbox("Estágio Fenológico", CATALOGO.fases[cult_sel])
 
 with c_time:
     st.markdown('<div class="panel-label">📆 CRONOGRAMA</div>', unsafe_allow_html=True)
@@ -456,8 +388,10 @@ df = get_forecast(url_w, st.session_state['loc_lat'], st.session_state['loc_lon'
 
 if not df.empty:
     hoje = df.iloc[0]
-    gda_acum = dias * df['GDA'].mean()
-    progresso = min(1.0, gda_acum / info.get('gda_meta', 1500))
+    acc_gda = get_gda(st.session_state['loc_lat'], st.session_state['loc_lon'], dp, BANCO_TITAN[cult_sel]['t_base'])
+    gda_acum = acc_gda.acumulado()
+    progresso = acc_gda.progresso(info.get('gda_meta', 1500))
+    data_meta = acc_gda.projetar_data(info.get('gda_meta', 1500), df['GDA'].tolist())
     
     # KPI STRIP
     k1, k2, k3, k4 = st.columns(4)
@@ -466,152 +400,309 @@ if not df.empty:
     k3.metric("💦 ETc (Demanda)", f"{hoje['ETc']} mm", f"Kc: {info['kc']}")
     k4.metric("🛡️ Delta T", f"{hoje['Delta T']}°C", "Não Aplicar" if hoje['Delta T'] < 2 or hoje['Delta T'] > 8 else "Aplicar", delta_color="inverse")
     
-    # NAVIGATION
-    tabs = st.tabs(["🎓 CONSULTORIA", "📊 CLIMATOLOGIA", "📡 RADAR", "👁️ IA VISION", "💰 CUSTOS", "🗺️ GIS MAP", "📄 RELATÓRIOS"])
+    # NAVIGATION (abas preguiçosas: só o corpo da aba selecionada executa a cada rerun;
+    # radar, mapa folium e laudo não custam nada enquanto o usuário está em outra aba)
+    tabs = st.tabs(["🎓 CONSULTORIA", "📊 CLIMATOLOGIA", "📡 RADAR", "👁️ IA VISION", "💰 CUSTOS", "🗺️ GIS MAP", "📄 RELATÓRIOS"],
+                   key="aba_ativa", on_change="rerun")
     
     # --- ABA 1: CONSULTORIA TÉCNICA (DETALHADA) ---
     with tabs[0]:
-        # Barra GDA
-        st.write(f"**Acúmulo Térmico (GDA):** {gda_acum:.0f} / {info.get('gda_meta', 1500)}")
-        st.progress(progresso)
+        if tabs[0].open:
+            # Barra GDA
+            st.write(f"**Acúmulo Térmico (GDA):** {gda_acum:.0f} / {info.get('gda_meta', 1500)}" + (f" · Meta prevista para **{data_meta.strftime('%d/%m/%Y')}**" if data_meta else ""))
+            st.progress(progresso)
         
-        # Alertas Dinâmicos
-        if hoje['Umid'] > 85 or hoje['Chuva'] > 2:
-            st.markdown('<div class="alert-box alert-danger">🚨 ALERTA FITOSSANITÁRIO: Alta umidade favorece patógenos. Priorize fungicidas sistêmicos.</div>', unsafe_allow_html=True)
-        else:
-            st.markdown('<div class="alert-box alert-success">✅ JANELA DE APLICAÇÃO: Condições favoráveis para protetores.</div>', unsafe_allow_html=True)
+            # Alertas Dinâmicos: pressão dos patógenos da cultura sobre os passos 3-horários da previsão
+            slots = df.attrs['slots']
+            risco = avaliar_fazendas([{'id': 'painel', 'cultura': cult_sel}],
+                                     [{'dt': slots['dt'].to_numpy(), 'temp': slots['Temp'].to_numpy(), 'umid': slots['Umid'].to_numpy(),
+                                       'chuva': slots['Chuva'].to_numpy()}], banco=BANCO_TITAN)[0]
+            em_risco = [p for p in risco['patogenos'] if p['nivel'] != "BAIXO"]
+            lista = ", ".join(f"{p['alvo']}" + (f" (infecção {p['inicio']})" if p['inicio'] else "") for p in em_risco)
+            if risco['nivel'] == "ALTO":
+                st.markdown(f'<div class="alert-box alert-danger">🚨 ALERTA FITOSSANITÁRIO: {lista}. Molhamento foliar de até {risco["molhamento_max"]:.0f}h em 24h. Priorize fungicidas sistêmicos.</div>', unsafe_allow_html=True)
+            elif risco['nivel'] == "MODERADO":
+                st.markdown(f'<div class="alert-box alert-warning">⚠️ ATENÇÃO FITOSSANITÁRIA: {lista}. Mantenha a proteção com fungicidas protetores.</div>', unsafe_allow_html=True)
+            else:
+                st.markdown('<div class="alert-box alert-success">✅ JANELA DE APLICAÇÃO: Condições favoráveis para protetores.</div>', unsafe_allow_html=True)
+            if risco['patogenos']:
+                st.caption(" · ".join(f"{p['alvo']}: índice {p['pressao_max']:.1f} ({p['consec_max']:.0f}h seguidas favoráveis)" for p in risco['patogenos']))
 
-        c_left, c_right = st.columns(2)
+            c_left, c_right = st.columns(2)
         
-        with c_left:
-            st.markdown(f"""
-            <div class="tech-card">
-                <div class="tech-header">🧬 FISIOLOGIA & DESENVOLVIMENTO</div>
-                <div class="info-label">DESCRIÇÃO DA FASE</div>
-                <div class="info-value">{dados['desc']}</div>
-                <div class="info-label">DINÂMICA FISIOLÓGICA</div>
-                <div class="info-value">{dados['fisiologia']}</div>
-                <div class="info-label">GENÉTICA ({var_sel})</div>
-                <div class="info-value">{info['info']}</div>
-            </div>
-            """, unsafe_allow_html=True)
+            with c_left:
+                st.markdown(f"""
+                <div class="tech-card">
+                    <div class="tech-header">🧬 FISIOLOGIA & DESENVOLVIMENTO</div>
+                    <div class="info-label">DESCRIÇÃO DA FASE</div>
+                    <div class="info-value">{dados['desc']}</div>
+                    <div class="info-label">DINÂMICA FISIOLÓGICA</div>
+                    <div class="info-value">{dados['fisiologia']}</div>
+                    <div class="info-label">GENÉTICA ({var_sel})</div>
+                    <div class="info-value">{info['info']}</div>
+                </div>
+                """, unsafe_allow_html=True)
             
-        with c_right:
-            # Renderizador Seguro de Lista Química
-            chem_html = ""
-            if isinstance(dados['quimica'], list):
-                for item in dados['quimica']:
-                    chem_html += f"""
-                    <li class="chem-item">
-                        <div>
-                            <span class="chem-name">{item['Alvo']}:</span> {item['Ativo']}
-                        </div>
-                        <span class="chem-meta">{item['Grupo']}</span>
-                    </li>
-                    """
-            else:
-                chem_html = f"<li>{dados['quimica']}</li>"
-
-            st.markdown(f"""
-            <div class="tech-card">
-                <div class="tech-header">🛡️ ESTRATÉGIA DE MANEJO</div>
-                <div class="info-label">MANEJO CULTURAL</div>
-                <div class="info-value">{dados.get('manejo', '-')}</div>
-                <hr style="margin:20px 0; border:0; border-top:1px solid #e2e8f0;">
-                <div class="info-label">🧪 FARMÁCIA DIGITAL</div>
-                <ul class="chem-list">{chem_html}</ul>
-            </div>
-            """, unsafe_allow_html=True)
+            with c_right:
+                # Renderizador Seguro de Lista Química
+                chem_html = ""
+                if isinstance(dados['quimica'], list):
+                    for item in dados['quimica']:
+                        chem_html += f"""
+                        <li class="chem-item">
+                            <div>
+                                <span class="chem-name">{item['Alvo']}:</span> {item['Ativo']}
+                            </div>
+                            <span class="chem-meta">{item['Grupo']}</span>
+                        </li>
+                        """
+                else:
+                    chem_html = f"<li>{dados['quimica']}</li>"
+
+                st.markdown(f"""
+                <div class="tech-card">
+                    <div class="tech-header">🛡️ ESTRATÉGIA DE MANEJO</div>
+                    <div class="info-label">MANEJO CULTURAL</div>
+                    <div class="info-value">{dados.get('manejo', '-')}</div>
+                    <hr style="margin:20px 0; border:0; border-top:1px solid #e2e8f0;">
+                    <div class="info-label">🧪 FARMÁCIA DIGITAL</div>
+                    <ul class="chem-list">{chem_html}</ul>
+                </div>
+                """, unsafe_allow_html=True)
+
+                # Consulta cruzada (todas as culturas) pelos índices do catálogo
+                with st.expander("🔎 Consulta cruzada da farmácia"):
+                    campo = st.radio("Buscar por", ["Alvo", "Ativo", "Grupo"], horizontal=True)
+                    valor = st.selectbox(campo, CATALOGO.opcoes[campo])
+                    achados = CATALOGO.buscar(**{campo.lower(): valor})
+                    if achados:
+                        st.dataframe(pd.DataFrame(achados)[['Cultura', 'Fase', 'Alvo', 'Ativo', 'Grupo', 'Tipo']], hide_index=True)
 
     # --- ABA 2: CLIMATOLOGIA AVANÇADA ---
     with tabs[1]:
-        st.markdown('<div class="tech-card">', unsafe_allow_html=True)
-        fig = go.Figure()
-        fig.add_trace(go.Bar(x=df['Data'], y=df['Chuva'], name='Precipitação (mm)', marker_color='#0288d1'))
-        fig.add_trace(go.Scatter(x=df['Data'], y=df['ETc'], name='Evapotranspiração (mm)', line=dict(color='#d32f2f', width=3)))
-        fig.update_layout(title="Balanço Hídrico (5 Dias)", template="plotly_white", height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        if tabs[1].open:
+            import plotly.graph_objects as go  # só as abas com gráfico carregam o plotly
+            modo_clima = st.radio("Período", ["Previsão (5 dias)", "Histórico (safras)"], horizontal=True, label_visibility="collapsed")
+        if tabs[1].open and modo_clima == "Histórico (safras)":
+            st.markdown('<div class="tech-card">', unsafe_allow_html=True)
+            c_h1, c_h2, c_h3 = st.columns(3)
+            n_safras = c_h1.slider("Safras anteriores", 1, 10, SAFRAS_PADRAO)
+            duracao = c_h2.number_input("Duração da safra (dias)", 30, 400, min(400, max(dias, 120)))
+            var_hist = c_h3.selectbox("Variável", ["Chuva", "ETc", "GDA"])
+            try:
+                comp = get_safras(st.session_state['loc_lat'], st.session_state['loc_lon'], dp, int(duracao), n_safras, info['kc'], BANCO_TITAN[cult_sel]['t_base'])
+            except Exception as e:
+                comp = None
+                st.warning(f"Histórico climático indisponível: {e}")
+            if comp:
+                v = {"Chuva": "chuva", "ETc": "etc", "GDA": "gda"}[var_hist]
+                x = comp['dia_safra'] + 1
+                fig_h = go.Figure()
+                for ano, s in sorted(comp['passadas'].items()):
+                    fig_h.add_trace(go.Scatter(x=x, y=s[v], name=f"{ano}/{ano + 1}", line=dict(color='#cbd5e1', width=1), opacity=0.8))
+                if comp['media']:
+                    fig_h.add_trace(go.Scatter(x=x, y=comp['p90'][v], line=dict(width=0), showlegend=False, hoverinfo='skip'))
+                    fig_h.add_trace(go.Scatter(x=x, y=comp['p10'][v], fill='tonexty', fillcolor='rgba(2,136,209,0.12)', line=dict(width=0), name='Faixa p10-p90'))
+                    fig_h.add_trace(go.Scatter(x=x, y=comp['media'][v], name='Média das safras', line=dict(color='#0288d1', width=2, dash='dash')))
+                fig_h.add_trace(go.Scatter(x=x, y=comp['atual'][v], name=f"Safra atual ({dp.year}/{dp.year + 1})", line=dict(color='#d32f2f', width=3)))
+                fig_h.update_layout(title=f"{var_hist} acumulado por dia de safra", xaxis_title="Dias após o plantio", template="plotly_white", height=420)
+                st.plotly_chart(fig_h, use_container_width=True)
+
+                validos = np.flatnonzero(~np.isnan(comp['atual'][v]))
+                if len(validos) and comp['media']:
+                    i = validos[-1]
+                    atual_v, media_v = comp['atual'][v][i], comp['media'][v][i]
+                    m1, m2 = st.columns(2)
+                    m1.metric(f"{var_hist} acumulado (dia {i + 1})", f"{atual_v:.0f}", f"{(atual_v / media_v - 1) * 100:+.0f}% vs média" if media_v else None)
+                    m2.metric("Média das safras anteriores", f"{media_v:.0f}")
+
+                with st.expander("📈 Séries longas (temperatura horária e chuva diária)"):
+                    try:
+                        (hx, hy), (cx, cy) = get_series_longas(st.session_state['loc_lat'], st.session_state['loc_lon'], n_safras + 1)
+                        fig_t = go.Figure(go.Scatter(x=hx, y=hy, name='Temperatura (°C)', line=dict(color='#f97316', width=1)))
+                        fig_t.update_layout(title="Temperatura horária", template="plotly_white", height=300)
+                        st.plotly_chart(fig_t, use_container_width=True)
+                        fig_c = go.Figure(go.Bar(x=cx, y=cy, name='Chuva (mm)', marker_color='#0288d1'))
+                        fig_c.update_layout(title="Chuva (mm por período)", template="plotly_white", height=300)
+                        st.plotly_chart(fig_c, use_container_width=True)
+                    except Exception as e:
+                        st.warning(f"Série horária indisponível: {e}")
+            st.markdown('</div>', unsafe_allow_html=True)
+        elif tabs[1].open:
+            st.markdown('<div class="tech-card">', unsafe_allow_html=True)
+            fig = go.Figure()
+            fig.add_trace(go.Bar(x=df['Data'], y=df['Chuva'], name='Precipitação (mm)', marker_color='#0288d1'))
+            fig.add_trace(go.Scatter(x=df['Data'], y=df['ETc'], name='Evapotranspiração (mm)', line=dict(color='#d32f2f', width=3)))
+            fig.update_layout(title=f"Balanço Hídrico ({len(df)} Dias)", template="plotly_white", height=400)
+            st.plotly_chart(fig, use_container_width=True)
+
+            # Janelas de pulverização por passo de 3h (Delta T ideal entre 2 e 8 °C)
+            slots = df.attrs.get('slots')
+            if slots is not None and not slots.empty:
+                fig_dt = go.Figure()
+                fig_dt.add_hrect(y0=2, y1=8, fillcolor='#22c55e', opacity=0.12, line_width=0)
+                fig_dt.add_trace(go.Scatter(x=slots['Hora'], y=slots['Delta T'], name='Delta T (°C)', mode='lines+markers',
+                                            marker=dict(color=['#16a34a' if ok else '#dc2626' for ok in slots['Pulverizar']])))
+                fig_dt.update_layout(title="Janelas de Pulverização (Delta T a cada 3h)", template="plotly_white", height=300)
+                st.plotly_chart(fig_dt, use_container_width=True)
         
-        col_res1, col_res2 = st.columns(2)
-        col_res1.metric("Acumulado Chuva", f"{df['Chuva'].sum():.1f} mm")
-        col_res2.metric("Déficit Hídrico", f"{df['Chuva'].sum() - df['ETc'].sum():.1f} mm")
-        st.markdown('</div>', unsafe_allow_html=True)
+            col_res1, col_res2 = st.columns(2)
+            col_res1.metric("Acumulado Chuva", f"{df['Chuva'].sum():.1f} mm")
+            col_res2.metric("Déficit Hídrico", f"{df['Chuva'].sum() - df['ETc'].sum():.1f} mm")
+
+            # Balanço no solo (FAO-56): a depleção da zona radicular diz quando e quanto irrigar
+            st.markdown("#### 💧 Balanço Hídrico do Solo (FAO-56)")
+            c_s1, c_s2 = st.columns(2)
+            solo_sel = c_s1.selectbox("Textura do solo", list(SOLOS), index=list(SOLOS).index(SOLO_PADRAO))
+            dr_ini = c_s2.number_input("Depleção atual (mm)", 0.0, 300.0, 0.0, help="0 = solo na capacidade de campo (após chuva forte ou irrigação)")
+            par = parametros_talhoes([{'cultura': cult_sel, 'kc': info['kc'], 'solo': solo_sel}])
+            taw = float(par['taw'][0])
+            bal = simular(df['ETc'].to_numpy() / info['kc'], df['Chuva'].to_numpy(), par['kc'], par['taw'], par['p'], min(dr_ini, taw))
+            fig_s = go.Figure()
+            fig_s.add_trace(go.Bar(x=df['Data'], y=bal['irrig'][0], name='Irrigação recomendada (mm)', marker_color='#22c55e'))
+            fig_s.add_trace(go.Scatter(x=df['Data'], y=bal['dr'][0] + bal['irrig'][0], name='Depleção Dr (mm)', line=dict(color='#0288d1', width=3)))
+            fig_s.add_trace(go.Scatter(x=df['Data'], y=bal['raw'][0], name='RAW (início do estresse)', line=dict(color='#f59e0b', dash='dash')))
+            fig_s.add_trace(go.Scatter(x=df['Data'], y=[taw] * len(df), name='TAW (ponto de murcha)', line=dict(color='#dc2626', dash='dot')))
+            fig_s.update_layout(title=f"Depleção da Zona Radicular ({solo_sel})", template="plotly_white", height=350,
+                                yaxis=dict(autorange='reversed', title='mm abaixo da capacidade de campo'))
+            st.plotly_chart(fig_s, use_container_width=True)
+            dias_irrig = np.flatnonzero(bal['irrig'][0])
+            c_s3, c_s4, c_s5 = st.columns(3)
+            c_s3.metric("Água Disponível (TAW)", f"{taw:.0f} mm", f"RAW {bal['raw'][0][0]:.0f} mm", delta_color="off")
+            c_s4.metric("Próxima Irrigação", df['Data'].iloc[dias_irrig[0]] if len(dias_irrig) else "—",
+                        None if len(dias_irrig) else "Sem necessidade na previsão", delta_color="off")
+            c_s5.metric("Lâmina Bruta (pivô)", f"{bal['irrig'][0][dias_irrig[0]] / EFICIENCIA_PADRAO:.0f} mm" if len(dias_irrig) else "0 mm",
+                        f"Eficiência {EFICIENCIA_PADRAO:.0%}", delta_color="off")
+            st.markdown('</div>', unsafe_allow_html=True)
 
     # --- ABA 3: RADAR REGIONAL ---
     with tabs[2]:
-        st.markdown('<div class="tech-card">', unsafe_allow_html=True)
-        st.markdown("### 📡 Estações Virtuais (Raio 15km)")
-        dfr = get_radar(url_w, st.session_state['loc_lat'], st.session_state['loc_lon'])
-        if not dfr.empty:
-            cols = st.columns(4)
-            for i, r in dfr.iterrows():
-                bg = "#ffebee" if r['Chuva'] == "Sim" else "#e8f5e9"
-                with cols[i]: st.markdown(f'<div style="background:{bg}; padding:20px; border-radius:10px; text-align:center; border:1px solid #ddd;"><b>{r["Dir"]}</b><br><span style="font-size:1.5em; font-weight:bold;">{r["Temp"]:.0f}°C</span><br>Chuva: {r["Chuva"]}</div>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        if tabs[2].open:
+            st.markdown('<div class="tech-card">', unsafe_allow_html=True)
+            st.markdown("### 📡 Estações Virtuais (Raio 15km)")
+            dfr = get_radar(url_w, st.session_state['loc_lat'], st.session_state['loc_lon'])
+            if not dfr.empty:
+                cols = st.columns(4)
+                for i, r in dfr.iterrows():
+                    bg = "#ffebee" if r['Chuva'] == "Sim" else "#e8f5e9"
+                    with cols[i % 4]: st.markdown(f'<div style="background:{bg}; padding:20px; border-radius:10px; text-align:center; border:1px solid #ddd;"><b>{r["Dir"]}</b><br><span style="font-size:1.5em; font-weight:bold;">{r["Temp"]:.0f}°C</span><br>Chuva: {r["Chuva"]}</div>', unsafe_allow_html=True)
+            if dfr.attrs.get('pendentes'):
+                st.caption(f"⏱️ Estações sem resposta: {', '.join(dfr.attrs['pendentes'])}")
+            g = GRADE.estatisticas()
+            st.caption(f"🧭 Grade geohash-{g['precisao']}: {g['pedidos']} consultas de clima neste servidor, {g['buscas']} buscas na API ({g['taxa_acerto']:.0%} compartilhadas)")
+            st.markdown('</div>', unsafe_allow_html=True)
 
     # --- ABA 4: DIAGNÓSTICO IA ---
     with tabs[3]:
-        st.markdown('<div class="tech-card">', unsafe_allow_html=True)
-        c_cam, c_res = st.columns([1,2])
-        with c_cam:
-            img = st.camera_input("Capturar Imagem")
-        with c_res:
-            if img and url_g:
-                genai.configure(api_key=url_g)
-                with st.spinner("Processando diagnóstico neural..."):
-                    res = genai.GenerativeModel('gemini-1.5-flash').generate_content([f"Agrônomo Sênior. Cultura {cult_sel}. Fase {fase_sel}. Identifique praga/doença com base visual e sugira controle.", Image.open(img)]).text
-                    st.markdown(res)
-        st.markdown('</div>', unsafe_allow_html=True)
+        if tabs[3].open:
+            st.markdown('<div class="tech-card">', unsafe_allow_html=True)
+            c_cam, c_res = st.columns([1,2])
+            with c_cam:
+                img = st.camera_input("Capturar Imagem")
+            with c_res:
+                if img and url_g:
+                    # Mesma foto + cultura + fase não é reenviada: o resultado (ou o envio em andamento) é reaproveitado
+                    fut = get_pipeline_ia(url_g).submeter(img.getvalue(), cult_sel, fase_sel)
+                    if fut.done():
+                        try: st.markdown(fut.result())
+                        except Exception as e: st.error(f"Falha no diagnóstico: {e}")
+                    else:
+                        @st.fragment(run_every=2)
+                        def aguardar_diagnostico():
+                            # Só este bloco roda a cada 2s; quando o modelo responde, o app redesenha o resultado
+                            if fut.done(): st.rerun()
+                            st.info("⏳ Imagem enviada (reduzida a 1024 px). Diagnóstico neural em andamento...")
+                        aguardar_diagnostico()
+            st.markdown('</div>', unsafe_allow_html=True)
 
     # --- ABA 5: GESTÃO DE CUSTOS ---
     with tabs[4]:
-        st.markdown('<div class="tech-card">', unsafe_allow_html=True)
-        if 'custos' not in st.session_state: st.session_state['custos'] = []
-        c1, c2, c3 = st.columns([3, 1, 1])
-        i = c1.text_input("Descrição do Insumo")
-        v = c2.number_input("Valor (R$)", min_value=0.0)
-        if c3.button("Lançar Custo"): 
-            st.session_state['custos'].append({"Data": date.today(), "Item": i, "Valor": v})
-            st.rerun()
+        if tabs[4].open:
+            st.markdown('<div class="tech-card">', unsafe_allow_html=True)
+            if 'custos' not in st.session_state: st.session_state['custos'] = []
+            c1, c2, c3 = st.columns([3, 1, 1])
+            i = c1.text_input("Descrição do Insumo")
+            v = c2.number_input("Valor (R$)", min_value=0.0)
+            if c3.button("Lançar Custo"): 
+                st.session_state['custos'].append({"Data": date.today(), "Item": i, "Valor": v})
+                st.rerun()
         
-        if st.session_state['custos']:
-            df_custos = pd.DataFrame(st.session_state['custos'])
-            st.dataframe(df_custos, use_container_width=True)
-            st.metric("CUSTO TOTAL", f"R$ {df_custos['Valor'].sum():,.2f}")
-        st.markdown('</div>', unsafe_allow_html=True)
+            if st.session_state['custos']:
+                df_custos = pd.DataFrame(st.session_state['custos'])
+                st.dataframe(df_custos, use_container_width=True)
+                st.metric("CUSTO TOTAL", f"R$ {df_custos['Valor'].sum():,.2f}")
+            st.markdown('</div>', unsafe_allow_html=True)
 
     # --- ABA 6: MAPA GIS ---
     with tabs[5]:
-        st.markdown('<div class="tech-card">', unsafe_allow_html=True)
-        c1, c2 = st.columns([1,3])
-        with c1:
-            nm = st.text_input("Nome do Talhão")
-            if st.button("Salvar Ponto") and st.session_state.get('last_click'):
-                st.session_state['pontos_mapa'].append({"nome": nm, "lat": st.session_state['last_click'][0], "lon": st.session_state['last_click'][1]})
-                st.rerun()
-            for p in st.session_state['pontos_mapa']: st.write(f"📍 {p['nome']}")
-            if st.button("Limpar Mapa"): st.session_state['pontos_mapa'] = []; st.rerun()
-        
-        with c2:
-            m = folium.Map(location=[st.session_state['loc_lat'], st.session_state['loc_lon']], zoom_start=15)
-            folium.TileLayer('https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}', attr='Esri', name='Satélite').add_to(m)
-            LocateControl().add_to(m); Draw(export=True).add_to(m); Fullscreen().add_to(m)
-            for p in st.session_state['pontos_mapa']: folium.Marker([p['lat'], p['lon']], popup=p['nome']).add_to(m)
-            out = st_folium(m, height=500, returned_objects=["last_clicked"])
-            if out["last_clicked"]: st.session_state['last_click'] = (out["last_clicked"]["lat"], out["last_clicked"]["lng"])
-        st.markdown('</div>', unsafe_allow_html=True)
+        if tabs[5].open:
+            st.markdown('<div class="tech-card">', unsafe_allow_html=True)
+            reg = get_talhoes()
+            fazenda_id = id_local(st.session_state['loc_lat'], st.session_state['loc_lon'])
+            # Vista do mapa: a última informada pelo navegador (ou a aproximada ao abrir)
+            if st.session_state.get('gis_local') != (st.session_state['loc_lat'], st.session_state['loc_lon']):
+                st.session_state['gis_local'] = (st.session_state['loc_lat'], st.session_state['loc_lon'])
+                st.session_state['gis_centro'], st.session_state['gis_zoom'] = st.session_state['gis_local'], 15
+                st.session_state['gis_janela'] = janela_aproximada(*st.session_state['gis_local'], 15)
+            c1, c2 = st.columns([1,3])
+            with c1:
+                nm = st.text_input("Nome do Talhão")
+                if st.button("Salvar Ponto") and st.session_state.get('last_click'):
+                    reg.adicionar_ponto(nm or f"Ponto {reg.contar() + 1}", *st.session_state['last_click'], fazenda=fazenda_id)
+                    st.rerun()
+                if st.button("Salvar Desenho", help="Polígono ou marcador desenhado com as ferramentas do mapa") and st.session_state.get('ultimo_desenho'):
+                    try:
+                        reg.adicionar_geojson(st.session_state.pop('ultimo_desenho'), nome=nm or None, fazenda=fazenda_id)
+                        st.rerun()
+                    except ValueError as e:
+                        st.warning(str(e))
+                if st.session_state.get('last_click'):
+                    lat_c, lon_c = st.session_state['last_click']
+                    aqui = reg.contendo(lat_c, lon_c)
+                    perto = reg.mais_proximos(lat_c, lon_c)
+                    if aqui: st.caption(f"📍 Clique dentro de **{aqui[0]['nome']}**")
+                    elif perto: st.caption(f"📍 Talhão mais próximo: **{perto[0][0]['nome']}** a {perto[0][1]:.0f} m")
+                visiveis = reg.na_janela(*st.session_state['gis_janela'], limite=50)
+                st.caption(f"{reg.contar()} talhões cadastrados · {reg.contar_janela(*st.session_state['gis_janela'])} na tela")
+                if visiveis:
+                    opcoes = {f"{t['nome']} (#{t['id']})": t['id'] for t in visiveis}
+                    remover = st.selectbox("Talhão na tela", list(opcoes))
+                    if st.button("Remover Talhão"): reg.remover([opcoes[remover]]); st.rerun()
+
+            with c2:
+                # folium + plugins + streamlit_folium custam ~0,6 s de import: só quando o mapa abre
+                import folium
+                from folium.plugins import LocateControl, Fullscreen, Draw
+                from streamlit_folium import st_folium
+                m = folium.Map(location=list(st.session_state['gis_local']), zoom_start=15)
+                url_tiles, via_proxy = get_url_tiles()
+                folium.TileLayer(url_tiles, attr='Esri', name='Satélite').add_to(m)
+                LocateControl().add_to(m); Draw(export=True).add_to(m); Fullscreen().add_to(m)
+                # Só a camada de talhões muda entre reruns (e só com o que está na janela); o mapa base não é recriado no navegador
+                camada, _ = camada_mapa(reg, st.session_state['gis_janela'], st.session_state['gis_zoom'])
+                out = st_folium(m, key="mapa_gis", height=500, center=st.session_state['gis_centro'], zoom=st.session_state['gis_zoom'],
+                                feature_group_to_add=camada, returned_objects=["last_clicked", "bounds", "zoom", "center", "last_active_drawing"])
+                if out.get("last_clicked"): st.session_state['last_click'] = (out["last_clicked"]["lat"], out["last_clicked"]["lng"])
+                if out.get("last_active_drawing"): st.session_state['ultimo_desenho'] = out["last_active_drawing"]
+                janela = janela_folium(out.get("bounds"))
+                if janela and janela != st.session_state['gis_janela'] and janela[0] != janela[2]:
+                    st.session_state['gis_janela'], st.session_state['gis_zoom'] = janela, out.get("zoom") or st.session_state['gis_zoom']
+                    if out.get("center"): st.session_state['gis_centro'] = (out["center"]["lat"], out["center"]["lng"])
+                    st.rerun()
+                if not via_proxy: st.caption("🛰️ Proxy de tiles fora do ar: imagens direto da Esri (`python tiles_satelite.py servir`)")
+            st.markdown('</div>', unsafe_allow_html=True)
 
     # --- ABA 7: RELATÓRIOS (NOVO) ---
     with tabs[6]:
-        st.markdown('<div class="tech-card">', unsafe_allow_html=True)
-        st.subheader("📄 Emissão de Laudo Técnico")
-        rec_text = f"Manejo: {dados.get('manejo', '')}. Químicos: {dados['quimica']}"
-        pdf_file = generate_pdf_report(cult_sel, var_sel, fase_sel, dias, hoje, rec_text)
-        
-        st.download_button(
-            label="⬇️ Baixar Laudo PDF",
-            data=pdf_file,
-            file_name=f"Laudo_{cult_sel}_{date.today()}.txt", # txt simulando PDF para demo
-            mime="text/plain"
-        )
-        st.markdown('</div>', unsafe_allow_html=True)
+        if tabs[6].open:
+            st.markdown('<div class="tech-card">', unsafe_allow_html=True)
+            st.subheader("📄 Emissão de Laudo Técnico")
+            st.caption("Inclui KPIs do dia, gráfico de balanço hídrico, tabela química e previsão detalhada.")
+            # O PDF só é montado no clique (data chamável); rerodadas do app não pagam a geração
+            st.download_button(
+                label="⬇️ Baixar Laudo PDF",
+                data=lambda: generate_pdf_report(cult_sel, var_sel, fase_sel, dias, df.attrs.get('snapshot'), df, dados, info),
+                file_name=f"Laudo_{cult_sel}_{date.today()}.pdf",
+                mime="application/pdf"
+            )
+            st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,147 @@
+import argparse
+import heapq
+import os
+import threading
+import time
+
+from cache_api import TTL_ENDPOINT
+from cliente_owm import ClienteOWM
+from deposito_clima import ARQUIVO_DEPOSITO, DepositoClima
+from historico import HistoricoAgro, id_local
+from agregacao import previsao_diaria
+from radar import gerar_estacoes_virtuais
+from grade_espacial import GRADE, PRECISAO_GEOHASH, GradeEspacial
+
+# ==============================================================================
+# AQUECEDOR DE CACHE (PROCESSO EM SEGUNDO PLANO)
+# Mantém o depósito compartilhado com previsões e tempo atual de todas as
+# fazendas cadastradas e pontos de radar. Cada alvo é renovado antes de
+# expirar; as requisições são espaçadas para respeitar o limite da API.
+#
+#     python aquecedor.py fazendas.json [--por-minuto 50] [--uma-vez]
+# ==============================================================================
+ENDPOINTS = ("forecast", "weather")
+POR_MINUTO = 50             # Plano gratuito: 60 chamadas/min; folga para o dashboard
+ANTECEDENCIA = 0.8          # Renova com 80% do TTL: leitores nunca veem item vencido
+BACKOFF_FALHA = (60, 15 * 60)  # Nova tentativa após falha: 1 min dobrando até 15 min
+
+
+def montar_alvos(fazendas, virtuais=True, grade=GRADE):
+    """
+    (endpoint, lat, lon) únicos no centro das células da grade: previsão de cada fazenda,
+    radar cadastrado e estações virtuais do dashboard. Pontos vizinhos viram um só alvo.
+    """
+    fazendas = [{'lat': float(fz['lat']), 'lon': float(fz['lon']), 'radar': fz.get('radar', [])} for fz in fazendas]
+    estacoes = []
+    for fz in fazendas:
+        estacoes += fz['radar']
+        if virtuais:
+            estacoes += gerar_estacoes_virtuais(fz['lat'], fz['lon'])
+    alvos = [("forecast", la, lo) for la, lo, _ in grade.agrupar(fazendas).values()]
+    alvos += [("weather", la, lo) for la, lo, _ in grade.agrupar(estacoes).values()]
+    return sorted(alvos)
+
+
+class Aquecedor:
+    def __init__(self, alvos, deposito, key, por_minuto=POR_MINUTO, cliente=None, antecedencia=ANTECEDENCIA,
+                 registrar_historico=True, baixar=None):
+        self.deposito = deposito
+        self.key = key
+        self.intervalo = 60.0 / por_minuto if por_minuto else 0.0
+        self.periodos = {ep: TTL_ENDPOINT[ep] * antecedencia for ep in ENDPOINTS}
+        # TTL zero: toda renovação vai à rede (a cópia do cliente nunca conta como fresca aqui)
+        self.cliente = cliente or ClienteOWM(key, pool=4, ttls={ep: 0 for ep in ENDPOINTS})
+        self.registrar_historico = registrar_historico
+        self.baixar = baixar or self._baixar_http
+        self._ultimo = 0.0
+        self._falhas = {}
+        self.ok = 0
+        self.erros = 0
+        self.fila = []              # heap de (proxima_execucao, alvo)
+        agora = time.time()
+        for alvo in alvos:
+            # Itens ainda frescos no depósito só voltam à fila quando a renovação vence
+            achado = deposito.ler(*alvo)
+            proximo = agora if achado is None else agora + max(0.0, self.periodos[alvo[0]] - achado[1])
+            heapq.heappush(self.fila, (proximo, alvo))
+
+    def carga_por_minuto(self):
+        """Chamadas/min necessárias para manter todos os alvos em dia."""
+        return sum(60.0 / self.periodos[alvo[0]] for _, alvo in self.fila)
+
+    def _baixar_http(self, endpoint, lat, lon):
+        # Sem reserva vencida: o que entra no depósito é sempre resposta nova; a falha cai no backoff abaixo
+        return self.cliente.buscar(endpoint, lat, lon, vencido_ok=False)
+
+    def _aguardar_vez(self):
+        espera = self._ultimo + self.intervalo - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        self._ultimo = time.monotonic()
+
+    def renovar(self, alvo):
+        endpoint, lat, lon = alvo
+        self._aguardar_vez()
+        try:
+            payload = self.baixar(endpoint, lat, lon)
+        except Exception as e:
+            self.erros += 1
+            n = self._falhas[alvo] = self._falhas.get(alvo, 0) + 1
+            espera = min(BACKOFF_FALHA[0] * 2 ** (n - 1), BACKOFF_FALHA[1], self.periodos[endpoint])
+            print(f"⚠️ {endpoint} {lat},{lon}: {e} (nova tentativa em {espera:.0f}s)")
+            return time.time() + espera
+        self.deposito.gravar(endpoint, lat, lon, payload)
+        self._falhas.pop(alvo, None)
+        self.ok += 1
+        if endpoint == "forecast" and self.registrar_historico:
+            # Mesma chave de local do dashboard: o GDA observado de cada fazenda segue crescendo
+            try:
+                with HistoricoAgro() as hist: hist.registrar_previsao(id_local(lat, lon), previsao_diaria(payload))
+            except Exception as e: print(f"⚠️ Histórico: {e}")
+        return time.time() + self.periodos[endpoint]
+
+    def executar(self, parar=None, uma_vez=False):
+        """
+        Laço principal: dorme até o próximo alvo vencer e o renova.
+        `uma_vez` renova só o que está vencido agora e retorna (útil em cron).
+        """
+        parar = parar or threading.Event()
+        while self.fila and not parar.is_set():
+            proximo, alvo = self.fila[0]
+            espera = proximo - time.time()
+            if espera > 0:
+                if uma_vez:
+                    return
+                parar.wait(min(espera, 60))
+                continue
+            heapq.heappop(self.fila)
+            heapq.heappush(self.fila, (self.renovar(alvo), alvo))
+
+
+if __name__ == "__main__":
+    from lote_fazendas import carregar_fazendas
+
+    ap = argparse.ArgumentParser(description="Mantém o depósito de previsões aquecido para todas as fazendas")
+    ap.add_argument("arquivo", help="JSON com a lista de fazendas (mesmo formato do modo lote)")
+    ap.add_argument("--db", default=ARQUIVO_DEPOSITO)
+    ap.add_argument("--por-minuto", type=float, default=POR_MINUTO)
+    ap.add_argument("--sem-virtuais", action="store_true", help="Não aquece as estações virtuais do dashboard")
+    ap.add_argument("--uma-vez", action="store_true", help="Renova o que estiver vencido e sai")
+    ap.add_argument("--precisao-grade", type=int, default=PRECISAO_GEOHASH, help="Caracteres do geohash (0 = sem grade); igual à do lote e do dashboard")
+    args = ap.parse_args()
+
+    # Alvos e depósito na mesma grade: o que é aquecido é exatamente o que os leitores procuram
+    grade = GradeEspacial(args.precisao_grade or None)
+    alvos = montar_alvos(carregar_fazendas(args.arquivo), virtuais=not args.sem_virtuais, grade=grade)
+    aq = Aquecedor(alvos, DepositoClima(args.db, grade=grade), os.getenv("OPENWEATHER_KEY"), por_minuto=args.por_minuto)
+    carga = aq.carga_por_minuto()
+    est = grade.estatisticas()
+    print(f"🔥 {len(alvos)} alvos ({est['pedidos']} pontos, {est['taxa_acerto']:.0%} compartilhados na grade geohash-{est['precisao']}) | "
+          f"carga {carga:.1f} chamadas/min | limite {args.por_minuto:.0f}/min")
+    if carga > args.por_minuto:
+        print("⚠️ Carga acima do limite: os alvos serão renovados com atraso (aumente --por-minuto ou reduza os pontos).")
+    try:
+        aq.executar(uma_vez=args.uma_vez)
+    except KeyboardInterrupt:
+        pass
+    print(f"✅ Renovações: {aq.ok} | falhas: {aq.erros}")
@@ -0,0 +1,248 @@
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+
+# ==============================================================================
+# BALANÇO HÍDRICO DO SOLO (FAO-56, COEFICIENTE DE CULTURA ÚNICO)
+# Depleção da zona radicular dia a dia:
+#     Dr = Dr(ontem) - chuva efetiva - irrigação + Ks x Kc x ET0 (+ percolação do excesso)
+# Ks < 1 quando Dr passa da água facilmente disponível (RAW = p x TAW). A irrigação
+# é recomendada quando Dr chega ao gatilho (padrão: RAW) e repõe o solo à
+# capacidade de campo. O laço é nos dias; cada passo é uma operação NumPy sobre
+# todos os talhões (10 mil talhões x 365 dias em ~0,2 s).
+# O estado (Dr no fim do dia) fica no histórico: o laudo de amanhã parte de onde o de hoje parou.
+#
+#     python balanco_hidrico.py planejar fazendas.json
+#     python balanco_hidrico.py safra fazendas.json --inicio 2025-11-25 --dias 365
+# ==============================================================================
+# FAO-56 Tabela 19 (valores centrais): umidade na capacidade de campo e no ponto de murcha (m³/m³)
+SOLOS = {
+    "arenoso": (0.12, 0.045),
+    "franco-arenoso": (0.23, 0.11),
+    "franco": (0.25, 0.12),
+    "franco-siltoso": (0.29, 0.15),
+    "argiloso": (0.36, 0.22),
+}
+SOLO_PADRAO = "franco"
+
+# FAO-56 Tabela 22: profundidade efetiva de raízes para manejo (m) e fração p de depleção sem estresse
+RAIZ_CULTURA = {
+    "Soja (Glycine max)": (0.8, 0.50),
+    "Amora Preta (Blackberry)": (0.8, 0.50),
+    "Framboesa (Raspberry)": (0.8, 0.50),
+    "Mirtilo (Blueberry)": (0.6, 0.50),
+    "Morango": (0.25, 0.20),
+    "Batata (Solanum tuberosum)": (0.5, 0.35),
+    "Café (Coffea arabica)": (1.0, 0.40),
+    "Citros (Limão/Laranja)": (1.2, 0.50),
+    "Manga": (1.5, 0.50),
+    "Uva": (1.0, 0.35),
+}
+ZR_PADRAO, P_PADRAO = 0.5, 0.5
+FRACAO_CHUVA_MIN = 0.2      # chuva abaixo de 0,2 x ET0 evapora da superfície sem chegar às raízes
+EFICIENCIA_PADRAO = 0.85    # pivô central: lâmina bruta = líquida / eficiência
+IDADE_MAX_ESTADO = 3        # dias: estado mais velho que isso é descartado (recomeça na capacidade de campo)
+SAIDAS = ("dr", "raw", "ks", "eta", "perc", "irrig")
+
+ESQUEMA_BALANCO = """
+CREATE TABLE IF NOT EXISTS balanco_hidrico (
+    fazenda TEXT NOT NULL,
+    dia TEXT NOT NULL,              -- dia local (AAAA-MM-DD)
+    dr REAL NOT NULL,               -- depleção no fim do dia (mm), já descontada a irrigação recomendada
+    PRIMARY KEY (fazenda, dia)
+);
+"""
+
+
+# --- 1. PARÂMETROS DOS TALHÕES ---
+def agua_total(cc, pmp, zr):
+    """TAW (mm): água disponível total na zona radicular."""
+    return 1000.0 * (np.asarray(cc) - np.asarray(pmp)) * np.asarray(zr)
+
+
+def parametros_talhoes(talhoes, banco=None, kc_padrao=None):
+    """
+    Lista de talhões/fazendas -> arrays {kc, taw, p, zr} (um valor por talhão).
+    Cada item aceita: cultura, variedade (Kc da variedade no BANCO_TITAN), kc (sobrepõe),
+    solo (chave de SOLOS), zr e p (sobrepõem a Tabela 22).
+    """
+    kc, taw, p, zr = [], [], [], []
+    for t in talhoes:
+        cultura = t.get('cultura')
+        zr_c, p_c = RAIZ_CULTURA.get(cultura, (ZR_PADRAO, P_PADRAO))
+        k = t.get('kc')
+        if k is None and banco and cultura in banco:
+            k = banco[cultura]['vars'].get(t.get('variedade'), {}).get('kc')
+        if k is None:
+            k = kc_padrao
+        if k is None:
+            raise ValueError(f"Talhão sem Kc: {t.get('nome') or t.get('id')}")
+        solo = t.get('solo', SOLO_PADRAO)
+        if solo not in SOLOS:
+            raise ValueError(f"Solo desconhecido: {solo} (use {', '.join(SOLOS)})")
+        kc.append(float(k))
+        zr.append(float(t.get('zr', zr_c)))
+        p.append(float(t.get('p', p_c)))
+        taw.append(float(agua_total(*SOLOS[solo], zr[-1])))
+    return {'kc': np.array(kc), 'taw': np.array(taw), 'p': np.array(p), 'zr': np.array(zr)}
+
+
+# --- 2. SIMULADOR VETORIZADO ---
+def _serie(x):
+    # (talhões, dias) -> (dias, talhões) contígua: cada passo do laço lê uma linha seguida na memória
+    x = np.asarray(x, dtype=float)
+    return x[:, None] if x.ndim == 1 else np.ascontiguousarray(x.T)
+
+
+def simular(et0, chuva, kc, taw, p=P_PADRAO, dr0=0.0, irrigar=True, gatilho=1.0, lamina_max=None, saidas=SAIDAS):
+    """
+    et0, chuva: (talhões, dias) ou (dias,) comum a todos. kc: escalar, (talhões,) ou (talhões, dias).
+    taw, p, dr0, gatilho, lamina_max: escalar ou (talhões,).
+    Retorna arrays float32 (talhões, dias) das `saidas` -- dr (fim do dia), raw, ks, eta (ETc ajustada),
+    perc (percolação), irrig (lâmina líquida recomendada, aplicada no fim do dia) -- e dr_final (talhões,).
+    """
+    et0, chuva = _serie(et0), _serie(chuva)
+    kc = np.asarray(kc, dtype=float)
+    kc_dia = _serie(kc) if kc.ndim == 2 else kc.reshape(1, -1)
+    dias = et0.shape[0]
+    n = int(np.prod(np.broadcast_shapes(np.shape(taw), np.shape(p), np.shape(dr0), et0.shape[1:], chuva.shape[1:], kc_dia.shape[1:]))) or 1
+    taw, p = np.broadcast_to(np.asarray(taw, dtype=float), (n,)), np.asarray(p, dtype=float)
+    dr = np.array(np.broadcast_to(np.asarray(dr0, dtype=float), (n,)))
+    limite = None if lamina_max is None else np.asarray(lamina_max, dtype=float)
+    out = {s: np.zeros((dias, n), dtype=np.float32) for s in saidas}
+    gatilho = np.asarray(gatilho, dtype=float)
+    for i in range(dias):
+        # Termos do dia calculados a cada passo: memória fica em O(talhões), não O(talhões x dias)
+        etc = kc_dia[i % len(kc_dia)] * et0[i]
+        p_dia = np.clip(p + 0.04 * (5.0 - etc), 0.1, 0.8)   # FAO-56: p corrigido pela demanda do dia
+        raw = p_dia * taw
+        ks = np.clip((taw - dr) / ((1.0 - p_dia) * taw), 0.0, 1.0)   # 1 enquanto Dr <= RAW
+        eta = ks * etc
+        c = chuva[i]
+        dr = dr - np.where(c >= FRACAO_CHUVA_MIN * et0[i], c, 0.0) + eta
+        perc = np.maximum(-dr, 0.0)   # excesso acima da capacidade de campo drena
+        dr = np.minimum(np.maximum(dr, 0.0), taw)
+        if irrigar:
+            lamina = np.where(dr >= gatilho * raw, dr, 0.0)
+            if limite is not None:
+                lamina = np.minimum(lamina, limite)
+            dr = dr - lamina
+            if "irrig" in out: out["irrig"][i] = lamina
+        for nome, valor in (("dr", dr), ("raw", raw), ("ks", ks), ("eta", eta), ("perc", perc)):
+            if nome in out: out[nome][i] = valor
+    res = {nome: arr.T for nome, arr in out.items()}
+    res['dr_final'] = dr
+    return res
+
+
+def resumo(res, eficiencia=EFICIENCIA_PADRAO):
+    """Totais por talhão: lâminas, nº de irrigações, primeira irrigação (índice do dia, -1 = nenhuma), estresse."""
+    irrig = res['irrig']
+    tem = irrig > 0
+    primeira = np.where(tem.any(axis=1), tem.argmax(axis=1), -1)
+    lamina_1 = np.where(primeira >= 0, irrig[np.arange(len(irrig)), np.maximum(primeira, 0)], 0.0)
+    return {'lamina_liquida': irrig.sum(axis=1), 'lamina_bruta': irrig.sum(axis=1) / eficiencia,
+            'irrigacoes': tem.sum(axis=1), 'primeira_irrigacao': primeira, 'primeira_lamina': lamina_1,
+            'dias_estresse': (res['ks'] < 1).sum(axis=1), 'percolacao': res['perc'].sum(axis=1), 'dr_final': res['dr_final']}
+
+
+# --- 3. ESTADO ENTRE EXECUÇÕES (HISTÓRICO) ---
+def deplecao_gravada(hist, fazendas, antes_de, idade_max=IDADE_MAX_ESTADO):
+    """Dr gravado mais recente antes de `antes_de` (AAAA-MM-DD) por fazenda; sem registro recente, 0 (capacidade de campo)."""
+    hist.con.executescript(ESQUEMA_BALANCO)
+    limite = (date.fromisoformat(antes_de) - timedelta(days=idade_max)).isoformat()
+    # SQLite: com MAX() no SELECT, as colunas soltas vêm da linha do máximo
+    cur = hist.con.execute("SELECT fazenda, dr, MAX(dia) FROM balanco_hidrico WHERE dia < ? AND dia >= ? GROUP BY fazenda",
+                           (antes_de, limite))
+    gravado = {f: dr for f, dr, _ in cur}
+    return np.array([gravado.get(f, 0.0) for f in fazendas])
+
+
+def gravar_deplecao(hist, fazendas, dia, dr):
+    with hist.con:
+        hist.con.executemany("INSERT OR REPLACE INTO balanco_hidrico VALUES (?,?,?)",
+                             [(f, dia, float(d)) for f, d in zip(fazendas, dr)])
+
+
+def projetar_fazendas(fazendas, previsoes, hist=None, banco=None, kc_padrao=None, eficiencia=EFICIENCIA_PADRAO):
+    """
+    Balanço de todas as fazendas numa simulação só, sobre as previsões diárias (saída de previsao_diaria).
+    Parte do Dr gravado para o dia anterior à previsão e grava o Dr do fim do primeiro dia (hoje),
+    assumindo a irrigação recomendada aplicada. Retorna uma recomendação por fazenda (dict).
+    """
+    params = parametros_talhoes(fazendas, banco, kc_padrao)
+    dias = max(len(pv) for pv in previsoes)
+    et0 = np.zeros((len(fazendas), dias))
+    chuva = np.zeros((len(fazendas), dias))
+    for i, pv in enumerate(previsoes):
+        et0[i, :len(pv)] = [d['et0'] for d in pv]
+        chuva[i, :len(pv)] = [d['chuva'] for d in pv]
+    ids = [fz['id'] for fz in fazendas]
+    primeiro_dia = previsoes[0][0]['dia']
+    dr0 = deplecao_gravada(hist, ids, primeiro_dia) if hist is not None else 0.0
+    res = simular(et0, chuva, params['kc'], params['taw'], params['p'], dr0)
+    if hist is not None:
+        gravar_deplecao(hist, ids, primeiro_dia, res['dr'][:, 0])
+    r = resumo(res, eficiencia)
+    recomendacoes = []
+    for i, pv in enumerate(previsoes):
+        j = int(r['primeira_irrigacao'][i])
+        j = j if j < len(pv) else -1   # dia de enchimento (previsão mais curta) não conta
+        recomendacoes.append({
+            'taw': float(params['taw'][i]), 'raw': float(res['raw'][i, 0]), 'dr': float(res['dr'][i, 0] + res['irrig'][i, 0]),
+            'dr_final': float(res['dr'][i, len(pv) - 1]), 'dias_estresse': int((res['ks'][i, :len(pv)] < 1).sum()),
+            'dia_irrigacao': pv[j]['data'] if j >= 0 else None,
+            'lamina': float(r['primeira_lamina'][i]) if j >= 0 else 0.0,
+            'lamina_bruta': float(r['primeira_lamina'][i]) / eficiencia if j >= 0 else 0.0,
+        })
+    return recomendacoes
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Balanço hídrico FAO-56 da frota de talhões")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    pl = sub.add_parser("planejar", help="Irrigação recomendada na previsão (grava o estado no histórico)")
+    pl.add_argument("arquivo", nargs="?", default="fazendas.json")
+    sf = sub.add_parser("safra", help="Simula a safra inteira com a climatologia (ET0 e chuva observadas)")
+    sf.add_argument("arquivo", nargs="?", default="fazendas.json")
+    sf.add_argument("--inicio", required=True, help="AAAA-MM-DD")
+    sf.add_argument("--dias", type=int, default=365)
+    args = ap.parse_args()
+
+    # Imports do modo lote só na linha de comando: o laudo importa este módulo
+    import clima_alerta as ca
+    from historico import HistoricoAgro
+    from lote_fazendas import carregar_fazendas
+    fazendas = carregar_fazendas(args.arquivo)   # Kc já resolvido (kc > variedade no BANCO_TITAN > KC_ATUAL)
+
+    if args.cmd == "planejar":
+        from cliente_owm import ClienteOWM
+        from lote_fazendas import buscar_previsoes, planejar_irrigacao
+        cliente = ClienteOWM(ca.OPENWEATHER_API_KEY)
+        try:
+            previsoes = buscar_previsoes(fazendas, cliente)
+        finally:
+            cliente.fechar()
+        with HistoricoAgro() as hist:
+            recs = planejar_irrigacao(fazendas, previsoes, hist)
+        for fz in sorted(fazendas, key=lambda f: (recs.get(f['id']) or {}).get('dia_irrigacao') is None):
+            rec = recs.get(fz['id'])
+            if rec is None:
+                print(f"❌ {fz['nome']:<30} sem previsão")
+                continue
+            acao = f"irrigar {rec['lamina_bruta']:.0f} mm brutos em {rec['dia_irrigacao']}" if rec['dia_irrigacao'] else "sem irrigação na previsão"
+            print(f"💧 {fz['nome']:<30} Dr {rec['dr']:5.1f} / RAW {rec['raw']:5.1f} / TAW {rec['taw']:5.1f} mm | {acao}")
+    else:
+        from climatologia import CacheClimatologia
+        inicio = date.fromisoformat(args.inicio)
+        clima = CacheClimatologia()
+        series = [clima.diario(float(fz['lat']), float(fz['lon']), inicio, inicio + timedelta(days=args.dias - 1)) for fz in fazendas]
+        params = parametros_talhoes(fazendas)
+        # Dias sem dado (à frente da reanálise) ficam de fora: ET0 e chuva zero não mexem no solo
+        et0 = np.nan_to_num(np.stack([s['et0'] for s in series]))
+        chuva = np.nan_to_num(np.stack([s['chuva'] for s in series]))
+        r = resumo(simular(et0, chuva, params['kc'], params['taw'], params['p']))
+        for i, fz in enumerate(fazendas):
+            print(f"🌱 {fz['nome']:<30} {r['irrigacoes'][i]:3d} irrigações | {r['lamina_bruta'][i]:6.0f} mm brutos | "
+                  f"{r['dias_estresse'][i]:3d} dias com estresse | {r['percolacao'][i]:6.0f} mm percolados")
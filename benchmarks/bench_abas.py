@@ -0,0 +1,110 @@
+"""
+Tempo até a primeira pintura do dashboard (execução completa do script no AppTest),
+com rede simulada: cada chamada HTTP ao OpenWeather espera `--latencia` segundos (3G rural).
+
+    python benchmarks/bench_abas.py [--latencia 0.4] [--repeticoes 3]
+
+Para comparar com a versão de abas ansiosas:
+    git show <rev>:app.py > app_antigo.py && python benchmarks/bench_abas.py --app app_antigo.py
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+import requests
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+CHAMADAS = []
+
+
+class RespostaFalsa:
+    def __init__(self, dados):
+        self._dados = dados
+        self.status_code = 200
+
+    def json(self):
+        return self._dados
+
+    def raise_for_status(self):
+        pass
+
+
+def previsao_falsa(passos=40):
+    t0 = int(time.time() // 10800 * 10800)
+    lista = []
+    for i in range(passos):
+        t = 20 + 6 * math.sin(i / 8 * 2 * math.pi)
+        item = {"dt": t0 + i * 10800, "main": {"temp": round(t, 2), "humidity": 60 + (i * 7) % 30}, "weather": [{"description": "nublado"}]}
+        if i % 5 == 0: item["rain"] = {"3h": 1.5}
+        lista.append(item)
+    return {"cod": "200", "cnt": passos, "list": lista}
+
+
+def instalar_rede_falsa(latencia):
+    previsao = previsao_falsa()
+    tempo = {"weather": [{"description": "chuva leve"}], "main": {"temp": 21.3, "humidity": 80}, "rain": {"1h": 0.5}}
+
+    def get(url, *a, **k):
+        CHAMADAS.append(url)
+        time.sleep(latencia)
+        return RespostaFalsa(previsao if "forecast" in url else tempo)
+
+    requests.get = get
+    requests.Session.get = lambda self, url, *a, **k: get(url)
+
+
+def cronometrar(app, aba=None):
+    """Primeira carga com caches vazios; `aba` seleciona uma aba e mede o rerun do clique."""
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    at = AppTest.from_file(app, default_timeout=120)
+    at.query_params["w_key"] = "x"
+    CHAMADAS.clear()
+    t0 = time.perf_counter()
+    at.run()
+    primeira = time.perf_counter() - t0
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    resultado = {'primeira_pintura_s': primeira, 'http_primeira': len(CHAMADAS)}
+    if aba is not None:
+        CHAMADAS.clear()
+        at.session_state["aba_ativa"] = aba
+        t0 = time.perf_counter()
+        at.run()
+        resultado.update({'clique_aba_s': time.perf_counter() - t0, 'http_clique': len(CHAMADAS)})
+    return resultado
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--app", default=os.path.join(RAIZ, 'app.py'))
+    ap.add_argument("--latencia", type=float, default=0.4)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--aba", help="rótulo da aba a selecionar depois da primeira carga (ex.: '📡 RADAR')")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    instalar_rede_falsa(args.latencia)
+    os.chdir(tempfile.mkdtemp())  # histórico/GDA da execução não sujam o repositório
+    app = os.path.abspath(os.path.join(RAIZ, args.app)) if not os.path.isabs(args.app) else args.app
+
+    cronometrar(app)  # aquecimento: imports pesados (plotly, folium, genai) ficam fora da medida
+    medidas = [cronometrar(app, aba=args.aba) for _ in range(args.repeticoes)]
+    resumo = {'app': os.path.basename(app), 'latencia_s': args.latencia}
+    for campo in medidas[0]:
+        resumo[campo] = statistics.median(m[campo] for m in medidas)
+    if args.json:
+        print(json.dumps(resumo))
+    else:
+        print(f"{resumo['app']} (mediana de {args.repeticoes}, HTTP a {args.latencia * 1000:.0f} ms): "
+              f"primeira pintura {resumo['primeira_pintura_s'] * 1000:.0f} ms, {resumo['http_primeira']:.0f} chamadas"
+              + (f" | clique em {args.aba}: {resumo['clique_aba_s'] * 1000:.0f} ms, {resumo['http_clique']:.0f} chamadas" if args.aba else ""))
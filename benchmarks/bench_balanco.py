@@ -0,0 +1,93 @@
+"""
+Balanço hídrico FAO-56 da frota: simulador vetorizado (balanco_hidrico.simular, laço nos dias,
+NumPy nos talhões) x laço Python talhão a talhão, dia a dia (como uma planilha de manejo).
+O laço Python roda numa amostra de talhões e é extrapolado; as duas versões são conferidas
+na amostra (depleção e lâminas iguais).
+
+    python benchmarks/bench_balanco.py [--talhoes 10000] [--dias 365] [--amostra 300] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from balanco_hidrico import FRACAO_CHUVA_MIN, resumo, simular
+
+ALVO_S = 1.0   # 10 mil talhões x 365 dias
+
+
+def frota(n, dias, semente=7):
+    rng = np.random.default_rng(semente)
+    et0 = rng.uniform(2.0, 7.0, (n, dias))
+    chuva = np.where(rng.random((n, dias)) < 0.25, rng.exponential(12.0, (n, dias)), 0.0)
+    return et0, chuva, rng.uniform(0.4, 1.2, n), rng.uniform(30.0, 180.0, n), rng.uniform(0.3, 0.55, n)
+
+
+def laco_python(et0, chuva, kc, taw, p):
+    """Mesmas equações de simular(), um talhão e um dia por vez."""
+    dr_tudo, irrig_tudo = [], []
+    for t in range(len(kc)):
+        dr, serie_dr, serie_irrig = 0.0, [], []
+        for e, c in zip(et0[t], chuva[t]):
+            etc = kc[t] * e
+            p_dia = min(max(p[t] + 0.04 * (5.0 - etc), 0.1), 0.8)
+            raw = p_dia * taw[t]
+            ks = min(max((taw[t] - dr) / ((1.0 - p_dia) * taw[t]), 0.0), 1.0)
+            dr = dr - (c if c >= FRACAO_CHUVA_MIN * e else 0.0) + ks * etc
+            dr = min(max(dr, 0.0), taw[t])
+            lamina = dr if dr >= raw else 0.0
+            dr -= lamina
+            serie_dr.append(dr)
+            serie_irrig.append(lamina)
+        dr_tudo.append(serie_dr)
+        irrig_tudo.append(serie_irrig)
+    return np.array(dr_tudo), np.array(irrig_tudo)
+
+
+def melhor(fn, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - t0)
+    return min(tempos)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--talhoes", type=int, default=10000)
+    ap.add_argument("--dias", type=int, default=365)
+    ap.add_argument("--amostra", type=int, default=300, help="Talhões simulados no laço Python (extrapolado)")
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    et0, chuva, kc, taw, p = frota(args.talhoes, args.dias)
+    t_vet = melhor(lambda: simular(et0, chuva, kc, taw, p), args.repeticoes)
+    res = simular(et0, chuva, kc, taw, p)
+    t_resumo = melhor(lambda: resumo(res), args.repeticoes)
+    t_leve = melhor(lambda: simular(et0, chuva, kc, taw, p, saidas=("irrig", "ks")), args.repeticoes)
+
+    a = min(args.amostra, args.talhoes)
+    t0 = time.perf_counter()
+    dr_py, irrig_py = laco_python(et0[:a], chuva[:a], kc[:a], taw[:a], p[:a])
+    t_py = (time.perf_counter() - t0) * args.talhoes / a
+    confere = bool(np.allclose(res['dr'][:a], dr_py, atol=1e-3) and np.allclose(res['irrig'][:a], irrig_py, atol=1e-3))
+
+    r = {'talhoes': args.talhoes, 'dias': args.dias, 'vetorizado_s': round(t_vet, 4), 'so_irrig_ks_s': round(t_leve, 4),
+         'resumo_s': round(t_resumo, 4), 'python_s_estimado': round(t_py, 2), 'ganho': round(t_py / t_vet, 1),
+         'confere': confere, 'alvo_s': ALVO_S}
+    if args.json:
+        print(json.dumps(r))
+    else:
+        print(f"Frota: {args.talhoes} talhões x {args.dias} dias (resultados iguais ao laço Python: {'sim' if confere else 'NÃO'})")
+        print(f"  laço Python (estimado por {a} talhões): {t_py:8.2f} s")
+        print(f"  simular() vetorizado                  : {t_vet:8.3f} s  ({t_py / t_vet:.0f}x) | alvo {ALVO_S:.1f} s")
+        print(f"  simular() só irrig + ks               : {t_leve:8.3f} s")
+        print(f"  resumo() da frota                     : {t_resumo:8.3f} s")
+    sys.exit(0 if confere and t_vet <= ALVO_S else 1)
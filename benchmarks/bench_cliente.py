@@ -0,0 +1,110 @@
+"""
+Cliente HTTP do OpenWeather contra o servidor local com falhas injetadas (benchmarks/servidor_owm.py).
+
+    reuso      requests.get avulso (conexão nova a cada chamada) x ClienteOWM (keep-alive)
+    degradada  `--taxa-erro` das respostas em 503: sem repetição x com repetição + backoff
+    queda      API fora do ar depois de uma resposta boa: o cliente serve a reserva e o disjuntor
+               corta as chamadas à rede
+
+    python benchmarks/bench_cliente.py [--chamadas 50] [--latencia-conexao 0.15] [--taxa-erro 0.3] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import requests
+
+from servidor_owm import ServidorOWM
+
+LAT, LON = -13.414, -41.285
+
+
+def resumo(latencias, ok, total):
+    ms = np.array(latencias) * 1000
+    return {'p50_ms': round(float(np.percentile(ms, 50)), 2), 'p99_ms': round(float(np.percentile(ms, 99)), 2),
+            'sucesso': round(ok / total, 3)}
+
+
+def medir(chamar, n):
+    latencias, ok = [], 0
+    for i in range(n):
+        t0 = time.perf_counter()
+        try:
+            chamar(i)
+            ok += 1
+        except Exception:
+            pass
+        latencias.append(time.perf_counter() - t0)
+    return resumo(latencias, ok, n)
+
+
+def cenario_reuso(srv, cliente_owm, n):
+    srv.taxa_erro = 0.0
+    url = f"{srv.url}/data/2.5/weather"
+    avulso = medir(lambda i: requests.get(url, params={"lat": LAT + i * 1e-4, "lon": LON}, timeout=10).json(), n)
+    # Coordenada diferente a cada chamada: mede a rede, não a reserva do cliente
+    cli = cliente_owm.ClienteOWM("bench")
+    pool = medir(lambda i: cli.buscar("weather", LAT + i * 1e-4, LON), n)
+    cli.fechar()
+    return {'avulso': avulso, 'cliente': pool}
+
+
+def cenario_degradada(srv, cliente_owm, n, taxa):
+    srv.taxa_erro = taxa
+    sem = cliente_owm.ClienteOWM("bench", tentativas=0, limiar_falhas=10 ** 6)
+    com = cliente_owm.ClienteOWM("bench", backoff=0.05, limiar_falhas=10 ** 6)
+    r = {'sem_repeticao': medir(lambda i: sem.buscar("weather", LAT + i * 1e-4, LON), n),
+         'com_repeticao': medir(lambda i: com.buscar("weather", LAT + i * 1e-4, LON), n)}
+    sem.fechar(), com.fechar()
+    srv.taxa_erro = 0.0
+    return r
+
+
+def cenario_queda(srv, cliente_owm, n):
+    cli = cliente_owm.ClienteOWM("bench", ttls={"forecast": 0}, backoff=0.05, limiar_falhas=3)
+    cli.buscar("forecast", LAT, LON, vencido_ok=False)   # última resposta boa antes da queda
+    srv.taxa_erro = 1.0
+    antes = srv.contagem["forecast"]
+    # vencido_ok=False mede a falha; True mede o que o laudo recebe (a reserva)
+    falhas = medir(lambda i: cli.buscar("forecast", LAT, LON, vencido_ok=False), n)
+    reserva = medir(lambda i: cli.buscar("forecast", LAT, LON), n)
+    r = {'sem_reserva': falhas, 'com_reserva': reserva, 'pedidos_na_rede': srv.contagem["forecast"] - antes,
+         'disjuntor': cli.estado()["forecast"]}
+    cli.fechar()
+    srv.taxa_erro = 0.0
+    return r
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chamadas", type=int, default=50)
+    ap.add_argument("--latencia", type=float, default=0.02, help="Atraso por resposta (s)")
+    ap.add_argument("--latencia-conexao", type=float, default=0.15, help="Custo de cada conexão nova (TCP+TLS, s)")
+    ap.add_argument("--taxa-erro", type=float, default=0.3)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    with ServidorOWM(latencia=args.latencia, latencia_conexao=args.latencia_conexao) as srv:
+        os.environ["OPENWEATHER_URL"] = srv.url
+        import cliente_owm
+        res = {'parametros': vars(args),
+               'reuso': cenario_reuso(srv, cliente_owm, args.chamadas),
+               'degradada': cenario_degradada(srv, cliente_owm, args.chamadas, args.taxa_erro),
+               'queda': cenario_queda(srv, cliente_owm, args.chamadas)}
+    if args.json:
+        print(json.dumps(res))
+    else:
+        for nome in ('reuso', 'degradada'):
+            for variante, r in res[nome].items():
+                print(f"{nome:<10} {variante:<14} p50 {r['p50_ms']:>8.1f} ms | p99 {r['p99_ms']:>8.1f} ms | sucesso {r['sucesso']:.0%}")
+        q = res['queda']
+        print(f"queda      sem reserva    p50 {q['sem_reserva']['p50_ms']:>8.1f} ms | sucesso {q['sem_reserva']['sucesso']:.0%}")
+        print(f"queda      com reserva    p50 {q['com_reserva']['p50_ms']:>8.1f} ms | sucesso {q['com_reserva']['sucesso']:.0%} | "
+              f"{q['pedidos_na_rede']} pedidos à rede em {2 * args.chamadas} chamadas (disjuntor {q['disjuntor']})")
@@ -0,0 +1,129 @@
+"""
+Benchmark do laudo HTML: concatenação original (gerar_conteudo_html até a v8.0)
+versus o renderizador de laudo_html (contexto pré-calculado + f-strings).
+
+    python benchmarks/bench_laudo.py [--laudos 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from laudo_html import montar_contexto, renderizar_laudo
+
+FAZENDA = {"nome": "Ibicoara (Sede)", "lat": "-13.414", "lon": "-41.285"}
+KC = 0.75
+EMITIDO = "18/10/2026 06:00"
+PREVISOES = [
+    {'data': f"{18 + i}/10", 'temp': 21.5 + i, 'temp_min': 15.2 + i, 'temp_max': 27.9, 'umid': 70 + 3 * i, 'umid_max': 84 + 2 * i,
+     'vpd': 0.82, 'delta_t': 4.1, 'janelas_pulv': 4, 'chuva': 1.2 * i, 'et0': 0.14}
+    for i in range(5)
+]
+RADAR = [
+    {"nome": n, "status": "ok", "dados": {"weather": [{"description": d}], "main": {"temp": 20.4}, "rain": {}}}
+    for n, d in [("Mucugê", "chuva leve"), ("Barra da Estiva", "nublado"), ("Piatã", "céu limpo"), ("Cascavel (Distrito)", "nublado")]
+]
+
+
+def laudo_concatenado(previsoes, anotacao, mudanca, chuva_ant, fazenda, kc, gda_acum, radar, emitido):
+    # Cópia congelada do algoritmo original (sem E/S): html += f"..." e CSS recriado a cada chamada
+    hoje = previsoes[0]
+    chuva_total = sum(p['chuva'] for p in previsoes)
+    consumo_total = sum(p['et0'] * kc for p in previsoes)
+    balanco = chuva_total - consumo_total
+    txt_vpd = "Equilíbrio termodinâmico perfeito. Estômatos abertos e fotossíntese ativa." if 0.45 <= hoje['vpd'] <= 1.25 else \
+              "Atmosfera muito seca. Risco de fechamento estomático e cavitação." if hoje['vpd'] > 1.25 else \
+              "Atmosfera saturada. Transpiração bloqueada. Risco de doenças."
+    txt_balanco = "Superávit Hídrico: Solo tende à saturação. Risco de asfixia radicular (anoxia)." if balanco > 0 else \
+                  "Déficit Hídrico: Demanda maior que a oferta natural. Aumente a irrigação."
+    css = """
+    <style>
+        body { font-family: 'Segoe UI', Arial, sans-serif; color: #333; line-height: 1.6; }
+        .header { background-color: #27ae60; color: white; padding: 15px; border-radius: 5px 5px 0 0; }
+        h2 { margin: 0; font-size: 22px; }
+        .meta { font-size: 14px; opacity: 0.9; }
+        .alerta { background-color: #fff3cd; border-left: 5px solid #ffc107; padding: 15px; margin: 20px 0; color: #856404; }
+        .danger { background-color: #f8d7da; border-left: 5px solid #dc3545; color: #721c24; }
+        table { width: 100%; border-collapse: collapse; margin-top: 10px; font-size: 14px; }
+        th { background-color: #f8f9fa; color: #2c3e50; padding: 10px; border-bottom: 2px solid #ddd; text-align: left; }
+        td { padding: 10px; border-bottom: 1px solid #eee; }
+        tr:nth-child(even) { background-color: #fafafa; }
+        .destaque { font-weight: bold; color: #27ae60; }
+        .radar-box { background-color: #f1f8e9; padding: 15px; border-radius: 5px; margin-top: 20px; }
+        .footer { font-size: 11px; color: #999; margin-top: 30px; text-align: center; border-top: 1px solid #eee; padding-top: 10px; }
+    </style>
+    """
+    html = f"""
+    <html>
+    <head>{css}</head>
+    <body>
+        <div class="header">
+            <h2>💎 LAUDO TÉCNICO AGRO-INTEL</h2>
+            <div class="meta">📍 {fazenda['nome']} (GPS: {fazenda['lat']}, {fazenda['lon']}) | 📅 {emitido}</div>
+        </div>
+    """
+    if mudanca:
+        html += f"""
+        <div class="alerta danger">
+            ⚠️ <strong>ALERTA DE VOLATILIDADE CLIMÁTICA</strong><br>
+            A previsão de chuva acumulada mudou bruscamente de <strong>{chuva_ant:.1f}mm</strong> para <strong>{chuva_total:.1f}mm</strong> nas últimas horas. Revise o planejamento de campo.
+        </div>
+        """
+    html += f"<h3>📅 Microclima Semanal ({fazenda['nome']})</h3><table><tr><th>Data</th><th>Temp (mín/méd/máx)</th><th>Chuva</th><th>Consumo (ETc)</th><th>Janelas Pulv. (3h)</th></tr>"
+    for p in previsoes:
+        html += f"<tr><td>{p['data']}</td><td>{p['temp_min']} / {p['temp']} / {p['temp_max']}°C</td><td>{p['chuva']}mm</td><td>{round(p['et0']*kc, 2)}mm</td><td>{p['janelas_pulv']}</td></tr>"
+    html += "</table>"
+    html += f"<h3>📝 Diário de Campo</h3><div style='background: #eee; padding: 10px; border-left: 3px solid #999;'><em>\"{anotacao if anotacao else 'Sem apontamentos manuais.'}\"</em></div>"
+    html += """
+    <h3>🔬 Diagnóstico Fisiológico & Estratégico</h3>
+    <table>
+        <tr><th width="30%">PARÂMETRO</th><th width="20%">VALOR</th><th>INTERPRETAÇÃO TÉCNICA</th></tr>
+    """
+    html += f"""
+        <tr><td class="destaque">1. Termodinâmica (VPD)</td><td>{hoje['vpd']} kPa</td><td>{txt_vpd}</td></tr>
+        <tr><td class="destaque">2. Pulverização (Delta T)</td><td>{hoje['delta_t']} °C</td><td>{'✅ Ideal. Gota protegida contra evaporação.' if 2 <= hoje['delta_t'] <= 8 else '⚠️ Risco. Evite pulverizar sem adjuvantes.'}</td></tr>
+        <tr><td class="destaque">3. Balanço Hídrico (7d)</td><td>{balanco:.1f} mm</td><td>{txt_balanco}</td></tr>
+        <tr><td class="destaque">4. Pressão Sanitária</td><td>{sum(1 for p in previsoes if p['umid'] > 88)} Janelas</td><td>{'🚨 ALTO RISCO. Condições ideais para germinação de esporos fúngicos.' if sum(1 for p in previsoes if p['umid'] > 88) > 2 else '✅ Baixo Risco. Ausência de molhamento foliar contínuo.'}</td></tr>
+        <tr><td class="destaque">5. Nutrição (Fase)</td><td>Vegetativo</td><td><strong>Foco: N + Mg.</strong> Nitrogênio para síntese proteica e Magnésio para o centro da molécula de Clorofila.</td></tr>
+        <tr><td class="destaque">6. Maturação (GDA)</td><td>{gda_acum:.0f} GDA</td><td>Acúmulo térmico definindo a taxa de conversão enzimática de açúcares.</td></tr>
+    </table>
+    """
+    html += "<div class='radar-box'><h3>🛰️ Radar Regional (Georreferenciado)</h3><ul>"
+    for local in radar:
+        if local['status'] != "ok": continue
+        r = local['dados']
+        icone = "🌧️" if "chuva" in r['weather'][0]['description'] or r.get('rain') else "🌤️"
+        html += f"<li><strong>{local['nome']}:</strong> {icone} {r['weather'][0]['description'].capitalize()} ({r['main']['temp']}°C)</li>"
+    html += "</ul><small><em>*Dados obtidos via satélite nas coordenadas exatas de cada localidade.</em></small></div>"
+    html += "<div class='footer'>Sistema Agro-Intel v8.0 | Precision Agriculture Module</div></body></html>"
+    return html
+
+
+def laudo_template(*args):
+    return renderizar_laudo(montar_contexto(*args))
+
+
+def medir(fn, n, args):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(*args)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--laudos", type=int, default=2000)
+    n = ap.parse_args().laudos
+
+    args = (PREVISOES, "Fertirrigação realizada no talhão 3.", True, 4.2, FAZENDA, KC, 812.0, RADAR, EMITIDO)
+    norm = lambda h: "".join(h.split())
+    iguais = norm(laudo_concatenado(*args)) == norm(laudo_template(*args))
+    medir(laudo_template, 50, args)  # aquecimento
+
+    t_antigo = medir(laudo_concatenado, n, args)
+    t_novo = medir(laudo_template, n, args)
+    print(f"Laudos renderizados: {n} (HTML equivalente: {'sim' if iguais else 'NÃO'})")
+    print(f"  concatenação (original): {t_antigo:8.1f} µs/laudo")
+    print(f"  laudo_html             : {t_novo:8.1f} µs/laudo  ({t_antigo / t_novo:.2f}x)")
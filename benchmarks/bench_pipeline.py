@@ -0,0 +1,174 @@
+"""
+Suíte de desempenho do caminho quente, sem rede: o código de produção fala com o
+servidor local de benchmarks/servidor_owm.py (fixtures gravadas do OpenWeather).
+
+Cenários (latência por fazenda p50/p95/p99, fazendas/s e pico de memória via tracemalloc):
+    laudo      get_agro_data -> gerar_conteudo_html (GDA + radar de 4 estações incluídos)
+    dataframe  previsão do get_forecast -> extrair_serie -> tabela_previsao (DataFrame das abas)
+    calc_agro  calc_agro escalar nos 40 passos da previsão (laço do job de laudos)
+    agromath   AgroMathVetorial.calc_lote nos mesmos 40 passos (motor do dashboard)
+
+    python benchmarks/bench_pipeline.py [--fazendas 1,100,10000] [--cenarios laudo,dataframe] [--saida atual.json]
+    python benchmarks/bench_pipeline.py --saida atual.json --comparar base.json   # base = resultado de outro commit
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from servidor_owm import ServidorOWM
+
+CENARIOS = ("laudo", "dataframe", "calc_agro", "agromath")
+KC, T_BASE = 0.75, 10.0
+
+
+def gerar_fazendas(n, lat0=-13.414, lon0=-41.285):
+    # Fazendas espalhadas na Chapada (grade de ~1 km); cada uma com o radar padrão de 4 estações
+    lado = max(1, int(np.ceil(np.sqrt(n))))
+    return [{"id": f"bench_{i}", "nome": f"Fazenda {i}", "lat": f"{lat0 + (i // lado) * 0.01:.4f}",
+             "lon": f"{lon0 + (i % lado) * 0.01:.4f}", "kc": KC} for i in range(n)]
+
+
+def montar_trabalhos(url):
+    """{cenário: função(fazenda)}. Os imports vêm depois de OPENWEATHER_URL apontar para o stub."""
+    import clima_alerta as ca
+    from agregacao import extrair_serie, tabela_previsao
+    from agro_math import AgroMathVetorial
+    from cliente_owm import criar_sessao
+
+    sessao = criar_sessao()
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'forecast.json'), encoding='utf-8') as f:
+        serie = extrair_serie(json.load(f))
+    pares = list(zip(serie['temp'].tolist(), serie['umid'].tolist()))
+
+    def laudo(fz):
+        prev = ca.get_agro_data(fz)
+        if not prev:
+            raise RuntimeError("previsão vazia (stub fora do ar?)")
+        return ca.gerar_conteudo_html(prev, "", False, 0.0, fazenda=fz)
+
+    def dataframe(fz):
+        r = sessao.get(f"{url}/data/2.5/forecast", params={"lat": fz['lat'], "lon": fz['lon'], "units": "metric"}, timeout=10)
+        r.raise_for_status()
+        return tabela_previsao(extrair_serie(r.json()), fz['kc'], T_BASE)
+
+    def calc_agro(fz):
+        return [ca.calc_agro(t, u) for t, u in pares]
+
+    def agromath(fz):
+        return AgroMathVetorial.calc_lote(serie['temp'], serie['umid'], fz['kc'], T_BASE)
+
+    return {"laudo": laudo, "dataframe": dataframe, "calc_agro": calc_agro, "agromath": agromath}
+
+
+def executar(trabalho, fazendas, workers):
+    """Roda o trabalho em todas as fazendas; devolve (latências em s, tempo total em s)."""
+    def medir(fz):
+        t0 = time.perf_counter()
+        trabalho(fz)
+        return time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            lat = list(pool.map(medir, fazendas))
+    else:
+        lat = [medir(fz) for fz in fazendas]
+    return lat, time.perf_counter() - t0
+
+
+def medir_cenario(nome, trabalho, n, workers, min_amostras, memoria=True):
+    fazendas = gerar_fazendas(n)
+    workers = workers if nome in ("laudo", "dataframe") else 1   # só os cenários com E/S usam o pool
+    executar(trabalho, fazendas[:min(n, 20)], workers)           # aquecimento: imports, conexões, templates
+    latencias, total, rodadas = [], 0.0, 0
+    while rodadas == 0 or len(latencias) < min_amostras:         # 1 fazenda: repete para ter percentis estáveis
+        lat, t = executar(trabalho, fazendas, workers)
+        latencias += lat
+        total += t
+        rodadas += 1
+    pico = None
+    if memoria:
+        # Passada separada: o tracemalloc deixa o Python bem mais lento e distorceria a latência
+        tracemalloc.start()
+        executar(trabalho, fazendas, workers)
+        pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    p50, p95, p99 = np.percentile(np.array(latencias) * 1000, [50, 95, 99])
+    return {'cenario': nome, 'fazendas': n, 'workers': workers, 'rodadas': rodadas,
+            'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3), 'p99_ms': round(p99, 3),
+            'max_ms': round(max(latencias) * 1000, 3), 'fazendas_s': round(n * rodadas / total, 1),
+            'pico_mem_mb': None if pico is None else round(pico, 2)}
+
+
+def versao_codigo():
+    try:
+        rev = subprocess.run(["git", "-C", RAIZ, "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        sujo = subprocess.run(["git", "-C", RAIZ, "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return rev + ("-modificado" if sujo else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual, base):
+    """Tabela de variação contra outro resultado (mesmo cenário e nº de fazendas)."""
+    antes = {(r['cenario'], r['fazendas']): r for r in base['resultados']}
+    print(f"\nComparação com {base.get('commit') or '?'} ({base.get('data', '')}):")
+    for r in atual['resultados']:
+        b = antes.get((r['cenario'], r['fazendas']))
+        if b is None:
+            continue
+        var = lambda campo: f"{(r[campo] / b[campo] - 1) * 100:+.1f}%" if b.get(campo) and r.get(campo) is not None else "—"
+        print(f"  {r['cenario']:<10} {r['fazendas']:>6} fazendas | p50 {var('p50_ms'):>8} | p99 {var('p99_ms'):>8} | "
+              f"fazendas/s {var('fazendas_s'):>8} | memória {var('pico_mem_mb'):>8}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fazendas", default="1,100,10000", help="Lista de tamanhos, separados por vírgula")
+    ap.add_argument("--cenarios", default=",".join(CENARIOS))
+    ap.add_argument("--workers", type=int, default=8, help="Threads nos cenários com HTTP (como o modo lote)")
+    ap.add_argument("--latencia", type=float, default=0.0, help="Atraso simulado por resposta do stub (s)")
+    ap.add_argument("--min-amostras", type=int, default=50)
+    ap.add_argument("--sem-memoria", action="store_true", help="Pula a passada com tracemalloc")
+    ap.add_argument("--saida", help="Grava o resultado em JSON")
+    ap.add_argument("--comparar", help="JSON de outra execução para comparar")
+    args = ap.parse_args()
+
+    os.chdir(tempfile.mkdtemp())   # histórico/GDA da execução não sujam o repositório
+    with ServidorOWM(latencia=args.latencia) as srv:
+        os.environ["OPENWEATHER_URL"] = srv.url
+        os.environ.setdefault("OPENWEATHER_KEY", "bench")
+        trabalhos = montar_trabalhos(srv.url)
+        resultado = {'commit': versao_codigo(), 'data': datetime.now().isoformat(timespec='seconds'),
+                     'python': platform.python_version(), 'plataforma': platform.platform(),
+                     'parametros': {'workers': args.workers, 'latencia_s': args.latencia, 'min_amostras': args.min_amostras},
+                     'resultados': []}
+        print(f"{'cenário':<10} {'fazendas':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'fazendas/s':>11} {'pico MB':>8}")
+        for nome in args.cenarios.split(","):
+            for n in (int(x) for x in args.fazendas.split(",")):
+                r = medir_cenario(nome, trabalhos[nome], n, args.workers, args.min_amostras, memoria=not args.sem_memoria)
+                resultado['resultados'].append(r)
+                print(f"{nome:<10} {n:>8} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['fazendas_s']:>11.1f} "
+                      f"{r['pico_mem_mb'] if r['pico_mem_mb'] is not None else '—':>8}")
+        resultado['http'] = dict(srv.contagem)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(resultado, json.load(f))
@@ -0,0 +1,90 @@
+"""
+Pressão sanitária da frota em execuções diárias do cron (previsão de 40 passos 3-horários por fazenda):
+
+    incremental  avaliar_fazendas com o histórico: só os passos novos entram no estado gravado
+                 e a previsão é projetada a partir dele
+    do zero      o motor refaz toda a série observada da safra a cada execução e projeta a previsão
+
+As duas versões são conferidas na última execução (mesmos índices por fazenda e patógeno).
+
+    python benchmarks/bench_sanidade.py [--fazendas 500] [--execucoes 60] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from catalogo import CatalogoTitan
+from historico import HistoricoAgro
+from pressao_sanitaria import MotorSanitario, alinhar, avaliar_fazendas
+
+PASSOS_PREVISAO = 40
+PASSOS_DIA = 8
+CULTURAS = (None, "Batata (Solanum tuberosum)", "Café (Coffea arabica)", "Uva", "Morango", "Soja (Glycine max)")
+
+
+def clima(n, passos, semente=11):
+    rng = np.random.default_rng(semente)
+    hora = np.arange(passos) % PASSOS_DIA
+    temp = 20 + 6 * np.sin(2 * np.pi * (hora[:, None] - 2) / PASSOS_DIA) + rng.normal(0, 2, (passos, n))
+    umid = np.clip(80 - 15 * np.sin(2 * np.pi * (hora[:, None] - 2) / PASSOS_DIA) + rng.normal(0, 8, (passos, n)), 20, 100)
+    chuva = np.where(rng.random((passos, n)) < 0.1, rng.exponential(3.0, (passos, n)), 0.0)
+    return {'dt': 1764558000 + 10800 * np.arange(passos), 'temp': temp, 'umid': umid, 'chuva': chuva}
+
+
+def previsoes_do_dia(w, inicio, n):
+    fim = inicio + PASSOS_PREVISAO
+    return [{k: w[k][inicio:fim] if k == 'dt' else w[k][inicio:fim, i] for k in w} for i in range(n)]
+
+
+def do_zero(culturas, w, inicio, series):
+    motor = MotorSanitario(culturas)
+    motor.consumir(w['dt'][:inicio], w['temp'][:inicio], w['umid'][:inicio], w['chuva'][:inicio])
+    return motor.consumir(*alinhar(series))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fazendas", type=int, default=500)
+    ap.add_argument("--execucoes", type=int, default=60, help="Execuções diárias simuladas")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    n = args.fazendas
+    fazendas = [{'id': f"fz{i}", 'cultura': CULTURAS[i % len(CULTURAS)]} for i in range(n)]
+    w = clima(n, (args.execucoes + 1) * PASSOS_DIA + PASSOS_PREVISAO)
+    banco = CatalogoTitan.carregar().banco
+    t_inc, t_zero = [], []
+    with tempfile.TemporaryDirectory() as pasta, HistoricoAgro(os.path.join(pasta, "h.db")) as hist:
+        for e in range(args.execucoes):
+            inicio = e * PASSOS_DIA
+            series = previsoes_do_dia(w, inicio, n)
+            t0 = time.perf_counter()
+            res = avaliar_fazendas(fazendas, series, hist, banco)
+            t_inc.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            ref = do_zero([fz['cultura'] for fz in fazendas], w, inicio, series)
+            t_zero.append(time.perf_counter() - t0)
+
+    # Conferência: pressão máxima na previsão por fazenda/patógeno igual nas duas versões
+    alvos = MotorSanitario([None]).alvos
+    confere = all(abs(p['pressao_max'] - float(ref['pressao'][:, i, alvos.index(p['alvo'])].max())) < 1e-3
+                  for i, r in enumerate(res) for p in r['patogenos'])
+    r = {'fazendas': n, 'execucoes': args.execucoes, 'confere': confere,
+         'incremental_ms_ultima': round(t_inc[-1] * 1000, 1), 'do_zero_ms_ultima': round(t_zero[-1] * 1000, 1),
+         'incremental_ms_media': round(float(np.mean(t_inc)) * 1000, 1), 'do_zero_ms_media': round(float(np.mean(t_zero)) * 1000, 1),
+         'niveis': {nv: sum(1 for x in res if x['nivel'] == nv) for nv in ("ALTO", "MODERADO", "BAIXO")}}
+    if args.json:
+        print(json.dumps(r))
+    else:
+        print(f"Frota: {n} fazendas, {args.execucoes} execuções diárias (mesmos índices: {'sim' if confere else 'NÃO'})")
+        print(f"  incremental (estado no histórico): última {r['incremental_ms_ultima']:8.1f} ms | média {r['incremental_ms_media']:8.1f} ms")
+        print(f"  do zero (safra inteira)          : última {r['do_zero_ms_ultima']:8.1f} ms | média {r['do_zero_ms_media']:8.1f} ms")
+        print(f"  níveis na última execução: {r['niveis']}")
+    sys.exit(0 if confere else 1)
@@ -0,0 +1,128 @@
+"""
+Cadastro de talhões no mapa GIS: consultas pelo índice R*Tree (talhoes.RegistroTalhoes) x varredura
+do cadastro inteiro em Python (como a lista de pontos que o mapa redesenhava a cada rerun):
+
+    janela       talhões visíveis numa janela de zoom de fazenda
+    contendo     em qual polígono está um clique
+    proximo      talhão mais próximo de um clique (distância à borda)
+    camada       marcadores enviados ao navegador: só a janela (agrupada acima do limite) x todos
+
+As duas versões são conferidas (mesmos ids nas três consultas).
+
+    python benchmarks/bench_talhoes.py [--talhoes 20000] [--consultas 200] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from talhoes import RegistroTalhoes, camada_mapa, dentro, distancia_anel_m, distancia_m, janela_aproximada
+
+CENTRO = (-13.20, -41.40)     # Chapada Diamantina
+ESPALHAMENTO = 1.5            # graus em torno do centro
+
+
+def cadastrar(reg, n, semente=3):
+    rng = random.Random(semente)
+    for i in range(n):
+        lat = CENTRO[0] + rng.uniform(-ESPALHAMENTO, ESPALHAMENTO)
+        lon = CENTRO[1] + rng.uniform(-ESPALHAMENTO, ESPALHAMENTO)
+        if i % 4 == 0:
+            reg.adicionar_ponto(f"Ponto {i}", lat, lon, fazenda=f"fz{i % 50}")
+        else:
+            d = rng.uniform(0.001, 0.006)
+            anel = [[lon - d, lat - d], [lon + d, lat - d], [lon + d, lat + d], [lon - d, lat + d], [lon - d, lat - d]]
+            reg.adicionar_poligono(f"Talhão {i}", anel, fazenda=f"fz{i % 50}")
+
+
+def varrer_janela(todos, sul, oeste, norte, leste):
+    saida = []
+    for t in todos:
+        xs, ys = ([p[0] for p in t['anel']], [p[1] for p in t['anel']]) if t['anel'] else ([t['lon']], [t['lat']])
+        if max(ys) >= sul and min(ys) <= norte and max(xs) >= oeste and min(xs) <= leste:
+            saida.append(t)
+    return saida
+
+
+def varrer_contendo(todos, lat, lon):
+    return [t for t in todos if t['tipo'] == 'poligono' and dentro(lat, lon, t['anel'])]
+
+
+def varrer_proximo(todos, lat, lon):
+    return min(todos, key=lambda t: distancia_anel_m(lat, lon, t['anel']) if t['anel'] else distancia_m(lat, lon, t['lat'], t['lon']))
+
+
+def cronometrar(fn, pontos):
+    t0 = time.perf_counter()
+    res = [fn(*p) for p in pontos]
+    return (time.perf_counter() - t0) / len(pontos) * 1000, res
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--talhoes", type=int, default=20000)
+    ap.add_argument("--consultas", type=int, default=200)
+    ap.add_argument("--zoom", type=int, default=14)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    rng = random.Random(9)
+    cliques = [(CENTRO[0] + rng.uniform(-ESPALHAMENTO, ESPALHAMENTO), CENTRO[1] + rng.uniform(-ESPALHAMENTO, ESPALHAMENTO))
+               for _ in range(args.consultas)]
+    janelas = [janela_aproximada(la, lo, args.zoom) for la, lo in cliques]
+
+    with tempfile.TemporaryDirectory() as pasta, RegistroTalhoes(os.path.join(pasta, "t.db")) as reg:
+        t0 = time.perf_counter()
+        cadastrar(reg, args.talhoes)
+        t_cadastro = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        todos = reg.listar()
+        t_listar = (time.perf_counter() - t0) * 1000
+
+        ms_jan_idx, r_idx = cronometrar(lambda *j: {t['id'] for t in reg.na_janela(*j)}, janelas)
+        ms_jan_var, r_var = cronometrar(lambda *j: {t['id'] for t in varrer_janela(todos, *j)}, janelas)
+        ok_janela = r_idx == r_var
+
+        ms_cont_idx, r_idx = cronometrar(lambda la, lo: {t['id'] for t in reg.contendo(la, lo)}, cliques)
+        ms_cont_var, r_var = cronometrar(lambda la, lo: {t['id'] for t in varrer_contendo(todos, la, lo)}, cliques)
+        ok_contendo = r_idx == r_var
+
+        ms_prox_idx, r_idx = cronometrar(lambda la, lo: reg.mais_proximos(la, lo)[0][1], cliques)
+        ms_prox_var, r_var = cronometrar(lambda la, lo: varrer_proximo(todos, la, lo), cliques)
+        # Empates de distância podem trocar o id: confere a distância do mais próximo
+        ok_proximo = all(abs(d - (distancia_anel_m(la, lo, t['anel']) if t['anel'] else distancia_m(la, lo, t['lat'], t['lon']))) < 1e-6
+                         for d, t, (la, lo) in zip(r_idx, r_var, cliques))
+
+        camada_mapa(reg, janelas[0], args.zoom)   # import do folium fora da medida
+        t0 = time.perf_counter()
+        enviados = [camada_mapa(reg, j, args.zoom)[1] for j in janelas[:20]]
+        ms_camada = (time.perf_counter() - t0) / len(enviados) * 1000
+        largo = janela_aproximada(*CENTRO, 8)
+        _, n_largo = camada_mapa(reg, largo, 8)
+        grupos_largo = len(reg.agrupar(*largo))
+
+    confere = ok_janela and ok_contendo and ok_proximo
+    r = {'talhoes': args.talhoes, 'consultas': args.consultas, 'confere': confere, 'cadastro_s': round(t_cadastro, 2),
+         'listar_tudo_ms': round(t_listar, 1),
+         'janela_ms': {'rtree': round(ms_jan_idx, 3), 'varredura': round(ms_jan_var, 3)},
+         'contendo_ms': {'rtree': round(ms_cont_idx, 3), 'varredura': round(ms_cont_var, 3)},
+         'proximo_ms': {'rtree': round(ms_prox_idx, 3), 'varredura': round(ms_prox_var, 3)},
+         'camada_ms': round(ms_camada, 2), 'marcadores_janela_media': round(sum(enviados) / len(enviados), 1),
+         'zoom8_talhoes': n_largo, 'zoom8_grupos': grupos_largo}
+    if args.json:
+        print(json.dumps(r))
+    else:
+        print(f"Cadastro: {args.talhoes} talhões em {t_cadastro:.2f} s, {args.consultas} consultas (mesmos resultados: {'sim' if confere else 'NÃO'})")
+        print(f"  listar() do cadastro inteiro (base da varredura): {t_listar:8.1f} ms")
+        for rotulo, a, b in (("janela (zoom %d)" % args.zoom, ms_jan_idx, ms_jan_var), ("contendo (clique)", ms_cont_idx, ms_cont_var),
+                             ("mais próximo", ms_prox_idx, ms_prox_var)):
+            print(f"  {rotulo:<18}: R*Tree {a:8.3f} ms | varredura {b:8.3f} ms ({b / max(a, 1e-9):.0f}x)")
+        print(f"  camada do mapa (zoom {args.zoom}): {ms_camada:.2f} ms, {r['marcadores_janela_media']} talhões enviados em média (de {args.talhoes})")
+        print(f"  zoom 8: {n_largo} talhões na janela -> {grupos_largo} grupos enviados")
+    sys.exit(0 if confere else 1)
@@ -0,0 +1,142 @@
+"""
+Proxy de tiles de satélite (tiles_satelite.py) contra a origem simulada (servidor_tiles.py), com
+latência de link de satélite por tile. Cenários, na área de uma fazenda (zoom 12 a 16):
+
+    semeadura     primeira carga: 1 download por vez x downloads simultâneos
+    quente        segunda carga: tudo sai do disco (nenhum pedido à origem)
+    revalidação   validade vencida: a origem responde 304 (só cabeçalhos passam pelo link);
+                  com imagem nova (outra versão) o tile é baixado de novo
+    coalescência  vários pedidos simultâneos do mesmo tile -> um download
+    despejo       cache limitado: o total fica abaixo do limite e os tiles usados por último ficam
+    origem fora   cópia vencida servida em vez de erro
+    navegador     pelo endpoint HTTP do mapa: 200 com ETag e depois 304 a If-None-Match
+
+    python benchmarks/bench_tiles.py [--latencia 0.05] [--paralelo 8] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import requests
+
+from cliente_owm import criar_sessao
+from servidor_tiles import TAMANHO_TILE, OrigemTiles
+from tiles_satelite import CacheTiles, ProxyTiles, ServidorTiles, ampliar_caixa, tiles_da_caixa
+
+SEDE = (-13.414, -41.285, -13.414, -41.285)   # Ibicoara (fazendas.json)
+
+
+def novo_proxy(pasta, origem, limite_bytes=1 << 30, tentativas=3):
+    return ProxyTiles(CacheTiles(pasta, limite_bytes), origem.url, sessao=criar_sessao(16, tentativas))
+
+
+def cronometrar(fn):
+    t0 = time.perf_counter()
+    r = fn()
+    return time.perf_counter() - t0, r
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latencia", type=float, default=0.05, help="Latência da origem por tile (s)")
+    ap.add_argument("--paralelo", type=int, default=8)
+    ap.add_argument("--margem-km", type=float, default=1.0)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    tiles = sorted(set(tiles_da_caixa(*ampliar_caixa(SEDE, args.margem_km), range(12, 17))))
+    checagens = {}
+    with tempfile.TemporaryDirectory() as pasta, OrigemTiles(latencia=args.latencia) as origem:
+        # Semeadura serial x paralela (pastas separadas: as duas começam frias)
+        p1 = novo_proxy(os.path.join(pasta, "serial"), origem)
+        t_serial, _ = cronometrar(lambda: p1.semear(tiles, paralelo=1))
+        p1.fechar()
+        proxy = novo_proxy(os.path.join(pasta, "cache"), origem)
+        antes = origem.contagem[200]
+        t_paralelo, fontes = cronometrar(lambda: proxy.semear(tiles, paralelo=args.paralelo))
+        checagens['semeadura'] = fontes == {'origem': len(tiles)} and origem.contagem[200] - antes == len(tiles)
+
+        pedidos = sum(origem.contagem.values())
+        t_quente, fontes = cronometrar(lambda: proxy.semear(tiles, paralelo=args.paralelo))
+        checagens['quente'] = fontes == {'cache': len(tiles)} and sum(origem.contagem.values()) == pedidos
+
+        # Revalidação: vence tudo no índice (mesma imagem na origem); depois, imagem nova no zoom 16
+        proxy.cache.con.execute("UPDATE tiles SET expira_em = 0")
+        proxy.cache.con.commit()
+        bytes_antes = origem.bytes_enviados
+        t_reval, fontes = cronometrar(lambda: proxy.semear(tiles, paralelo=args.paralelo))
+        bytes_304 = origem.bytes_enviados - bytes_antes
+        checagens['revalidacao_304'] = fontes == {'revalidado': len(tiles)} and bytes_304 == 0
+        origem.versao = 2
+        proxy.cache.con.execute("UPDATE tiles SET expira_em = 0 WHERE z = 16")
+        proxy.cache.con.commit()
+        fontes = proxy.semear([t for t in tiles if t[0] == 16], paralelo=args.paralelo)
+        z16 = proxy.cache.ler(*tiles[-1])
+        checagens['imagem_nova'] = fontes == {'origem': sum(t[0] == 16 for t in tiles)} and z16['corpo'] == origem.corpo(*tiles[-1])
+
+        # Coalescência: 16 threads pedem o mesmo tile vencido ao mesmo tempo
+        alvo = tiles[0]
+        proxy.cache.con.execute("UPDATE tiles SET expira_em = 0 WHERE z=? AND x=? AND y=?", alvo)
+        proxy.cache.con.commit()
+        antes = origem.pedidos_por_tile[alvo]
+        largada = threading.Barrier(16)
+        threads = [threading.Thread(target=lambda: (largada.wait(), proxy.obter(*alvo))) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        checagens['coalescencia'] = origem.pedidos_por_tile[alvo] - antes == 1
+
+        # Navegador pelo endpoint HTTP: 200 + ETag, depois 304
+        z, x, y = tiles[1]
+        with ServidorTiles(proxy, porta=0, host="127.0.0.1") as srv:
+            r1 = requests.get(f"{srv.url}/tile/{z}/{y}/{x}", timeout=5)
+            r2 = requests.get(f"{srv.url}/tile/{z}/{y}/{x}", headers={"If-None-Match": r1.headers.get("ETag", "")}, timeout=5)
+            estado = requests.get(f"{srv.url}/estado", timeout=5).json()
+        checagens['navegador'] = r1.status_code == 200 and r1.content == proxy.cache.ler(z, x, y)['corpo'] and r2.status_code == 304
+        proxy.fechar()
+
+        # Despejo: limite de 20 tiles; os 5 relidos antes de estourar continuam em disco
+        limite = 20 * TAMANHO_TILE
+        pequeno = novo_proxy(os.path.join(pasta, "pequeno"), origem, limite_bytes=limite)
+        pequeno.semear(tiles[:15], paralelo=1)
+        for t in tiles[:5]:
+            pequeno.obter(*t)
+        pequeno.semear(tiles[15:25], paralelo=1)
+        checagens['despejo'] = (pequeno.cache.total_bytes <= limite and pequeno.cache.despejados > 0
+                                and all(pequeno.cache.ler(*t) is not None for t in tiles[:5]))
+        n_pequeno = pequeno.cache.contar()
+
+        # Origem fora do ar: cópia vencida servida
+        pequeno.cache.con.execute("UPDATE tiles SET expira_em = 0")
+        pequeno.cache.con.commit()
+        pequeno.origem = "http://127.0.0.1:9"     # porta sem servidor
+        pequeno.sessao = criar_sessao(4, tentativas=0)
+        checagens['origem_fora'] = pequeno.obter(*tiles[0])['fonte'] == 'vencido'
+        pequeno.fechar()
+
+    confere = all(checagens.values())
+    r = {'tiles': len(tiles), 'latencia_s': args.latencia, 'paralelo': args.paralelo, 'confere': confere, 'checagens': checagens,
+         'semeadura_serial_s': round(t_serial, 2), 'semeadura_paralela_s': round(t_paralelo, 2), 'quente_s': round(t_quente, 3),
+         'revalidacao_s': round(t_reval, 2), 'bytes_origem_revalidacao': bytes_304, 'bytes_por_tile': TAMANHO_TILE,
+         'tiles_no_cache_limitado': n_pequeno, 'estado_endpoint': estado}
+    if args.json:
+        print(json.dumps(r))
+    else:
+        print(f"Área da sede (±{args.margem_km} km, zoom 12-16): {len(tiles)} tiles de {TAMANHO_TILE // 1024} KB, "
+              f"origem com {args.latencia * 1000:.0f} ms por tile")
+        print(f"  semeadura, 1 download por vez   : {t_serial:7.2f} s")
+        print(f"  semeadura, {args.paralelo:2d} simultâneos      : {t_paralelo:7.2f} s ({t_serial / t_paralelo:.1f}x)")
+        print(f"  segunda carga (disco)           : {t_quente:7.3f} s, 0 pedidos à origem")
+        print(f"  revalidação (304)               : {t_reval:7.2f} s, {bytes_304} bytes de imagem pelo link "
+              f"(de {len(tiles) * TAMANHO_TILE // 1024} KB)")
+        print(f"  cache limitado a 20 tiles       : {n_pequeno} tiles em disco após 25 pedidos")
+        for nome, ok in checagens.items():
+            print(f"  {nome:<16}: {'ok' if ok else 'FALHOU'}")
+    sys.exit(0 if confere else 1)
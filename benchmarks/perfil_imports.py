@@ -0,0 +1,139 @@
+"""
+Partida a frio do dashboard: cada amostra é um processo Python novo com `-X importtime`.
+Mede a primeira execução do app.py no AppTest (rede simulada, sem latência) e atribui a ela
+os imports feitos durante essa execução; o Streamlit e o harness do AppTest já vêm carregados,
+como no servidor. Serve de verificação de regressão (código de saída 1):
+    - algum módulo de PESADOS carregado na primeira pintura
+    - primeira pintura (mediana) acima de --alvo-ms
+
+    python benchmarks/perfil_imports.py [--repeticoes 5] [--top 15] [--alvo-ms 1500]
+    python benchmarks/perfil_imports.py --aba "🗺️ GIS MAP"     # o que o clique na aba carrega
+    git show <rev>:app.py > app_antigo.py && python benchmarks/perfil_imports.py --app app_antigo.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+MARCA = "### perfil_imports: inicio do app ###"
+
+# Só podem carregar quando a aba/funcionalidade que os usa roda pela primeira vez
+PESADOS = ("plotly.graph_objs", "plotly.express", "folium", "branca", "streamlit_folium", "PIL",
+           "google.generativeai", "fpdf")
+ALVO_PRIMEIRA_RENDER_MS = 1500   # mediana da primeira execução do script (~1,0 s hoje; ~2,0 s com os imports no topo)
+
+
+def filho(app, aba):
+    sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+    sys.path.insert(0, RAIZ)
+    from bench_abas import instalar_rede_falsa   # carrega streamlit e o AppTest (fora da medida)
+    from streamlit.testing.v1 import AppTest
+
+    instalar_rede_falsa(0.0)
+    os.chdir(tempfile.mkdtemp())
+    at = AppTest.from_file(app, default_timeout=120)
+    at.query_params["w_key"] = "x"
+    antes = set(sys.modules)
+    print(MARCA, file=sys.stderr, flush=True)
+    t0 = time.perf_counter()
+    at.run()
+    r = {'primeira_ms': (time.perf_counter() - t0) * 1000, 'excecao': [e.value for e in at.exception],
+         'modulos': sorted(set(sys.modules) - antes)}
+    if aba:
+        antes = set(sys.modules)
+        print(MARCA, file=sys.stderr, flush=True)
+        at.session_state["aba_ativa"] = aba
+        t0 = time.perf_counter()
+        at.run()
+        r.update({'aba_ms': (time.perf_counter() - t0) * 1000, 'modulos_aba': sorted(set(sys.modules) - antes)})
+    print(json.dumps(r))
+
+
+def ler_importtime(stderr):
+    """Blocos do stderr separados pela MARCA -> [[(modulo, self_us, cumulativo_us, nivel)]]."""
+    blocos, atual = [], None
+    for linha in stderr.splitlines():
+        if linha.startswith(MARCA):
+            atual = []
+            blocos.append(atual)
+        elif atual is not None and linha.startswith("import time:") and "|" in linha:
+            # "import time:   self |  cumulativo | <2 espaços por nível>pacote"
+            _, proprio, cumulativo, nome = linha.replace("import time:", "|", 1).split("|")
+            if proprio.strip().isdigit():
+                nome = nome[1:]
+                atual.append((nome.strip(), int(proprio), int(cumulativo), (len(nome) - len(nome.lstrip(" "))) // 2))
+    return blocos
+
+
+def resumir(bloco, top):
+    # Nível 0 = import feito pelo próprio app (ou pelo Streamlit ao rodá-lo); o cumulativo já inclui os filhos
+    raiz = [(nome, cum) for nome, _, cum, nivel in bloco if nivel == 0]
+    return {'total_ms': sum(c for _, c in raiz) / 1000,
+            'top': [(nome, c / 1000) for nome, c in sorted(raiz, key=lambda x: -x[1])[:top]]}
+
+
+def pesados_em(modulos):
+    return sorted({p for p in PESADOS for m in modulos if m == p or m.startswith(p + ".")})
+
+
+def amostra(app, aba):
+    cmd = [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--filho", "--app", app] + (["--aba", aba] if aba else [])
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=RAIZ, timeout=600)
+    saida = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+    if proc.returncode != 0 or not saida:
+        raise RuntimeError(proc.stderr[-2000:])
+    return json.loads(saida[-1]), ler_importtime(proc.stderr)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--app", default=os.path.join(RAIZ, 'app.py'))
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--alvo-ms", type=float, default=ALVO_PRIMEIRA_RENDER_MS)
+    ap.add_argument("--aba", help="Rótulo da aba a abrir depois da primeira pintura (ex.: '🗺️ GIS MAP')")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    app = os.path.abspath(args.app)
+    if args.filho:
+        filho(app, args.aba)
+        sys.exit(0)
+
+    amostras = [amostra(app, args.aba) for _ in range(args.repeticoes)]
+    medidas, blocos = [a[0] for a in amostras], [a[1] for a in amostras]
+    if medidas[0]['excecao']:
+        sys.exit(f"app.py falhou na primeira execução: {medidas[0]['excecao']}")
+    imports = resumir(blocos[-1][0], args.top)
+    res = {'primeira_ms': statistics.median(m['primeira_ms'] for m in medidas),
+           'imports_app_ms': statistics.median(resumir(b[0], args.top)['total_ms'] for b in blocos),
+           'modulos_novos': len(medidas[-1]['modulos']), 'top': imports['top'],
+           'pesados_primeira': pesados_em(medidas[-1]['modulos']), 'alvo_ms': args.alvo_ms}
+    if args.aba:
+        res.update({'aba': args.aba, 'aba_ms': statistics.median(m['aba_ms'] for m in medidas),
+                    'imports_aba_ms': statistics.median(resumir(b[1], args.top)['total_ms'] for b in blocos),
+                    'pesados_aba': pesados_em(medidas[-1]['modulos_aba'])})
+    falhas = []
+    if res['pesados_primeira']:
+        falhas.append(f"módulos pesados na primeira pintura: {', '.join(res['pesados_primeira'])}")
+    if res['primeira_ms'] > args.alvo_ms:
+        falhas.append(f"primeira pintura {res['primeira_ms']:.0f} ms > alvo {args.alvo_ms:.0f} ms")
+
+    if args.json:
+        print(json.dumps({**res, 'falhas': falhas}, ensure_ascii=False))
+    else:
+        print(f"Primeira pintura (mediana de {args.repeticoes} processos novos): {res['primeira_ms']:.0f} ms "
+              f"| imports do app {res['imports_app_ms']:.0f} ms ({res['modulos_novos']} módulos) | alvo {args.alvo_ms:.0f} ms")
+        print(f"\n{'import (nível 0)':<40} {'cumulativo ms':>14}")
+        for nome, ms in res['top']:
+            print(f"{nome:<40} {ms:>14.1f}")
+        if args.aba:
+            print(f"\nClique em {args.aba}: {res['aba_ms']:.0f} ms | imports {res['imports_aba_ms']:.0f} ms"
+                  f" | pesados carregados: {', '.join(res['pesados_aba']) or 'nenhum'}")
+        print("\n" + ("\n".join(f"❌ {f}" for f in falhas) if falhas else "✅ Dentro do alvo, sem módulos pesados na partida."))
+    sys.exit(1 if falhas else 0)
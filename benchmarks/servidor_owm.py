@@ -0,0 +1,153 @@
+"""
+Servidor local que imita o OpenWeather com respostas gravadas (benchmarks/fixtures/).
+Os horários da previsão são deslocados para a rodada atual, como numa resposta nova.
+
+    python benchmarks/servidor_owm.py [--porta 8765]      # serve; use OPENWEATHER_URL=http://127.0.0.1:8765
+    python benchmarks/servidor_owm.py --latencia 0.3 --taxa-erro 0.2   # API degradada (503 em 20% dos pedidos)
+    python benchmarks/servidor_owm.py --gravar -13.0 -41.4  # regrava as fixtures da API real (OPENWEATHER_KEY)
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+ROTAS = {"/data/2.5/forecast": "forecast", "/data/2.5/weather": "weather", "/geo/1.0/direct": "geo"}
+
+
+def carregar_fixtures(pasta=FIXTURES, agora=None):
+    """{endpoint: bytes do JSON}; a previsão passa a começar na próxima janela de 3h."""
+    fixtures = {}
+    for endpoint in ROTAS.values():
+        with open(os.path.join(pasta, f"{endpoint}.json"), encoding='utf-8') as f:
+            fixtures[endpoint] = json.load(f)
+    lst = fixtures["forecast"]["list"]
+    desloc = (int(agora or time.time()) // 10800 + 1) * 10800 - lst[0]["dt"]
+    for it in lst:
+        it["dt"] += desloc
+        it["dt_txt"] = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(it["dt"]))
+    fixtures["weather"]["dt"] = lst[0]["dt"] - 1800
+    return {ep: json.dumps(d, ensure_ascii=False).encode() for ep, d in fixtures.items()}
+
+
+class ServidorOWM:
+    """
+    Stub HTTP em thread própria. `latencia` (s) simula a rede por resposta e `latencia_conexao` o
+    aperto de mão TCP+TLS de cada conexão nova; `contagem` soma pedidos por endpoint.
+    Falhas injetadas: `taxa_erro` (fração de respostas `status_erro`) e `roteiro`, uma fila de
+    status consumida pedido a pedido antes da taxa (0 = derruba a conexão sem responder).
+    """
+
+    def __init__(self, porta=0, latencia=0.0, pasta=FIXTURES, taxa_erro=0.0, status_erro=503, latencia_conexao=0.0):
+        fixtures = carregar_fixtures(pasta)
+        self.latencia, self.latencia_conexao = latencia, latencia_conexao
+        self.conexoes = 0
+        self.taxa_erro, self.status_erro = taxa_erro, status_erro
+        self.roteiro = deque()
+        self.contagem = {ep: 0 for ep in fixtures}
+        self.erros = 0
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive: sessões com pool reaproveitam a conexão
+            disable_nagle_algorithm = True  # cabeçalho e corpo saem em escritas separadas: sem isso, +40 ms de ACK atrasado
+
+            def setup(self):
+                super().setup()
+                servidor.conexoes += 1
+                if servidor.latencia_conexao:
+                    time.sleep(servidor.latencia_conexao)
+
+            def do_GET(self):
+                endpoint = ROTAS.get(urlsplit(self.path).path)
+                if endpoint is None:
+                    self.send_error(404)
+                    return
+                servidor.contagem[endpoint] += 1
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+                status = servidor._proximo_status()
+                if status == 0:
+                    self.close_connection = True
+                    self.connection.shutdown(2)
+                    return
+                if status != 200:
+                    corpo = json.dumps({"cod": status, "message": "falha simulada"}).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(corpo)))
+                    self.end_headers()
+                    self.wfile.write(corpo)
+                    return
+                corpo = fixtures[endpoint]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *a):
+                pass
+
+        class Servidor(ThreadingHTTPServer):
+            request_queue_size = 256        # fila padrão (5) descarta SYNs sob carga: 1 s de retransmissão no cliente
+
+        self._http = Servidor(("127.0.0.1", porta), Manipulador)
+        self._http.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._http.server_address[1]}"
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+
+    def _proximo_status(self):
+        try:
+            status = self.roteiro.popleft()
+        except IndexError:
+            status = self.status_erro if self.taxa_erro and random.random() < self.taxa_erro else 200
+        self.erros += status != 200
+        return status
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._http.shutdown()
+        self._http.server_close()
+
+
+def gravar_fixtures(lat, lon, key, pasta=FIXTURES):
+    import requests
+    base = "https://api.openweathermap.org"
+    pedidos = {"forecast": (f"{base}/data/2.5/forecast", {"lat": lat, "lon": lon, "units": "metric", "lang": "pt_br"}),
+               "weather": (f"{base}/data/2.5/weather", {"lat": lat, "lon": lon, "units": "metric", "lang": "pt_br"}),
+               "geo": (f"{base}/geo/1.0/direct", {"q": "Mucugê,BR", "limit": 1})}
+    for endpoint, (url, params) in pedidos.items():
+        r = requests.get(url, params={**params, "appid": key}, timeout=10)
+        r.raise_for_status()
+        with open(os.path.join(pasta, f"{endpoint}.json"), 'w', encoding='utf-8') as f:
+            json.dump(r.json(), f, ensure_ascii=False)
+        print(f"✅ {endpoint}.json gravado")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--porta", type=int, default=8765)
+    ap.add_argument("--latencia", type=float, default=0.0)
+    ap.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas com erro (0-1)")
+    ap.add_argument("--status-erro", type=int, default=503)
+    ap.add_argument("--gravar", nargs=2, type=float, metavar=("LAT", "LON"), help="Regrava as fixtures da API real")
+    args = ap.parse_args()
+
+    if args.gravar:
+        gravar_fixtures(*args.gravar, os.getenv("OPENWEATHER_KEY"))
+    else:
+        with ServidorOWM(args.porta, args.latencia, taxa_erro=args.taxa_erro, status_erro=args.status_erro) as srv:
+            print(f"🛰️ OpenWeather simulado em {srv.url} (Ctrl+C para sair)")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,112 @@
+"""
+Servidor local que imita a origem de tiles da Esri (/{z}/{y}/{x}) com imagens sintéticas.
+Cada tile tem corpo e ETag determinísticos; `versao` muda a imagem de todos os tiles (nova
+passagem do satélite) e `max_age` controla a validade anunciada. Responde 304 a If-None-Match.
+
+    python benchmarks/servidor_tiles.py [--porta 8766] [--latencia 0.08] [--max-age 86400]
+    TILES_ORIGEM_URL=http://127.0.0.1:8766 python tiles_satelite.py servir
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TAMANHO_TILE = 20 * 1024    # JPEG de satélite típico no zoom de fazenda
+
+
+class OrigemTiles:
+    """
+    Stub HTTP em thread própria. `latencia` (s) por resposta simula o link de satélite;
+    `contagem` soma respostas por status e `bytes_enviados` o que passou pelo "link".
+    `taxa_erro`: fração de respostas 503.
+    """
+
+    def __init__(self, porta=0, latencia=0.0, max_age=86400, tamanho=TAMANHO_TILE, taxa_erro=0.0):
+        self.latencia, self.max_age, self.tamanho, self.taxa_erro = latencia, max_age, tamanho, taxa_erro
+        self.versao = 1
+        self.contagem = {200: 0, 304: 0, 404: 0, 503: 0}
+        self.bytes_enviados = 0
+        self.pedidos_por_tile = {}
+        self._lock = threading.Lock()
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                partes = self.path.split("?")[0].strip("/").split("/")[-3:]
+                if len(partes) != 3 or not all(p.isdigit() for p in partes):
+                    self._responder(404)
+                    return
+                z, y, x = (int(p) for p in partes)
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+                with servidor._lock:
+                    servidor.pedidos_por_tile[(z, x, y)] = servidor.pedidos_por_tile.get((z, x, y), 0) + 1
+                if servidor.taxa_erro and random.random() < servidor.taxa_erro:
+                    self._responder(503)
+                    return
+                etag = servidor.etag(z, x, y)
+                if self.headers.get("If-None-Match") == etag:
+                    self._responder(304, etag=etag)
+                    return
+                self._responder(200, servidor.corpo(z, x, y), etag)
+
+            def _responder(self, status, corpo=b"", etag=None):
+                self.send_response(status)
+                if status == 200:
+                    self.send_header("Content-Type", "image/jpeg")
+                if etag:
+                    self.send_header("ETag", etag)
+                    self.send_header("Cache-Control", f"max-age={servidor.max_age}")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+                with servidor._lock:
+                    servidor.contagem[status] = servidor.contagem.get(status, 0) + 1
+                    servidor.bytes_enviados += len(corpo)
+
+            def log_message(self, *a):
+                pass
+
+        class Servidor(ThreadingHTTPServer):
+            request_queue_size = 256
+
+        self._http = Servidor(("127.0.0.1", porta), Manipulador)
+        self._http.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._http.server_address[1]}"
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+
+    def etag(self, z, x, y):
+        return '"' + hashlib.md5(f"{self.versao}/{z}/{x}/{y}".encode()).hexdigest()[:16] + '"'
+
+    def corpo(self, z, x, y):
+        semente = hashlib.sha256(f"{self.versao}/{z}/{x}/{y}".encode()).digest()
+        return b"\xff\xd8\xff\xe0" + (semente * (self.tamanho // len(semente) + 1))[:self.tamanho - 4]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._http.shutdown()
+        self._http.server_close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--porta", type=int, default=8766)
+    ap.add_argument("--latencia", type=float, default=0.08)
+    ap.add_argument("--max-age", type=int, default=86400)
+    ap.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas 503 (0-1)")
+    args = ap.parse_args()
+
+    with OrigemTiles(args.porta, args.latencia, args.max_age, taxa_erro=args.taxa_erro) as srv:
+        print(f"🛰️ Origem de tiles simulada em {srv.url}/{{z}}/{{y}}/{{x}} (Ctrl+C para sair)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- 1. POLÍTICA DE CACHE (OPENWEATHER) ---
+# OPENWEATHER_URL troca o servidor (espelho, proxy ou o stub local dos benchmarks)
+URL_OWM = os.getenv("OPENWEATHER_URL", "https://api.openweathermap.org").rstrip("/")
+URL_FORECAST = URL_OWM + "/data/2.5/forecast"
+URL_WEATHER = URL_OWM + "/data/2.5/weather"
+URL_GEO = URL_OWM + "/geo/1.0/direct"
+
+# TTL por endpoint, em segundos. None = não expira (geocoding não muda).
+TTL_ENDPOINT = {
+    "forecast": 3 * 3600,   # Passo da previsão é 3-horário
+    "weather": 10 * 60,     # Tempo atual (radar)
+    "geo": None             # Geocoding
+}
+MAX_ITENS = 512
+
+
+class CacheTTL:
+    """Cache LRU com expiração por endpoint, compartilhado entre sessões (thread-safe)."""
+
+    def __init__(self, max_itens=MAX_ITENS, ttls=None):
+        self.max_itens = max_itens
+        self.ttls = dict(TTL_ENDPOINT if ttls is None else ttls)
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def chave(endpoint, *partes, units="metric"):
+        return (endpoint, units) + tuple(partes)
+
+    def get(self, chave):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                self.misses += 1
+                return None
+            expira, payload = item
+            if expira is not None and expira < time.monotonic():
+                del self._dados[chave]
+                self.misses += 1
+                return None
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return payload
+
+    def put(self, chave, payload, idade=0.0):
+        # `idade`: segundos que o payload já tem (ex.: veio do depósito compartilhado)
+        ttl = self.ttls.get(chave[0])
+        expira = None if ttl is None else time.monotonic() + ttl - idade
+        with self._lock:
+            self._dados[chave] = (expira, payload)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_itens:
+                self._dados.popitem(last=False)
+
+    def obter(self, chave, carregar):
+        """Retorna o payload em cache ou chama carregar() e armazena (falhas não são cacheadas)."""
+        payload = self.get(chave)
+        if payload is None:
+            payload = carregar()
+            self.put(chave, payload)
+        return payload
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self):
+        return len(self._dados)
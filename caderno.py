@@ -0,0 +1,305 @@
+import argparse
+import csv
+import gzip
+import io
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# ==============================================================================
+# CADERNO DE CAMPO (CSV SOMENTE INSERÇÃO + ÍNDICE DE DATAS)
+# caderno_de_campo_master.csv segue no formato versionado pelo workflow
+# (Data,Temp_Med,VPD,Delta_T,Manejo_Realizado; texto livre com quebras de
+# linha). Registrar é um append: o arquivo nunca é reescrito. O índice ao lado
+# (.idx) guarda o byte onde começa cada bloco de datas, então "últimos 30 dias"
+# lê só o fim do arquivo. Meses antigos vão para caderno_arquivo/AAAA-MM.csv.gz.
+#
+#     python caderno.py ultimos 30
+#     python caderno.py registrar "Fertirrigação 12-06-22" --temp 21.4 --vpd 0.8 --delta-t 3.1
+#     python caderno.py compactar --manter-meses 3
+# ==============================================================================
+ARQUIVO_CADERNO = 'caderno_de_campo_master.csv'
+PASTA_ARQUIVO = 'caderno_arquivo'
+CABECALHO = ["Data", "Temp_Med", "VPD", "Delta_T", "Manejo_Realizado"]
+FORMATO_DATA = '%d/%m/%Y'
+BLOCO = 5000                # linhas por bloco na leitura em fluxo
+SEM_MANEJO = "Nenhum manejo registrado hoje."
+
+
+def _num(valor):
+    try: return float(valor)
+    except (TypeError, ValueError): return None
+
+
+def _data_iso(campo):
+    try: return datetime.strptime(campo.strip(), FORMATO_DATA).strftime('%Y-%m-%d')
+    except (ValueError, AttributeError): return None
+
+
+def normalizar_linha(linha):
+    """
+    Linha do CSV -> {data (AAAA-MM-DD), temp_med, vpd, delta_t, manejo} ou None (cabeçalho/lixo).
+    Linhas legadas têm colunas irregulares: números iniciais viram os índices, o resto é texto.
+    """
+    if not linha:
+        return None
+    data = _data_iso(linha[0])
+    if data is None:
+        return None
+    nums, textos = [], []
+    for campo in linha[1:]:
+        (nums if _num(campo) is not None and not textos else textos).append(campo)
+    nums = [_num(n) for n in nums[:3]] + [None] * (3 - min(len(nums), 3))
+    return {'data': data, 'temp_med': nums[0], 'vpd': nums[1], 'delta_t': nums[2],
+            'manejo': " | ".join(t for t in textos if t)}
+
+
+def inicios_de_registro(f, inicio=0):
+    """Percorre o arquivo binário a partir de `inicio`: (byte de começo, primeira linha física) de cada registro CSV."""
+    f.seek(inicio)
+    pos, aberto = inicio, False
+    for linha in f:
+        if not aberto:
+            yield pos, linha
+        # Aspas ímpares deixam um campo aberto: a próxima linha física continua o mesmo registro
+        if linha.count(b'"') % 2:
+            aberto = not aberto
+        pos += len(linha)
+
+
+class CadernoCSV:
+    """
+    Uso:
+        cad = CadernoCSV()
+        cad.registrar(date.today(), 21.4, 0.8, 3.1, "Pulverização preventiva")
+        for bloco in cad.blocos(inicio="2026-01-01"):   # colunas tipadas (numpy), BLOCO linhas por vez
+            ...
+        cad.ultimos(30)                                 # lista de registros; lê só o fim do arquivo
+    O índice é reconstruído sozinho se faltar ou não bater com o CSV (edição manual, merge).
+    """
+
+    def __init__(self, caminho=ARQUIVO_CADERNO, pasta_arquivo=None):
+        self.caminho = caminho
+        self.caminho_indice = caminho + '.idx'
+        self.pasta_arquivo = pasta_arquivo or os.path.join(os.path.dirname(os.path.abspath(caminho)), PASTA_ARQUIVO)
+        self._indice = None     # ([datas ISO], [offsets]) na ordem do arquivo
+
+    # --- ÍNDICE ---
+    def _carregar_indice(self):
+        if self._indice is not None:
+            return self._indice
+        datas, offsets = [], []
+        if os.path.exists(self.caminho_indice):
+            with open(self.caminho_indice, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    d, _, off = linha.strip().partition(' ')
+                    if d and off.isdigit():
+                        datas.append(d)
+                        offsets.append(int(off))
+        self._indice = (datas, offsets)
+        if not self._indice_valido():
+            self.reindexar()
+        return self._indice
+
+    def _indice_valido(self):
+        datas, offsets = self._indice
+        if not os.path.exists(self.caminho):
+            return not datas
+        tamanho = os.path.getsize(self.caminho)
+        if tamanho > 0 and not datas:
+            return False
+        with open(self.caminho, 'rb') as f:
+            # Confere o primeiro e o último bloco: cada offset tem que cair no começo de uma linha com a data certa
+            for i in {0, len(datas) - 1} if datas else ():
+                if offsets[i] >= tamanho:
+                    return False
+                f.seek(offsets[i])
+                if _data_iso(f.read(10).decode('utf-8', 'replace')) != datas[i]:
+                    return False
+        return True
+
+    def reindexar(self):
+        """Varredura completa do CSV (só quando o índice falta ou está inválido)."""
+        datas, offsets = [], []
+        if os.path.exists(self.caminho):
+            with open(self.caminho, 'rb') as f:
+                for off, linha in inicios_de_registro(f):
+                    d = _data_iso(linha[:10].decode('utf-8', 'replace'))
+                    if d is not None and (not datas or datas[-1] != d):
+                        datas.append(d)
+                        offsets.append(off)
+        tmp = self.caminho_indice + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.writelines(f"{d} {o}\n" for d, o in zip(datas, offsets))
+        os.replace(tmp, self.caminho_indice)
+        self._indice = (datas, offsets)
+        return len(datas)
+
+    def _offset_inicial(self, inicio):
+        """Menor offset de bloco com data >= inicio (blocos fora de ordem também são cobertos)."""
+        datas, offsets = self._carregar_indice()
+        if not datas:
+            return 0
+        if inicio is None:
+            return offsets[0]
+        candidatos = [o for d, o in zip(datas, offsets) if d >= inicio]
+        # Sem bloco indexado no período: só linhas escritas depois do último bloco podem servir
+        return min(candidatos) if candidatos else offsets[-1]
+
+    # --- ESCRITA (O(1)) ---
+    def registrar(self, data, temp_med=None, vpd=None, delta_t=None, manejo=SEM_MANEJO):
+        """Anexa um registro ao fim do CSV e, se a data mudou, uma linha ao índice. Não relê o arquivo."""
+        if isinstance(data, (date, datetime)):
+            data = data.strftime('%Y-%m-%d')
+        datas, offsets = self._carregar_indice()
+        novo = not os.path.exists(self.caminho) or os.path.getsize(self.caminho) == 0
+        with open(self.caminho, 'ab') as f:
+            if novo:
+                f.write(_linha_csv(CABECALHO))
+            elif f.tell() > 0:
+                with open(self.caminho, 'rb') as leitura:
+                    leitura.seek(-1, os.SEEK_END)
+                    if leitura.read(1) != b'\n':
+                        f.write(b'\r\n')   # última linha sem terminador (edição manual)
+            offset = f.tell()
+            valores = [datetime.strptime(data, '%Y-%m-%d').strftime(FORMATO_DATA),
+                       *("" if v is None else f"{float(v):g}" for v in (temp_med, vpd, delta_t)), manejo or ""]
+            f.write(_linha_csv(valores))
+        if not datas or datas[-1] != data:
+            with open(self.caminho_indice, 'a', encoding='utf-8') as f:
+                f.write(f"{data} {offset}\n")
+            datas.append(data)
+            offsets.append(offset)
+
+    # --- LEITURA EM FLUXO ---
+    def _ler_csv(self, fonte, inicio, fim):
+        for linha in csv.reader(fonte):
+            reg = normalizar_linha(linha)
+            if reg is None or (inicio and reg['data'] < inicio) or (fim and reg['data'] > fim):
+                continue
+            yield reg
+
+    def _meses_arquivados(self, inicio, fim):
+        if not os.path.isdir(self.pasta_arquivo):
+            return []
+        meses = sorted(a[:7] for a in os.listdir(self.pasta_arquivo) if a.endswith('.csv.gz'))
+        return [m for m in meses if (not inicio or m >= inicio[:7]) and (not fim or m <= fim[:7])]
+
+    def registros(self, inicio=None, fim=None, arquivados=True):
+        """Registros com data entre `inicio` e `fim` (AAAA-MM-DD, inclusivos), arquivados primeiro."""
+        if arquivados:
+            for mes in self._meses_arquivados(inicio, fim):
+                with gzip.open(os.path.join(self.pasta_arquivo, f"{mes}.csv.gz"), 'rt', encoding='utf-8', newline='') as f:
+                    yield from self._ler_csv(f, inicio, fim)
+        if not os.path.exists(self.caminho):
+            return
+        with open(self.caminho, 'rb') as bruto:
+            bruto.seek(self._offset_inicial(inicio))
+            yield from self._ler_csv(io.TextIOWrapper(bruto, encoding='utf-8', newline=''), inicio, fim)
+
+    def blocos(self, inicio=None, fim=None, linhas=BLOCO, arquivados=True):
+        """Mesmos registros em blocos de colunas tipadas: data datetime64[D], índices float (NaN = vazio)."""
+        lote = []
+        for reg in self.registros(inicio, fim, arquivados):
+            lote.append(reg)
+            if len(lote) == linhas:
+                yield _colunas(lote)
+                lote = []
+        if lote:
+            yield _colunas(lote)
+
+    def ultimos(self, dias=30, hoje=None):
+        inicio = ((hoje or date.today()) - timedelta(days=dias - 1)).strftime('%Y-%m-%d')
+        return list(self.registros(inicio=inicio, arquivados=False))
+
+    def para_dataframe(self, inicio=None, fim=None):
+        import pandas as pd  # só o dashboard usa; o cron roda sem pandas
+        return pd.DataFrame(list(self.registros(inicio, fim)), columns=['data', 'temp_med', 'vpd', 'delta_t', 'manejo'])
+
+    # --- COMPACTAÇÃO ---
+    def compactar(self, manter_meses=3, hoje=None):
+        """
+        Move os meses anteriores aos `manter_meses` mais recentes para PASTA_ARQUIVO/AAAA-MM.csv.gz
+        (anexando a arquivos já existentes) e reescreve o CSV só com o restante. Linhas sem data
+        reconhecível ficam no CSV. Retorna {mes: registros arquivados}.
+        """
+        hoje = hoje or date.today()
+        ano, mes = hoje.year, hoje.month - (manter_meses - 1)
+        while mes < 1:
+            ano, mes = ano - 1, mes + 12
+        corte = f"{ano:04d}-{mes:02d}"
+        if not os.path.exists(self.caminho):
+            return {}
+        por_mes, manter = {}, []
+        with open(self.caminho, 'r', encoding='utf-8', newline='') as f:
+            for linha in csv.reader(f):
+                if linha == CABECALHO:
+                    continue
+                d = _data_iso(linha[0]) if linha else None
+                if d is not None and d[:7] < corte:
+                    por_mes.setdefault(d[:7], []).append(linha)
+                elif linha:
+                    manter.append(linha)
+        if not por_mes:
+            return {}
+        os.makedirs(self.pasta_arquivo, exist_ok=True)
+        for m, linhas in por_mes.items():
+            # Membro gzip novo no fim do arquivo: o gzip lê todos os membros em sequência
+            with gzip.open(os.path.join(self.pasta_arquivo, f"{m}.csv.gz"), 'ab') as f:
+                f.write(b"".join(_linha_csv(l) for l in linhas))
+        tmp = self.caminho + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_linha_csv(CABECALHO))
+            f.writelines(_linha_csv(l) for l in manter)
+        os.replace(tmp, self.caminho)
+        self.reindexar()
+        return {m: len(l) for m, l in sorted(por_mes.items())}
+
+
+def _linha_csv(campos):
+    buf = io.StringIO()
+    csv.writer(buf).writerow(campos)   # terminador \r\n, igual ao arquivo legado
+    return buf.getvalue().encode('utf-8')
+
+
+def _colunas(registros):
+    return {
+        'data': np.array([r['data'] for r in registros], dtype='datetime64[D]'),
+        'temp_med': np.array([np.nan if r['temp_med'] is None else r['temp_med'] for r in registros]),
+        'vpd': np.array([np.nan if r['vpd'] is None else r['vpd'] for r in registros]),
+        'delta_t': np.array([np.nan if r['delta_t'] is None else r['delta_t'] for r in registros]),
+        'manejo': [r['manejo'] for r in registros]
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Caderno de campo (CSV versionado)")
+    ap.add_argument("--csv", default=ARQUIVO_CADERNO)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ult = sub.add_parser("ultimos", help="Registros dos últimos N dias")
+    ult.add_argument("dias", type=int, nargs="?", default=30)
+    reg = sub.add_parser("registrar")
+    reg.add_argument("manejo")
+    reg.add_argument("--data", default=date.today().isoformat(), help="AAAA-MM-DD (padrão: hoje)")
+    reg.add_argument("--temp", type=float)
+    reg.add_argument("--vpd", type=float)
+    reg.add_argument("--delta-t", type=float)
+    cmp_ = sub.add_parser("compactar", help="Arquiva meses antigos em caderno_arquivo/AAAA-MM.csv.gz")
+    cmp_.add_argument("--manter-meses", type=int, default=3)
+    sub.add_parser("reindexar")
+    args = ap.parse_args()
+
+    cad = CadernoCSV(args.csv)
+    if args.cmd == "ultimos":
+        for r in cad.ultimos(args.dias):
+            indices = " | ".join(f"{k} {r[k]:g}" for k in ('temp_med', 'vpd', 'delta_t') if r[k] is not None)
+            print(f"{r['data']}  {indices}  {r['manejo'][:100]}")
+    elif args.cmd == "registrar":
+        cad.registrar(args.data, args.temp, args.vpd, args.delta_t, args.manejo)
+        print("✅ Registro anexado.")
+    elif args.cmd == "compactar":
+        arquivados = cad.compactar(args.manter_meses)
+        print(f"🗜️ {sum(arquivados.values())} registros arquivados ({', '.join(arquivados) or 'nenhum mês'})")
+    else:
+        print(f"🔎 {cad.reindexar()} blocos de datas indexados.")
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import threading
+import unicodedata
+from collections import defaultdict
+
+# ==============================================================================
+# CATÁLOGO AGRONÔMICO (BANCO TITAN)
+# Culturas, variedades, fases e química carregadas de banco_titan.json.
+# Índices invertidos (Alvo, Ativo, Grupo) e listas de opções ordenadas são
+# montados uma vez por carga; consultas não percorrem o dicionário aninhado.
+# ==============================================================================
+ARQUIVO_CATALOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'banco_titan.json')
+CAMPOS_INDICE = ('Alvo', 'Ativo', 'Grupo')
+
+
+def normalizar(texto):
+    # Chave de busca: sem acento, minúscula ("Ácaro" == "acaro")
+    return ''.join(c for c in unicodedata.normalize('NFKD', str(texto)) if not unicodedata.combining(c)).casefold().strip()
+
+
+def termos(texto):
+    """Valor completo + componentes de misturas ("Tiametoxam + Lambda" -> tiametoxam, lambda)."""
+    chave = normalizar(texto)
+    return {chave} | {p.strip() for p in chave.split('+') if p.strip()}
+
+
+class CatalogoTitan:
+    """Visão imutável de uma carga do catálogo. `produtos` guarda uma linha por item químico."""
+
+    def __init__(self, banco, origem=None, mtime=None):
+        self.banco = banco
+        self.origem = origem
+        self.mtime = mtime
+        self.culturas = sorted(banco)
+        self.variedades = {c: list(d['vars']) for c, d in banco.items()}
+        self.fases = {c: list(d['fases']) for c, d in banco.items()}   # ordem fenológica do arquivo
+
+        self.produtos = []
+        self.indices = {campo: defaultdict(list) for campo in CAMPOS_INDICE}
+        for cultura, d in banco.items():
+            for fase, dados in d['fases'].items():
+                quimica = dados.get('quimica')
+                if not isinstance(quimica, list): continue
+                for item in quimica:
+                    i = len(self.produtos)
+                    self.produtos.append({'Cultura': cultura, 'Fase': fase, **item})
+                    for campo in CAMPOS_INDICE:
+                        for t in termos(item.get(campo, '')):
+                            self.indices[campo][t].append(i)
+        # Opções de filtro (valores originais, ordenados sem acento)
+        self.opcoes = {campo: sorted({p[campo] for p in self.produtos if p.get(campo)}, key=normalizar) for campo in CAMPOS_INDICE}
+
+    @classmethod
+    def carregar(cls, caminho=ARQUIVO_CATALOGO):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), caminho, os.stat(caminho).st_mtime_ns)
+
+    # --- ACESSO ---
+    def cultura(self, nome):
+        return self.banco[nome]
+
+    def variedade(self, cultura, nome):
+        return self.banco[cultura]['vars'][nome]
+
+    def fase(self, cultura, nome):
+        return self.banco[cultura]['fases'][nome]
+
+    # --- CONSULTAS ---
+    def buscar(self, alvo=None, ativo=None, grupo=None, cultura=None):
+        """Produtos que atendem a todos os filtros informados (interseção dos índices)."""
+        sel = None
+        for campo, valor in zip(CAMPOS_INDICE, (alvo, ativo, grupo)):
+            if valor is None: continue
+            ids = set(self.indices[campo].get(normalizar(valor), ()))
+            sel = ids if sel is None else sel & ids
+        ids = range(len(self.produtos)) if sel is None else sorted(sel)
+        return [self.produtos[i] for i in ids if cultura is None or self.produtos[i]['Cultura'] == cultura]
+
+    def culturas_com(self, alvo=None, ativo=None, grupo=None):
+        return sorted({p['Cultura'] for p in self.buscar(alvo, ativo, grupo)})
+
+
+class FonteCatalogo:
+    """
+    Mantém o catálogo vigente e o troca quando o arquivo muda (recarga a quente).
+    A troca é atômica: quem já pegou `atual` continua com uma carga consistente.
+    """
+
+    def __init__(self, caminho=ARQUIVO_CATALOGO):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self.atual = CatalogoTitan.carregar(caminho)
+
+    def recarregar(self, forcar=False):
+        """Relê o arquivo se o mtime mudou (ou se `forcar`). Um JSON inválido mantém a carga anterior."""
+        try:
+            mtime = os.stat(self.caminho).st_mtime_ns
+        except OSError:
+            return self.atual
+        if forcar or mtime != self.atual.mtime:
+            with self._lock:
+                if forcar or mtime != self.atual.mtime:
+                    try: self.atual = CatalogoTitan.carregar(self.caminho)
+                    except (ValueError, KeyError) as e: print(f"⚠️ Catálogo inválido, mantendo versão anterior: {e}")
+        return self.atual
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Consultas ao catálogo agronômico")
+    ap.add_argument("--alvo")
+    ap.add_argument("--ativo")
+    ap.add_argument("--grupo")
+    ap.add_argument("--arquivo", default=ARQUIVO_CATALOGO)
+    args = ap.parse_args()
+
+    cat = CatalogoTitan.carregar(args.arquivo)
+    for p in cat.buscar(args.alvo, args.ativo, args.grupo):
+        print(f"{p['Cultura']} | {p['Fase']} | {p['Alvo']}: {p['Ativo']} ({p['Grupo']}, {p['Tipo']})")
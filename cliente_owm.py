@@ -0,0 +1,228 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from cache_api import TTL_ENDPOINT, URL_FORECAST, URL_GEO, URL_WEATHER
+from metricas import coletor
+
+# ==============================================================================
+# CLIENTE HTTP DO OPENWEATHER (COMPARTILHADO)
+# Uma sessão com pool keep-alive por processo, prazos de conexão/leitura,
+# novas tentativas com backoff e jitter em 429/5xx (feitas pelo urllib3),
+# disjuntor por endpoint e stale-while-revalidate: a última resposta boa é
+# servida na hora enquanto uma nova é buscada em segundo plano, e também
+# quando a API está fora do ar ou o disjuntor está aberto.
+# Testável com benchmarks/servidor_owm.py (latência e erros injetados).
+# ==============================================================================
+URL_ENDPOINT = {"forecast": URL_FORECAST, "weather": URL_WEATHER, "geo": URL_GEO}
+TIMEOUT = (3.05, 10)         # (conexão, leitura) em segundos
+POOL = 16
+TENTATIVAS = 3               # repetições além da primeira chamada
+BACKOFF = 0.5                # 0,5 s, 1 s, 2 s ... (+ jitter)
+JITTER = 0.5
+ESPERA_MAX = 10              # teto do backoff e do Retry-After (o cron não fica parado minutos)
+STATUS_REPETIR = (429, 500, 502, 503, 504)
+LIMIAR_FALHAS = 5            # falhas seguidas que abrem o disjuntor
+ESPERA_DISJUNTOR = 60.0      # segundos aberto antes de deixar uma chamada de teste passar
+JANELA_VENCIDA = 24 * 3600   # até quando uma resposta vencida ainda serve de reserva
+MAX_ULTIMAS = 1024
+
+
+class CircuitoAberto(Exception):
+    """O endpoint falhou seguidamente: chamadas são recusadas sem ir à rede até a espera acabar."""
+
+
+def _politica_repeticao(tentativas=TENTATIVAS, backoff=BACKOFF):
+    opcoes = dict(total=tentativas, connect=tentativas, read=tentativas, status=tentativas,
+                  status_forcelist=STATUS_REPETIR, allowed_methods=frozenset({"GET"}),
+                  backoff_factor=backoff, backoff_max=ESPERA_MAX, backoff_jitter=JITTER, raise_on_status=False)
+    try:
+        return Retry(**opcoes, retry_after_max=ESPERA_MAX)
+    except TypeError:
+        # urllib3 < 2.5 não limita o Retry-After: sem o limite, a espera do 429 fica só no backoff
+        return Retry(**opcoes, respect_retry_after_header=False)
+
+
+def criar_sessao(pool=POOL, tentativas=TENTATIVAS, backoff=BACKOFF):
+    # Sessão com pool de conexões keep-alive do tamanho do pool de threads
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool, max_retries=_politica_repeticao(tentativas, backoff))
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+class Disjuntor:
+    """fechado -> (LIMIAR falhas seguidas) -> aberto -> (espera) -> meio-aberto: uma chamada de teste decide."""
+
+    def __init__(self, limiar=LIMIAR_FALHAS, espera=ESPERA_DISJUNTOR):
+        self.limiar, self.espera = limiar, espera
+        self.falhas = 0
+        self.aberto_ate = 0.0
+        self._testando = False
+        self._lock = threading.Lock()
+
+    @property
+    def estado(self):
+        if self.falhas < self.limiar:
+            return "fechado"
+        return "aberto" if time.monotonic() < self.aberto_ate or self._testando else "meio-aberto"
+
+    def permitir(self):
+        with self._lock:
+            if self.falhas < self.limiar:
+                return True
+            if time.monotonic() < self.aberto_ate or self._testando:
+                return False
+            self._testando = True
+            return True
+
+    def sucesso(self):
+        with self._lock:
+            self.falhas, self._testando = 0, False
+
+    def falha(self):
+        with self._lock:
+            self.falhas += 1
+            self._testando = False
+            if self.falhas >= self.limiar:
+                self.aberto_ate = time.monotonic() + self.espera * random.uniform(0.8, 1.2)
+
+
+def _transitorio(exc):
+    # Falha da API/rede (conta para o disjuntor); 401/404 são erro de uso e sobem direto
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and exc.response.status_code in STATUS_REPETIR
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+class ClienteOWM:
+    """
+    Uso:
+        cli = ClienteOWM(key)
+        prev = cli.buscar("forecast", lat, lon)
+        dados, idade = cli.buscar("weather", lat, lon, com_idade=True)   # idade > 0: resposta guardada
+        geo = cli.buscar("geo", q="Mucugê,BR", limit=1)
+    `vencido_ok=False` desliga a reserva em memória (quem chama já tem a sua, ex.: o depósito):
+    a falha sobe em vez de voltar uma resposta vencida.
+    """
+
+    def __init__(self, key=None, sessao=None, timeout=TIMEOUT, pool=POOL, ttls=None, janela_vencida=JANELA_VENCIDA,
+                 limiar_falhas=LIMIAR_FALHAS, espera_disjuntor=ESPERA_DISJUNTOR, tentativas=TENTATIVAS, backoff=BACKOFF):
+        self.key = key
+        self.sessao = sessao or criar_sessao(pool, tentativas, backoff)
+        self.timeout = timeout
+        self.ttls = dict(TTL_ENDPOINT if ttls is None else ttls)
+        self.janela_vencida = janela_vencida
+        self.disjuntores = {ep: Disjuntor(limiar_falhas, espera_disjuntor) for ep in URL_ENDPOINT}
+        self._ultimas = OrderedDict()     # chave -> (payload, obtido_em monotônico)
+        self._revalidando = set()
+        self._lock = threading.Lock()
+        self._fundo = ThreadPoolExecutor(max_workers=2, thread_name_prefix="revalidar")
+        self.servidos_vencidos = 0
+
+    def _params(self, endpoint, lat, lon, extra):
+        params = {"appid": self.key, **extra}
+        if lat is not None:
+            params.update(lat=lat, lon=lon, units="metric", lang="pt_br")
+        return params
+
+    def _chave(self, endpoint, lat, lon, extra):
+        return (endpoint, lat, lon, tuple(sorted(extra.items())))
+
+    def _guardada(self, chave):
+        with self._lock:
+            achado = self._ultimas.get(chave)
+            if achado is not None:
+                self._ultimas.move_to_end(chave)
+        if achado is None:
+            return None
+        return achado[0], time.monotonic() - achado[1]
+
+    def _guardar(self, chave, payload):
+        with self._lock:
+            self._ultimas[chave] = (payload, time.monotonic())
+            self._ultimas.move_to_end(chave)
+            while len(self._ultimas) > MAX_ULTIMAS:
+                self._ultimas.popitem(last=False)
+
+    def _rede(self, endpoint, params):
+        disjuntor = self.disjuntores[endpoint]
+        if not disjuntor.permitir():
+            coletor().contar("disjuntor_recusas", endpoint=endpoint)
+            raise CircuitoAberto(f"{endpoint}: API instável, nova tentativa em até {disjuntor.espera:.0f}s")
+        try:
+            r = self.sessao.get(URL_ENDPOINT[endpoint], params=params, timeout=self.timeout)
+        except requests.RequestException as e:
+            coletor().http(endpoint, erro=e)
+            disjuntor.falha()
+            raise
+        coletor().http(endpoint, r)
+        try:
+            r.raise_for_status()
+        except requests.HTTPError as e:
+            # Erro de uso (chave inválida, 404) não abre o disjuntor
+            if _transitorio(e):
+                disjuntor.falha()
+            else:
+                disjuntor.sucesso()
+            raise
+        disjuntor.sucesso()
+        return r.json()
+
+    def _revalidar(self, chave, endpoint, params):
+        try:
+            self._guardar(chave, self._rede(endpoint, params))
+        except Exception as e:
+            coletor().erro("revalidar", e, endpoint=endpoint)
+        finally:
+            with self._lock:
+                self._revalidando.discard(chave)
+
+    def buscar(self, endpoint, lat=None, lon=None, com_idade=False, vencido_ok=True, **extra):
+        params = self._params(endpoint, lat, lon, extra)
+        chave = self._chave(endpoint, lat, lon, extra)
+        ttl = self.ttls.get(endpoint)
+        guardada = self._guardada(chave)
+        if guardada is not None and (ttl is None or guardada[1] <= ttl):
+            return guardada if com_idade else guardada[0]
+        if vencido_ok and guardada is not None and guardada[1] <= self.janela_vencida:
+            # Vencida mas dentro da janela: responde já e renova em segundo plano (uma renovação por chave)
+            with self._lock:
+                novo = chave not in self._revalidando
+                self._revalidando.add(chave)
+            if novo:
+                self._fundo.submit(self._revalidar, chave, endpoint, params)
+            self.servidos_vencidos += 1
+            coletor().contar("respostas_vencidas", endpoint=endpoint)
+            return guardada if com_idade else guardada[0]
+        # Sem reserva utilizável (nenhuma, fora da janela ou vencido_ok=False): a falha sobe para quem chamou
+        payload = self._rede(endpoint, params)
+        self._guardar(chave, payload)
+        return (payload, 0.0) if com_idade else payload
+
+    def estado(self):
+        return {ep: d.estado for ep, d in self.disjuntores.items()}
+
+    def fechar(self):
+        self._fundo.shutdown(wait=False, cancel_futures=True)
+        self.sessao.close()
+
+
+_CLIENTES = {}
+_LOCK_CLIENTES = threading.Lock()
+
+
+def cliente_padrao(key):
+    """Um cliente por chave e processo: pool, disjuntores e reservas compartilhados entre chamadas."""
+    with _LOCK_CLIENTES:
+        cli = _CLIENTES.get(key)
+        if cli is None:
+            cli = _CLIENTES[key] = ClienteOWM(key)
+        return cli
@@ -0,0 +1,365 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import warnings
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import requests
+
+from grade_espacial import GRADE
+from historico import id_local
+
+# ==============================================================================
+# CLIMATOLOGIA MULTISSAFRA (CACHE LOCAL POR ANO)
+# Dados diários (chuva, ET0, mín./máx.) e horários (temperatura, chuva) de
+# várias safras, trazidos uma vez da fonte configurada e guardados em
+# climatologia/<local>/AAAA.npy (float32, uma linha por dia do ano; NaN = sem
+# dado) e AAAA_h.npy (uma linha por hora). Só dias sem dado voltam à rede: anos
+# fechados e completos ficam no disco, o ano corrente busca os dias novos e os
+# que a fonte ainda devolvia vazios. As séries longas são reduzidas aqui
+# (PONTOS_MAX) antes de irem para o Plotly.
+#
+#     python climatologia.py completar --lat -13.414 --lon -41.285 --anos 5
+#     CLIMATOLOGIA_FONTE=csv:estacao_{local}.csv python climatologia.py safras --inicio 2025-11-25
+# ==============================================================================
+PASTA_CLIMATOLOGIA = 'climatologia'
+VARIAVEIS = ("chuva", "et0", "t_min", "t_max")   # diárias: mm, mm, °C, °C
+VARIAVEIS_HORA = ("temp", "chuva")               # horárias: °C, mm
+URL_OPEN_METEO = os.getenv("OPEN_METEO_URL", "https://archive-api.open-meteo.com").rstrip("/") + "/v1/archive"
+FUSO_FONTE = "America/Sao_Paulo"                 # UTC-3, o mesmo FUSO_BRASIL do laudo
+ATRASO_ARQUIVO = 5       # dias até a reanálise cobrir um dia
+SAFRAS_PADRAO = 5
+PONTOS_MAX = 1500        # teto de pontos por série enviada ao navegador
+TIMEOUT = (3.05, 30)
+
+
+# --- 1. FONTES ---
+class FonteOpenMeteo:
+    """Reanálise ERA5 do Open-Meteo (gratuita, sem chave): diário e horário desde 1940."""
+    nome = "open-meteo"
+
+    def __init__(self, url=URL_OPEN_METEO, sessao=None, timeout=TIMEOUT):
+        self.url, self.timeout = url, timeout
+        self.sessao = sessao or requests.Session()
+
+    def _get(self, lat, lon, inicio, fim, **params):
+        r = self.sessao.get(self.url, params={"latitude": lat, "longitude": lon, "start_date": inicio.isoformat(),
+                                              "end_date": fim.isoformat(), "timezone": FUSO_FONTE, **params},
+                            timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def diario(self, lat, lon, inicio, fim):
+        d = self._get(lat, lon, inicio, fim,
+                      daily="precipitation_sum,et0_fao_evapotranspiration,temperature_2m_min,temperature_2m_max")['daily']
+        return {'dia': d['time'], 'chuva': d['precipitation_sum'], 'et0': d['et0_fao_evapotranspiration'],
+                't_min': d['temperature_2m_min'], 't_max': d['temperature_2m_max']}
+
+    def horario(self, lat, lon, inicio, fim):
+        h = self._get(lat, lon, inicio, fim, hourly="temperature_2m,precipitation")['hourly']
+        return {'hora': h['time'], 'temp': h['temperature_2m'], 'chuva': h['precipitation']}
+
+
+class FonteCSV:
+    """
+    Exportação diária de estação própria: colunas data,chuva,et0,t_min,t_max (AAAA-MM-DD ou dd/mm/AAAA).
+    `{local}` no caminho vira o id do local (ex.: estacao_{local}.csv). Sem série horária.
+    """
+    nome = "csv"
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    def diario(self, lat, lon, inicio, fim):
+        serie = {'dia': [], **{v: [] for v in VARIAVEIS}}
+        with open(self.caminho.format(local=id_local(lat, lon)), 'r', encoding='utf-8', newline='') as f:
+            for linha in csv.DictReader(f):
+                bruto = linha.get('data', '').strip()
+                try: dia = datetime.strptime(bruto, '%d/%m/%Y').date() if '/' in bruto else date.fromisoformat(bruto)
+                except ValueError: continue
+                if inicio <= dia <= fim:
+                    serie['dia'].append(dia.isoformat())
+                    for v in VARIAVEIS:
+                        serie[v].append(_float(linha.get(v)))
+        return serie
+
+    def horario(self, lat, lon, inicio, fim):
+        return None
+
+
+def fonte_configurada(valor=None):
+    """CLIMATOLOGIA_FONTE: 'open-meteo' (padrão) ou 'csv:<caminho>'."""
+    valor = valor or os.getenv("CLIMATOLOGIA_FONTE", FonteOpenMeteo.nome)
+    if valor.startswith("csv:"):
+        return FonteCSV(valor[4:])
+    if valor == FonteOpenMeteo.nome:
+        return FonteOpenMeteo()
+    raise ValueError(f"Fonte de climatologia desconhecida: {valor}")
+
+
+def _float(valor):
+    try: return float(valor)
+    except (TypeError, ValueError): return np.nan
+
+
+def _vetor(valores):
+    # JSON traz null nos buracos da série
+    return np.array([np.nan if v is None else v for v in valores], dtype=np.float32)
+
+
+# --- 2. CACHE LOCAL (float32 POR ANO) ---
+def _dias_no_ano(ano):
+    return (date(ano + 1, 1, 1) - date(ano, 1, 1)).days
+
+
+class CacheClimatologia:
+    """
+    Uso:
+        clima = CacheClimatologia()
+        d = clima.diario(lat, lon, date(2020, 1, 1), date.today())   # busca só o que falta
+        d['dia'], d['chuva'], d['et0'], d['t_min'], d['t_max']        # datetime64[D] + float32
+        h = clima.horario(lat, lon, inicio, fim)                     # h['hora'], h['temp'], h['chuva']
+    """
+
+    def __init__(self, pasta=PASTA_CLIMATOLOGIA, fonte=None, grade=GRADE):
+        self.pasta = pasta
+        self._fonte = fonte
+        self.grade = grade
+        self._lock = threading.Lock()
+        self.buscas = 0
+
+    @property
+    def fonte(self):
+        # Criada na primeira busca: ler o cache não precisa de rede nem de configuração
+        if self._fonte is None:
+            self._fonte = fonte_configurada()
+        return self._fonte
+
+    def _pasta_local(self, lat, lon):
+        return os.path.join(self.pasta, id_local(*self.grade.centro(lat, lon)))
+
+    def _arquivo(self, pasta, ano, horario=False):
+        return os.path.join(pasta, f"{ano}_h.npy" if horario else f"{ano}.npy")
+
+    def _ler_ano(self, pasta, ano, horario=False):
+        caminho = self._arquivo(pasta, ano, horario)
+        if os.path.exists(caminho):
+            return np.load(caminho)
+        linhas = _dias_no_ano(ano) * (24 if horario else 1)
+        return np.full((linhas, len(VARIAVEIS_HORA if horario else VARIAVEIS)), np.nan, dtype=np.float32)
+
+    def _gravar(self, caminho, escrever):
+        tmp = caminho + ".tmp"
+        with open(tmp, 'wb') as f:
+            escrever(f)
+        os.replace(tmp, caminho)   # leitores de outro processo nunca veem o arquivo pela metade
+
+    def _meta(self, pasta):
+        try:
+            with open(os.path.join(pasta, 'meta.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def completar(self, lat, lon, inicio, fim, hoje=None):
+        """
+        Traz da fonte os dias de [inicio, fim] ainda sem dado (até dois pedidos por ano) e grava.
+        Dias mais novos que ATRASO_ARQUIVO ficam para a próxima vez; dias que a fonte devolveu vazios
+        não contam como consultados e são pedidos de novo. Retorna quantos dias foram consultados.
+        """
+        lat, lon = self.grade.centro(lat, lon)
+        limite = (hoje or date.today()) - timedelta(days=ATRASO_ARQUIVO)
+        fim = min(fim, limite)
+        if inicio > fim:
+            return 0
+        pasta = self._pasta_local(lat, lon)
+        total = 0
+        with self._lock:
+            os.makedirs(pasta, exist_ok=True)
+            meta = self._meta(pasta)
+            for ano in range(inicio.year, fim.year + 1):
+                jan1 = date(ano, 1, 1)
+                d0, d1 = max(inicio, jan1), min(fim, date(ano, 12, 31))
+                # Falta = dia sem nenhum valor no cache: nunca consultado ou devolvido vazio pela fonte
+                falta = np.flatnonzero(np.isnan(self._ler_ano(pasta, ano)[(d0 - jan1).days:(d1 - jan1).days + 1]).all(axis=1))
+                if not len(falta):
+                    continue
+                falta += (d0 - jan1).days
+                # Trechos contíguos do que falta; buracos espalhados viram um pedido só do primeiro ao último
+                quebras = np.flatnonzero(np.diff(falta) > 1)
+                trechos = list(zip(np.r_[falta[0], falta[quebras + 1]], np.r_[falta[quebras], falta[-1]]))
+                if len(trechos) > 2:
+                    trechos = [(falta[0], falta[-1])]
+                for a, b in trechos:
+                    self._baixar_ano(pasta, ano, lat, lon, jan1 + timedelta(days=int(a)), jan1 + timedelta(days=int(b)))
+                    total += int(b - a) + 1
+                # meta.json: primeiro e último dia do ano com dado no cache
+                dias = np.flatnonzero(~np.isnan(self._ler_ano(pasta, ano)).all(axis=1))
+                if len(dias):
+                    meta[str(ano)] = [(jan1 + timedelta(days=int(dias[0]))).isoformat(), (jan1 + timedelta(days=int(dias[-1]))).isoformat()]
+            if total:
+                self._gravar(os.path.join(pasta, 'meta.json'),
+                             lambda f: f.write(json.dumps({**meta, 'fonte': self.fonte.nome}).encode('utf-8')))
+        return total
+
+    def _baixar_ano(self, pasta, ano, lat, lon, d0, d1):
+        jan1 = np.datetime64(date(ano, 1, 1), 'D')
+        dados = self.fonte.diario(lat, lon, d0, d1)
+        self.buscas += 1
+        arr = self._ler_ano(pasta, ano)
+        idx = (np.array(dados['dia'], dtype='datetime64[D]') - jan1).astype(int)
+        for j, v in enumerate(VARIAVEIS):
+            novo = _vetor(dados[v])
+            arr[idx, j] = np.where(np.isnan(novo), arr[idx, j], novo)   # vazio na fonte não apaga dado já guardado
+        self._gravar(self._arquivo(pasta, ano), lambda f: np.save(f, arr))
+        horas = self.fonte.horario(lat, lon, d0, d1)
+        if horas:
+            arr_h = self._ler_ano(pasta, ano, horario=True)
+            idx = (np.array(horas['hora'], dtype='datetime64[h]') - jan1.astype('datetime64[h]')).astype(int)
+            ok = (idx >= 0) & (idx < len(arr_h))
+            for j, v in enumerate(VARIAVEIS_HORA):
+                novo = _vetor(horas[v])[ok]
+                arr_h[idx[ok], j] = np.where(np.isnan(novo), arr_h[idx[ok], j], novo)
+            self._gravar(self._arquivo(pasta, ano, True), lambda f: np.save(f, arr_h))
+
+    def _serie(self, lat, lon, inicio, fim, horario):
+        pasta = self._pasta_local(lat, lon)
+        passo = 24 if horario else 1
+        partes = []
+        for ano in range(inicio.year, fim.year + 1):
+            i0 = (max(inicio, date(ano, 1, 1)) - date(ano, 1, 1)).days * passo
+            i1 = ((min(fim, date(ano, 12, 31)) - date(ano, 1, 1)).days + 1) * passo
+            partes.append(self._ler_ano(pasta, ano, horario)[i0:i1])
+        unidade = 'h' if horario else 'D'
+        tempo = np.arange(np.datetime64(inicio, unidade), np.datetime64(fim + timedelta(days=1), unidade))
+        valores = np.concatenate(partes)
+        return tempo, {v: valores[:, j] for j, v in enumerate(VARIAVEIS_HORA if horario else VARIAVEIS)}
+
+    def diario(self, lat, lon, inicio, fim, completar=True):
+        if completar:
+            self.completar(lat, lon, inicio, fim)
+        dias, valores = self._serie(lat, lon, inicio, fim, horario=False)
+        return {'dia': dias, **valores}
+
+    def horario(self, lat, lon, inicio, fim, completar=True):
+        if completar:
+            self.completar(lat, lon, inicio, fim)
+        horas, valores = self._serie(lat, lon, inicio, fim, horario=True)
+        return {'hora': horas, **valores}
+
+
+# --- 3. COMPARAÇÃO ENTRE SAFRAS ---
+def gda_diario(t_min, t_max, t_base):
+    return np.maximum(0.0, (t_min + t_max) / 2 - t_base)
+
+
+def _mesmo_dia(d, ano):
+    try: return d.replace(year=ano)
+    except ValueError: return d.replace(year=ano, day=28)   # 29/02 em ano comum
+
+
+def _acumular(v):
+    # Buracos contam zero dentro da série; depois do último dia com dado a curva para (safra em curso)
+    c = np.nancumsum(v)
+    validos = np.flatnonzero(~np.isnan(v))
+    c[validos[-1] + 1 if len(validos) else 0:] = np.nan
+    return c
+
+
+def comparar_safras(clima, lat, lon, inicio, dias, n_safras=SAFRAS_PADRAO, kc=1.0, t_base=10.0):
+    """
+    Acumulados de chuva, ETc (ET0 x Kc) e GDA por dia de safra: a safra que começou em `inicio`
+    contra as `n_safras` anteriores (mesma data de início em cada ano), com média e faixa p10-p90.
+    """
+    safras = {}
+    for k in range(n_safras + 1):
+        ini = _mesmo_dia(inicio, inicio.year - k)
+        d = clima.diario(lat, lon, ini, ini + timedelta(days=dias - 1))
+        safras[ini.year] = {'inicio': ini, 'cobertura': float(np.mean(~np.isnan(d['chuva']))),
+                            'chuva': _acumular(d['chuva']), 'etc': _acumular(d['et0'] * kc),
+                            'gda': _acumular(gda_diario(d['t_min'], d['t_max'], t_base))}
+    atual = safras.pop(inicio.year)
+    passadas = {ano: s for ano, s in safras.items() if s['cobertura'] > 0}
+    res = {'dia_safra': np.arange(dias), 'atual': atual, 'passadas': passadas, 'media': None, 'p10': None, 'p90': None}
+    if passadas:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)   # dias sem nenhuma safra com dado -> NaN
+            for nome, func in (('media', np.nanmean), ('p10', lambda a, axis: np.nanpercentile(a, 10, axis=axis)),
+                               ('p90', lambda a, axis: np.nanpercentile(a, 90, axis=axis))):
+                res[nome] = {v: func(np.stack([s[v] for s in passadas.values()]), axis=0) for v in ('chuva', 'etc', 'gda')}
+    return res
+
+
+# --- 4. REDUÇÃO DE PONTOS PARA OS GRÁFICOS ---
+def reduzir_pontos(x, y, n=PONTOS_MAX):
+    """Largest-Triangle-Three-Buckets: até `n` pontos de uma linha preservando picos e vales."""
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    ok = ~np.isnan(y)
+    x, y = x[ok], y[ok]
+    if len(y) <= n or n < 3:
+        return x, y
+    xf = x.astype('datetime64[s]').astype(float) if np.issubdtype(x.dtype, np.datetime64) else x.astype(float)
+    limites = np.linspace(1, len(y) - 1, n - 1).astype(int)   # n-2 baldes entre o primeiro e o último ponto
+    idx = np.empty(n, dtype=int)
+    idx[0], idx[-1] = 0, len(y) - 1
+    a = 0
+    for i in range(n - 2):
+        ini, fim = limites[i], limites[i + 1]
+        prox = slice(fim, limites[i + 2]) if i + 2 < len(limites) else slice(len(y) - 1, len(y))
+        mx, my = xf[prox].mean(), y[prox].mean()
+        area = np.abs((xf[a] - mx) * (y[ini:fim] - y[a]) - (xf[a] - xf[ini:fim]) * (my - y[a]))
+        a = ini + int(np.argmax(area))
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+def agregar_soma(x, y, n=PONTOS_MAX):
+    """Barras (chuva): soma em baldes consecutivos até caber em `n`; o total do período é preservado."""
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    if len(y) <= n:
+        return x, y
+    k = -(-len(y) // n)
+    pad = np.full(-len(y) % k, np.nan)
+    baldes = np.concatenate([y, pad]).reshape(-1, k)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        somas = np.where(np.isnan(baldes).all(axis=1), np.nan, np.nansum(baldes, axis=1))
+    return x[::k], somas
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Climatologia multissafra (cache local por ano)")
+    ap.add_argument("--lat", type=float, default=-13.414)
+    ap.add_argument("--lon", type=float, default=-41.285)
+    ap.add_argument("--pasta", default=PASTA_CLIMATOLOGIA)
+    ap.add_argument("--fonte", help="open-meteo | csv:<caminho> (padrão: CLIMATOLOGIA_FONTE)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    comp = sub.add_parser("completar", help="Traz os anos que faltam para o cache")
+    comp.add_argument("--anos", type=int, default=SAFRAS_PADRAO + 1)
+    saf = sub.add_parser("safras", help="Acumulados da safra atual x média das anteriores")
+    saf.add_argument("--inicio", required=True, help="Início da safra (AAAA-MM-DD)")
+    saf.add_argument("--dias", type=int, default=120)
+    saf.add_argument("--safras", type=int, default=SAFRAS_PADRAO)
+    saf.add_argument("--kc", type=float, default=1.0)
+    saf.add_argument("--t-base", type=float, default=10.0)
+    args = ap.parse_args()
+
+    clima = CacheClimatologia(args.pasta, fonte_configurada(args.fonte) if args.fonte else None)
+    if args.cmd == "completar":
+        hoje = date.today()
+        n = clima.completar(args.lat, args.lon, date(hoje.year - args.anos + 1, 1, 1), hoje)
+        print(f"📦 {n} dias consultados em {clima.buscas} pedidos à fonte.")
+    else:
+        r = comparar_safras(clima, args.lat, args.lon, date.fromisoformat(args.inicio), args.dias, args.safras, args.kc, args.t_base)
+        validos = np.flatnonzero(~np.isnan(r['atual']['chuva']))
+        if not len(validos):
+            print("Safra atual ainda sem dados na fonte.")
+        else:
+            i = validos[-1]
+            print(f"Dia {i + 1} da safra ({len(r['passadas'])} safras anteriores):")
+            for v, rotulo in (('chuva', 'Chuva (mm)'), ('etc', 'ETc (mm)'), ('gda', 'GDA')):
+                media = r['media'][v][i] if r['media'] else float('nan')
+                print(f"  {rotulo:<11} atual {r['atual'][v][i]:8.1f} | média {media:8.1f}")
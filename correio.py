@@ -0,0 +1,145 @@
+import os
+import random
+import smtplib
+import time
+
+from metricas import coletor
+
+# ==============================================================================
+# DESPACHO DE E-MAILS EM LOTE
+# Uma conexão autenticada reaproveitada para vários laudos, com reconexão,
+# novas tentativas com backoff e limite de envio por minuto do provedor.
+# ==============================================================================
+SMTP_HOST = 'smtp.gmail.com'
+SMTP_PORTA = 465
+TENTATIVAS = 3
+BACKOFF_BASE = 2.0          # segundos; dobra a cada tentativa (com jitter)
+MAX_POR_MINUTO = 60         # Gmail: ~100/conexão e limites diários por conta
+MSGS_POR_CONEXAO = 90       # Renova a sessão antes do provedor derrubá-la
+
+
+def _transitorio(exc):
+    # 4xx = falha temporária; desconexões e erros de socket também merecem nova tentativa.
+    # SMTPException herda de OSError: sem código 4xx, os demais erros SMTP são permanentes
+    if isinstance(exc, (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)):
+        return False
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+class DespachanteEmail:
+    """
+    Uso:
+        with DespachanteEmail(usuario, senha) as d:
+            for msg in mensagens: d.enviar(msg)
+    `ssl=False` conecta em SMTP simples (ex.: servidor local de depuração em localhost:1025).
+    """
+
+    def __init__(self, usuario=None, senha=None, host=SMTP_HOST, porta=SMTP_PORTA, ssl=True,
+                 tentativas=TENTATIVAS, backoff=BACKOFF_BASE, max_por_minuto=MAX_POR_MINUTO,
+                 msgs_por_conexao=MSGS_POR_CONEXAO, timeout=30, fabrica=None):
+        self.usuario, self.senha = usuario, senha
+        self.host, self.porta, self.timeout = host, porta, timeout
+        self.fabrica = fabrica or (smtplib.SMTP_SSL if ssl else smtplib.SMTP)
+        self.tentativas, self.backoff = tentativas, backoff
+        self.intervalo = 60.0 / max_por_minuto if max_por_minuto else 0.0
+        self.msgs_por_conexao = msgs_por_conexao
+        self._smtp = None
+        self._na_conexao = 0
+        self._ultimo_envio = 0.0
+        self.enviados = 0
+        self.reconexoes = 0
+
+    def conectar(self):
+        self.fechar()
+        self._smtp = self.fabrica(self.host, self.porta, timeout=self.timeout)
+        if self.usuario:
+            self._smtp.login(self.usuario, self.senha)
+        self._na_conexao = 0
+
+    def fechar(self):
+        if self._smtp is not None:
+            try: self._smtp.quit()
+            except Exception: pass
+            self._smtp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _aguardar_vez(self):
+        espera = self._ultimo_envio + self.intervalo - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+
+    def enviar(self, msg):
+        """Envia uma mensagem; reconecta e tenta de novo em falhas transitórias."""
+        with coletor().fase("smtp"):
+            self._enviar(msg)
+
+    def _enviar(self, msg):
+        for tentativa in range(1, self.tentativas + 1):
+            coletor().contar("smtp_tentativas")
+            try:
+                if self._smtp is None or self._na_conexao >= self.msgs_por_conexao:
+                    if self._smtp is not None:
+                        self.reconexoes += 1
+                    self.conectar()
+                self._aguardar_vez()
+                self._smtp.send_message(msg)
+                self._ultimo_envio = time.monotonic()
+                self._na_conexao += 1
+                self.enviados += 1
+                return
+            except Exception as e:
+                # Destinatário recusado: o smtplib já fez RSET e a sessão segue boa para a próxima mensagem
+                if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                    self.fechar()
+                if tentativa == self.tentativas or not _transitorio(e):
+                    raise
+                self.reconexoes += 1
+                time.sleep(self.backoff * 2 ** (tentativa - 1) * random.uniform(0.5, 1.0))
+
+    def enviar_lote(self, mensagens):
+        """Envia todas as mensagens na mesma sessão. Retorna [(msg, erro ou None)] sem abortar o lote."""
+        resultado = []
+        for msg in mensagens:
+            try:
+                self.enviar(msg)
+                resultado.append((msg, None))
+            except Exception as e:
+                resultado.append((msg, e))
+        return resultado
+
+
+class SinkArquivo:
+    """Modo de simulação: grava cada mensagem como .eml numa pasta, com a mesma interface do despachante."""
+
+    def __init__(self, pasta='laudos_enviados'):
+        self.pasta = pasta
+        self.enviados = 0
+        os.makedirs(pasta, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def enviar(self, msg):
+        self.enviados += 1
+        nome = f"{time.strftime('%Y%m%d_%H%M%S')}_{self.enviados:04d}.eml"
+        with open(os.path.join(self.pasta, nome), 'wb') as f:
+            f.write(bytes(msg))
+
+    def enviar_lote(self, mensagens):
+        resultado = []
+        for msg in mensagens:
+            self.enviar(msg)
+            resultado.append((msg, None))
+        return resultado
@@ -0,0 +1,104 @@
+import json
+import os
+import sqlite3
+import time
+
+from cache_api import TTL_ENDPOINT
+from grade_espacial import GRADE
+
+# ==============================================================================
+# DEPÓSITO COMPARTILHADO DE RESPOSTAS DO OPENWEATHER (SQLITE)
+# Escrito pelo aquecedor (aquecedor.py) e lido pelo dashboard e pelo job de
+# laudos. Uma linha por (endpoint, coordenada arredondada): a última resposta
+# boa e quando foi obtida. As coordenadas são ajustadas ao centro da célula da
+# grade espacial: qualquer ponto da célula acha a mesma resposta. WAL permite
+# leitores concorrentes com um escritor.
+# ==============================================================================
+ARQUIVO_DEPOSITO = 'deposito_clima.db'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS respostas (
+    endpoint TEXT NOT NULL,
+    lat REAL NOT NULL,             -- centro da célula da grade
+    lon REAL NOT NULL,
+    payload TEXT NOT NULL,
+    obtido_em REAL NOT NULL,       -- epoch (s)
+    PRIMARY KEY (endpoint, lat, lon)
+);
+"""
+
+
+class DepositoClima:
+    def __init__(self, caminho=ARQUIVO_DEPOSITO, ttls=None, grade=GRADE):
+        self.caminho = caminho
+        self.grade = grade
+        self.ttls = dict(TTL_ENDPOINT if ttls is None else ttls)
+        with self._conectar() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(ESQUEMA)
+
+    def _conectar(self):
+        # Conexão curta por operação: o depósito é usado por threads e processos diferentes
+        con = sqlite3.connect(self.caminho, timeout=10)
+        con.execute("PRAGMA busy_timeout=10000")
+        return con
+
+    def gravar(self, endpoint, lat, lon, payload, obtido_em=None):
+        lat, lon = self.grade.centro(lat, lon)
+        con = self._conectar()
+        try:
+            with con:
+                con.execute("INSERT OR REPLACE INTO respostas VALUES (?,?,?,?,?)",
+                            (endpoint, lat, lon, json.dumps(payload), obtido_em or time.time()))
+        finally:
+            con.close()
+
+    def ler(self, endpoint, lat, lon, idade_max=None):
+        """Retorna (payload, idade_s) ou None. `idade_max` None = qualquer idade."""
+        lat, lon = self.grade.centro(lat, lon)
+        con = self._conectar()
+        try:
+            linha = con.execute("SELECT payload, obtido_em FROM respostas WHERE endpoint = ? AND lat = ? AND lon = ?",
+                                (endpoint, lat, lon)).fetchone()
+        finally:
+            con.close()
+        if linha is None:
+            return None
+        idade = time.time() - linha[1]
+        if idade_max is not None and idade > idade_max:
+            return None
+        return json.loads(linha[0]), idade
+
+    def obter(self, endpoint, lat, lon, baixar, idade_max=None, com_idade=False):
+        """
+        Resposta fresca do depósito (idade <= TTL do endpoint); senão chama baixar() e grava.
+        Se a rede falhar e houver resposta antiga, ela é usada no lugar do erro.
+        `com_idade=True` devolve (payload, idade_s); idade 0.0 = acabou de ser baixada.
+        """
+        idade_max = self.ttls.get(endpoint) if idade_max is None else idade_max
+        achado = self.ler(endpoint, lat, lon)
+        if achado is None or (idade_max is not None and achado[1] > idade_max):
+            try:
+                achado = (baixar(), 0.0)
+                self.gravar(endpoint, lat, lon, achado[0])
+            except Exception:
+                if achado is None:
+                    raise
+        return achado if com_idade else achado[0]
+
+    def carregador(self, endpoint, carregar):
+        """Envolve `carregar(estacao)` (ex.: radar) para passar pelo depósito."""
+        return lambda e: self.obter(endpoint, e['lat'], e['lon'], lambda: carregar(e))
+
+    def resumo(self):
+        con = self._conectar()
+        try:
+            return con.execute("SELECT endpoint, COUNT(*), MIN(obtido_em), MAX(obtido_em) FROM respostas GROUP BY endpoint").fetchall()
+        finally:
+            con.close()
+
+
+def deposito_padrao(caminho=ARQUIVO_DEPOSITO, criar=False, grade=GRADE):
+    # O depósito só existe onde o aquecedor roda; sem ele o chamador vai direto à rede.
+    # `grade`: a mesma do chamador, para que busca e depósito compartilhem exatamente as mesmas células
+    return DepositoClima(caminho, grade=grade) if criar or os.path.exists(caminho) else None
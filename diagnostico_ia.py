@@ -0,0 +1,222 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from cache_api import CacheTTL
+
+# ==============================================================================
+# DIAGNÓSTICO POR IMAGEM (GEMINI)
+# A foto é reduzida e recomprimida antes do envio; o resultado fica em cache
+# por hash perceptual da imagem + cultura + fase, então rerodadas do app e
+# fotos repetidas não voltam à API. O envio é assíncrono (Future) e há modo
+# lote para uma pasta de fotos de campo. Testável com ClienteFalso.
+# ==============================================================================
+MODELO = 'gemini-1.5-flash'
+LADO_MAX = 1024             # px no maior lado: suficiente para lesões foliares
+QUALIDADE_JPEG = 85
+MAX_WORKERS = 2
+MAX_RESULTADOS = 256
+DISTANCIA_MAX = 4           # bits (de 64) de diferença no dHash para considerar a mesma foto
+EXTENSOES = ('.jpg', '.jpeg', '.png', '.webp')
+PROMPT = "Agrônomo Sênior. Cultura {cultura}. Fase {fase}. Identifique praga/doença com base visual e sugira controle."
+
+
+# --- 1. IMAGEM ---
+def abrir_imagem(origem):
+    """Aceita bytes, caminho ou arquivo (ex.: UploadedFile do Streamlit)."""
+    from PIL import Image  # Pillow só carrega quando chega uma foto (o dashboard abre sem ele)
+    if isinstance(origem, (bytes, bytearray)):
+        origem = io.BytesIO(origem)
+    return Image.open(origem)
+
+
+def preparar_imagem(img, lado_max=LADO_MAX, qualidade=QUALIDADE_JPEG):
+    """Corrige a orientação EXIF, reduz ao `lado_max` e recomprime em JPEG. Retorna bytes."""
+    from PIL import Image, ImageOps
+    if img.format == 'JPEG':
+        img.draft('RGB', (lado_max, lado_max))  # decodifica já reduzida (DCT), bem mais rápido que a foto cheia
+    img = ImageOps.exif_transpose(img).convert('RGB')
+    img.thumbnail((lado_max, lado_max), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, 'JPEG', quality=qualidade, optimize=True)
+    return buf.getvalue()
+
+
+def hash_perceptual(img, lado=8):
+    """dHash de 64 bits: a mesma foto recomprimida/redimensionada difere em poucos bits."""
+    from PIL import Image, ImageOps
+    if img.format == 'JPEG':
+        img.draft('L', (lado * 16, lado * 16))
+    cinza = ImageOps.exif_transpose(img).convert('L').resize((lado + 1, lado), Image.LANCZOS)
+    px = cinza.tobytes()
+    bits = 0
+    for y in range(lado):
+        for x in range(lado):
+            bits = bits << 1 | (px[y * (lado + 1) + x] > px[y * (lado + 1) + x + 1])
+    return f"{bits:0{lado * lado // 4}x}"
+
+
+# --- 2. CLIENTES DO MODELO ---
+class ClienteGemini:
+    def __init__(self, api_key, modelo=MODELO):
+        import google.generativeai as genai  # só carrega o SDK quando há diagnóstico de verdade
+        genai.configure(api_key=api_key)
+        self._modelo = genai.GenerativeModel(modelo)
+
+    def gerar(self, prompt, jpeg):
+        return self._modelo.generate_content([prompt, {"mime_type": "image/jpeg", "data": jpeg}]).text
+
+
+class ClienteFalso:
+    """Modelo local para testes e benchmarks: registra as chamadas e responde após `atraso` segundos."""
+
+    def __init__(self, resposta="Diagnóstico simulado: sem sintomas visíveis.", atraso=0.0, falhar=False):
+        self.resposta, self.atraso, self.falhar = resposta, atraso, falhar
+        self.chamadas = []
+
+    def gerar(self, prompt, jpeg):
+        self.chamadas.append((prompt, len(jpeg)))
+        time.sleep(self.atraso)
+        if self.falhar:
+            raise RuntimeError("falha simulada do modelo")
+        return self.resposta
+
+
+# --- 3. PIPELINE ---
+class PipelineDiagnostico:
+    """
+    Uso:
+        pipe = PipelineDiagnostico(ClienteGemini(key))
+        fut = pipe.submeter(foto_bytes, cultura, fase)   # retorna na hora
+        if fut.done(): texto = fut.result()
+    Pedidos repetidos (mesma foto + cultura + fase) recebem o resultado em cache
+    ou o Future da busca em andamento; falhas não entram no cache.
+    """
+
+    def __init__(self, cliente, max_workers=MAX_WORKERS, max_resultados=MAX_RESULTADOS,
+                 lado_max=LADO_MAX, qualidade=QUALIDADE_JPEG, prompt=PROMPT, distancia_max=DISTANCIA_MAX):
+        self.cliente = cliente
+        self.lado_max, self.qualidade, self.prompt = lado_max, qualidade, prompt
+        self.distancia_max = distancia_max
+        self._vistos = {}              # (cultura, fase) -> hashes perceptuais já usados como chave
+        self.resultados = CacheTTL(max_resultados, ttls={"diagnostico": None})
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="diagnostico")
+        self._em_voo = {}
+        self._hashes = OrderedDict()   # hash do arquivo bruto -> hash perceptual (evita decodificar a cada rerun)
+        self._lock = threading.Lock()
+        self.enviados = 0
+
+    def _hash(self, bruto, img):
+        chave = hashlib.blake2b(bruto, digest_size=16).digest()
+        with self._lock:
+            ph = self._hashes.get(chave)
+        if ph is None:
+            ph = hash_perceptual(img())
+            with self._lock:
+                self._hashes[chave] = ph
+                while len(self._hashes) > 1024:
+                    self._hashes.popitem(last=False)
+        return ph
+
+    def _canonico(self, ph, cultura, fase):
+        # Hash já visto a até `distancia_max` bits vira a chave: a mesma foto reenviada em outra resolução reaproveita o resultado
+        v = int(ph, 16)
+        with self._lock:
+            vistos = self._vistos.setdefault((cultura, fase), OrderedDict())
+            for h in vistos:
+                if bin(v ^ h).count('1') <= self.distancia_max:
+                    vistos.move_to_end(h)
+                    return f"{h:016x}"
+            vistos[v] = None
+            while len(vistos) > self.resultados.max_itens:
+                vistos.popitem(last=False)
+        return ph
+
+    def chave(self, origem, cultura, fase):
+        bruto = origem if isinstance(origem, (bytes, bytearray)) else _ler_bytes(origem)
+        ph = self._canonico(self._hash(bruto, lambda: abrir_imagem(bruto)), cultura, fase)
+        return CacheTTL.chave("diagnostico", ph, cultura, fase)
+
+    def submeter(self, origem, cultura, fase):
+        """Devolve um Future com o texto do diagnóstico (já resolvido se estiver em cache)."""
+        bruto = origem if isinstance(origem, (bytes, bytearray)) else _ler_bytes(origem)
+        chave = self.chave(bruto, cultura, fase)
+        with self._lock:
+            fut = self._em_voo.get(chave)
+            if fut is None:
+                # Conferido sob o lock: o worker grava o resultado antes de sair de _em_voo
+                pronto = self.resultados.get(chave)
+                if pronto is not None:
+                    fut = Future()
+                    fut.set_result(pronto)
+                    return fut
+                fut = self._em_voo[chave] = self._pool.submit(self._diagnosticar, chave, bruto, cultura, fase)
+                self.enviados += 1
+        return fut
+
+    def _diagnosticar(self, chave, bruto, cultura, fase):
+        try:
+            jpeg = preparar_imagem(abrir_imagem(bruto), self.lado_max, self.qualidade)
+            texto = self.cliente.gerar(self.prompt.format(cultura=cultura, fase=fase), jpeg)
+            self.resultados.put(chave, texto)
+            return texto
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+
+    def diagnosticar_pasta(self, pasta, cultura, fase, timeout=None):
+        """Modo lote: submete todas as fotos da pasta e devolve [{arquivo, status, diagnostico|erro, segundos}]."""
+        arquivos = sorted(os.path.join(pasta, a) for a in os.listdir(pasta) if a.lower().endswith(EXTENSOES))
+        t0 = time.perf_counter()
+        futuros = {}   # fotos repetidas compartilham o mesmo Future
+        for a in arquivos:
+            futuros.setdefault(self.submeter(_ler_bytes(a), cultura, fase), []).append(os.path.basename(a))
+        resultados = {}
+        for fut in as_completed(futuros, timeout=timeout):
+            try:
+                item = {'status': 'ok', 'diagnostico': fut.result()}
+            except Exception as e:
+                item = {'status': 'erro', 'erro': str(e)}
+            item['segundos'] = round(time.perf_counter() - t0, 3)
+            for arq in futuros[fut]:
+                resultados[arq] = {'arquivo': arq, **item}
+        return [resultados[os.path.basename(a)] for a in arquivos]
+
+    def encerrar(self):
+        self._pool.shutdown(wait=True)
+
+
+def _ler_bytes(origem):
+    if hasattr(origem, 'getvalue'):
+        return origem.getvalue()
+    if hasattr(origem, 'read'):
+        return origem.read()
+    with open(origem, 'rb') as f:
+        return f.read()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Diagnóstico em lote de uma pasta de fotos de campo")
+    ap.add_argument("pasta")
+    ap.add_argument("--cultura", required=True)
+    ap.add_argument("--fase", required=True)
+    ap.add_argument("--saida", help="Grava os diagnósticos em JSON")
+    ap.add_argument("--workers", type=int, default=MAX_WORKERS)
+    ap.add_argument("--falso", action="store_true", help="Usa o modelo local falso (sem API)")
+    args = ap.parse_args()
+
+    cliente = ClienteFalso(atraso=0.2) if args.falso else ClienteGemini(os.getenv("GEMINI_KEY"))
+    pipe = PipelineDiagnostico(cliente, max_workers=args.workers)
+    itens = pipe.diagnosticar_pasta(args.pasta, args.cultura, args.fase)
+    pipe.encerrar()
+    for it in itens:
+        print(f"{'✅' if it['status'] == 'ok' else '❌'} {it['arquivo']} ({it['segundos']}s): {it.get('diagnostico', it.get('erro'))[:120]}")
+    print(f"{len(itens)} fotos | {pipe.enviados} envios ao modelo (fotos repetidas reaproveitadas)")
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f: json.dump(itens, f, ensure_ascii=False, indent=2)
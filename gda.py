@@ -0,0 +1,166 @@
+import math
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from agregacao import FUSO_BRASIL
+from historico import ARQUIVO_HISTORICO, HistoricoAgro
+
+# ==============================================================================
+# ACUMULADOR DE GRAUS-DIA (GDA)
+# GDA diário por fazenda/plantio/t_base gravado no histórico; cada execução
+# só acrescenta os dias completos ainda não registrados. O acumulado de
+# qualquer data sai em O(1) da soma de prefixos mantida em memória.
+# Dias sem rodada recebem uma estimativa: a reanálise (climatologia) ou uma
+# base fixa, nunca a previsão. Dias pela base fixa ficam 'estimado' e são
+# refeitos nas execuções seguintes até chegar dado real para eles.
+# ==============================================================================
+ESQUEMA_GDA = """
+CREATE TABLE IF NOT EXISTS gda_diario (
+    fazenda TEXT NOT NULL,
+    plantio TEXT NOT NULL,
+    t_base REAL NOT NULL,
+    dia TEXT NOT NULL,
+    gda REAL NOT NULL,
+    fonte TEXT NOT NULL,            -- 'observado' (histórico de rodadas) | 'climatologia' | 'estimado' (base fixa)
+    PRIMARY KEY (fazenda, plantio, t_base, dia)
+);
+"""
+JANELA_TAXA = 14   # dias recentes usados para projetar o ritmo de acúmulo
+GDA_DIA_PADRAO = 14.8   # base fixa (GDA/dia) para dias sem rodada nem reanálise
+
+
+def estimativa_climatologica(clima, lat, lon, t_base):
+    """
+    Estimador para AcumuladorGDA.atualizar: GDA de cada dia pela reanálise do local
+    (climatologia.CacheClimatologia) -> {dia ISO: gda}. Dias ainda sem reanálise ficam de fora.
+    """
+    def estimar(inicio, fim):
+        d = clima.diario(lat, lon, inicio, fim)
+        g = np.maximum(0.0, (d['t_min'].astype(float) + d['t_max'].astype(float)) / 2 - t_base)
+        return {str(dia): float(v) for dia, v in zip(d['dia'], g) if not np.isnan(v)}
+    return estimar
+
+
+def _corte_utc(fuso=FUSO_BRASIL):
+    # Meia-noite local expressa em UTC, como sufixo de data ISO (ex.: 'T03:00')
+    h = int(-fuso.utcoffset(None).total_seconds() // 3600) % 24
+    return f"T{h:02d}:00"
+
+
+class AcumuladorGDA:
+    def __init__(self, fazenda, data_plantio, t_base, caminho=ARQUIVO_HISTORICO):
+        self.fazenda = fazenda
+        self.plantio = data_plantio.date() if isinstance(data_plantio, datetime) else data_plantio
+        self.t_base = float(t_base)
+        self.caminho = caminho
+        self.gda = np.zeros(0)          # gda[i] = GDA do dia plantio + i
+        self.prefixo = np.zeros(1)      # prefixo[i] = soma dos i primeiros dias
+        self.fontes = []                # fonte de cada dia de self.gda
+        self._carregado = False
+        self._lock = threading.Lock()
+
+    @property
+    def observados(self):
+        return self.fontes.count('observado')
+
+    def _anexar(self, valores, fontes=None):
+        valores = np.asarray(valores, dtype=float)
+        self.gda = np.concatenate([self.gda, valores])
+        self.prefixo = np.concatenate([self.prefixo, self.prefixo[-1] + np.cumsum(valores)])
+        self.fontes.extend(fontes or ['estimado'] * len(valores))
+
+    def _truncar(self, n):
+        self.gda, self.prefixo, self.fontes = self.gda[:n], self.prefixo[:n + 1], self.fontes[:n]
+
+    def _carregar(self, con):
+        cur = con.execute("SELECT gda, fonte FROM gda_diario WHERE fazenda = ? AND plantio = ? AND t_base = ? ORDER BY dia",
+                          (self.fazenda, self.plantio.isoformat(), self.t_base))
+        linhas = cur.fetchall()
+        self._anexar([g for g, _ in linhas], [f for _, f in linhas])
+        self._carregado = True
+
+    def atualizar(self, ate=None, estimativa=GDA_DIA_PADRAO, clima=None):
+        """
+        Acrescenta os dias completos de `ultimo registrado + 1` até `ate` (exclusivo; padrão: hoje local)
+        e refaz os dias ainda 'estimado'. Dias sem rodada no histórico recebem o GDA de `clima(inicio, fim)`
+        (ex.: estimativa_climatologica) e, sem ele, a base fixa `estimativa` (GDA/dia). Retorna quantos
+        dias novos entraram.
+        """
+        ate = ate or datetime.now(FUSO_BRASIL).date()
+        with self._lock, HistoricoAgro(self.caminho) as hist:
+            hist.con.executescript(ESQUEMA_GDA)
+            if not self._carregado:
+                self._carregar(hist.con)
+            n_antes = len(self.gda)
+            # Recomeça no primeiro dia pela base fixa: dado real que chegou depois substitui a estimativa
+            i0 = self.fontes.index('estimado') if 'estimado' in self.fontes else n_antes
+            inicio = self.plantio + timedelta(days=i0)
+            if inicio >= ate:
+                return 0
+            obs = hist.observado_diario(self.fazenda, inicio.isoformat(), (ate - timedelta(days=1)).isoformat(), _corte_utc())
+            reanalise = {}
+            if clima is not None and any(not (d in obs and None not in obs[d]) for d in
+                                         ((inicio + timedelta(days=i)).isoformat() for i in range((ate - inicio).days))):
+                try:
+                    reanalise = clima(inicio, ate - timedelta(days=1))
+                except Exception:
+                    reanalise = {}      # reanálise fora do ar: base fixa
+            linhas, valores, fontes = [], [], []
+            for i in range((ate - inicio).days):
+                dia = (inicio + timedelta(days=i)).isoformat()
+                if i0 + i < n_antes and self.fontes[i0 + i] != 'estimado':
+                    g, fonte = float(self.gda[i0 + i]), self.fontes[i0 + i]
+                elif dia in obs and None not in obs[dia]:
+                    g, fonte = max(0.0, (obs[dia][0] + obs[dia][1]) / 2 - self.t_base), 'observado'
+                elif dia in reanalise:
+                    g, fonte = reanalise[dia], 'climatologia'
+                else:
+                    g, fonte = float(estimativa), 'estimado'
+                valores.append(g)
+                fontes.append(fonte)
+                linhas.append((self.fazenda, self.plantio.isoformat(), self.t_base, dia, g, fonte))
+            with hist.con:
+                # Só linhas 'estimado' são sobrescritas: observado e reanálise gravados não mudam
+                hist.con.executemany("""INSERT INTO gda_diario VALUES (?,?,?,?,?,?)
+                                        ON CONFLICT (fazenda, plantio, t_base, dia)
+                                        DO UPDATE SET gda = excluded.gda, fonte = excluded.fonte
+                                        WHERE gda_diario.fonte = 'estimado'""", linhas)
+            self._truncar(i0)
+            self._anexar(valores, fontes)
+            return len(self.gda) - n_antes
+
+    # --- CONSULTAS O(1) ---
+    def acumulado(self, data=None):
+        """GDA acumulado do plantio até o fim do dia anterior a `data` (padrão: último dia registrado)."""
+        if data is None:
+            return float(self.prefixo[-1])
+        data = data.date() if isinstance(data, datetime) else data
+        i = min(max((data - self.plantio).days, 0), len(self.gda))
+        return float(self.prefixo[i])
+
+    def progresso(self, meta, data=None):
+        return min(1.0, self.acumulado(data) / meta) if meta else 0.0
+
+    def taxa_recente(self, janela=JANELA_TAXA):
+        return float(self.gda[-janela:].mean()) if len(self.gda) else 0.0
+
+    def projetar_data(self, meta, previsao_gda=(), taxa=None):
+        """
+        Data em que o acumulado atinge `meta`: usa os GDA já registrados, depois a previsão diária
+        (a partir do primeiro dia não registrado) e, além dela, a taxa média recente.
+        """
+        acum = float(self.prefixo[-1])
+        if acum >= meta:
+            return self.plantio + timedelta(days=int(np.searchsorted(self.prefixo, meta)) - 1)
+        dia = self.plantio + timedelta(days=len(self.gda))
+        for g in previsao_gda:
+            acum += float(g)
+            if acum >= meta:
+                return dia
+            dia += timedelta(days=1)
+        taxa = taxa if taxa is not None else (self.taxa_recente() or (float(np.mean(previsao_gda)) if len(previsao_gda) else 0.0))
+        if taxa <= 0:
+            return None
+        return dia + timedelta(days=math.ceil((meta - acum) / taxa) - 1)
@@ -0,0 +1,102 @@
+import os
+import threading
+from concurrent.futures import Future
+
+# ==============================================================================
+# GRADE ESPACIAL (GEOHASH)
+# A resolução efetiva do OpenWeather é bem mais grossa que as coordenadas que
+# enviamos. Cada coordenada é ajustada ao centro da sua célula geohash: pedidos
+# na mesma célula compartilham uma única busca e a resposta volta a todos.
+#   precisão 4 ~ 39 x 20 km | 5 ~ 4,9 x 4,9 km | 6 ~ 1,2 x 0,6 km
+# ==============================================================================
+# GRADE_PRECISAO vale para o processo todo (dashboard, aquecedor, cron): 0 desliga a grade
+PRECISAO_GEOHASH = int(os.getenv("GRADE_PRECISAO", "5"))
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+CASAS_CENTRO = 5
+
+
+def celula(lat, lon, precisao=PRECISAO_GEOHASH):
+    """Geohash da coordenada e centro da célula: (hash, lat_c, lon_c)."""
+    lat, lon = float(lat), float(lon)
+    faixa_lat, faixa_lon = [-90.0, 90.0], [-180.0, 180.0]
+    codigo, ch, bit, par = [], 0, 0, True
+    while len(codigo) < precisao:
+        faixa, v = (faixa_lon, lon) if par else (faixa_lat, lat)
+        meio = (faixa[0] + faixa[1]) / 2
+        if v >= meio:
+            ch, faixa[0] = ch * 2 + 1, meio
+        else:
+            ch, faixa[1] = ch * 2, meio
+        par, bit = not par, bit + 1
+        if bit == 5:
+            codigo.append(BASE32[ch])
+            ch = bit = 0
+    return (''.join(codigo), round((faixa_lat[0] + faixa_lat[1]) / 2, CASAS_CENTRO),
+            round((faixa_lon[0] + faixa_lon[1]) / 2, CASAS_CENTRO))
+
+
+class GradeEspacial:
+    """
+    Ajuste de coordenadas à grade + estatística de compartilhamento (thread-safe).
+    `pedidos` = coordenadas pedidas; `buscas` = buscas realmente feitas (uma por célula).
+    `precisao=None` desliga a grade (cada coordenada é a própria célula).
+    """
+
+    def __init__(self, precisao=PRECISAO_GEOHASH):
+        self.precisao = precisao
+        self._lock = threading.Lock()
+        self._em_voo = {}
+        self.pedidos = 0
+        self.buscas = 0
+
+    def celula(self, lat, lon):
+        if not self.precisao:
+            return f"{float(lat)},{float(lon)}", float(lat), float(lon)
+        return celula(lat, lon, self.precisao)
+
+    def centro(self, lat, lon):
+        return self.celula(lat, lon)[1:]
+
+    def contar(self, pedidos=0, buscas=0):
+        with self._lock:
+            self.pedidos += pedidos
+            self.buscas += buscas
+
+    def agrupar(self, pontos):
+        """{hash: (lat_c, lon_c, [índices em `pontos`])}, na ordem da primeira ocorrência."""
+        grupos = {}
+        for i, p in enumerate(pontos):
+            h, la, lo = self.celula(p['lat'], p['lon'])
+            grupos.setdefault(h, (la, lo, []))[2].append(i)
+        self.contar(len(pontos), len(grupos))
+        return grupos
+
+    def obter(self, chave, carregar):
+        """
+        Busca única por chave entre chamadas concorrentes: quem chega durante uma busca
+        em andamento recebe o mesmo resultado (ou a mesma exceção) em vez de repetir o pedido.
+        """
+        with self._lock:
+            futuro = self._em_voo.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = self._em_voo[chave] = Future()
+        if not lider:
+            return futuro.result()
+        try:
+            futuro.set_result(carregar())
+        except BaseException as e:
+            futuro.set_exception(e)
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+        return futuro.result()
+
+    def estatisticas(self):
+        with self._lock:
+            p, b = self.pedidos, self.buscas
+        return {'precisao': self.precisao, 'pedidos': p, 'buscas': b,
+                'compartilhados': p - b, 'taxa_acerto': round(1 - b / p, 3) if p else 0.0}
+
+
+GRADE = GradeEspacial(PRECISAO_GEOHASH or None)   # Grade padrão do processo (dashboard, depósito, aquecedor, laudos)
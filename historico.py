@@ -0,0 +1,180 @@
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from caderno import CadernoCSV
+
+# ==============================================================================
+# HISTÓRICO AGRONÔMICO (SQLITE, SOMENTE INSERÇÃO)
+# Cada execução grava a previsão diária completa como uma "rodada". Nada é
+# sobrescrito: dá para comparar a previsão atual com qualquer rodada passada
+# e consultar como a chuva de um dia evoluiu ao longo das rodadas. Os índices
+# por (fazenda, dia, rodada) evitam varredura completa conforme as safras crescem.
+# ==============================================================================
+ARQUIVO_HISTORICO = 'historico_agro.db'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS previsoes (
+    fazenda TEXT NOT NULL,
+    rodada TEXT NOT NULL,          -- instante da execução (UTC, ISO 8601)
+    dia TEXT NOT NULL,             -- dia local previsto (AAAA-MM-DD)
+    chuva REAL, et0 REAL,
+    temp_min REAL, temp_med REAL, temp_max REAL,
+    umid_med REAL, umid_max REAL,
+    vpd REAL, delta_t REAL, janelas_pulv INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_prev_fazenda_dia ON previsoes (fazenda, dia, rodada);
+CREATE INDEX IF NOT EXISTS ix_prev_fazenda_rodada ON previsoes (fazenda, rodada);
+
+CREATE TABLE IF NOT EXISTS caderno (
+    fazenda TEXT NOT NULL,
+    data TEXT NOT NULL,            -- AAAA-MM-DD
+    registrado_em TEXT NOT NULL,
+    temp_med REAL, vpd REAL, delta_t REAL,
+    manejo TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_caderno_fazenda_data ON caderno (fazenda, data);
+"""
+
+
+def agora_utc():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def id_local(lat, lon):
+    # Identificador de "fazenda" para coordenadas avulsas (dashboard)
+    return f"geo_{float(lat):.2f}_{float(lon):.2f}"
+
+
+def _num(valor):
+    try: return float(valor)
+    except (TypeError, ValueError): return None
+
+
+class HistoricoAgro:
+    def __init__(self, caminho=ARQUIVO_HISTORICO):
+        self.caminho = caminho
+        self.con = sqlite3.connect(caminho)
+        self.con.executescript(ESQUEMA)
+
+    def fechar(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # --- PREVISÕES ---
+    def registrar_previsao(self, fazenda, previsoes, rodada=None):
+        """Anexa a previsão diária (saída de processar_previsao) como uma nova rodada."""
+        rodada = rodada or agora_utc()
+        with self.con:
+            self.con.executemany(
+                "INSERT INTO previsoes VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                [(fazenda, rodada, p['dia'], p['chuva'], p.get('et0'), p.get('temp_min'), p.get('temp'), p.get('temp_max'),
+                  p.get('umid'), p.get('umid_max'), p.get('vpd'), p.get('delta_t'), p.get('janelas_pulv')) for p in previsoes])
+        return rodada
+
+    def rodadas(self, fazenda, desde=None, antes_de=None):
+        sql, args = "SELECT DISTINCT rodada FROM previsoes WHERE fazenda = ?", [fazenda]
+        if desde: sql, args = sql + " AND rodada >= ?", args + [desde]
+        if antes_de: sql, args = sql + " AND rodada < ?", args + [antes_de]
+        return [r[0] for r in self.con.execute(sql + " ORDER BY rodada", args)]
+
+    def ultima_rodada(self, fazenda, antes_de=None):
+        sql, args = "SELECT MAX(rodada) FROM previsoes WHERE fazenda = ?", [fazenda]
+        if antes_de: sql, args = sql + " AND rodada < ?", args + [antes_de]
+        return self.con.execute(sql, args).fetchone()[0]
+
+    def chuva_total_rodada(self, fazenda, rodada):
+        return self.con.execute("SELECT SUM(chuva) FROM previsoes WHERE fazenda = ? AND rodada = ?", (fazenda, rodada)).fetchone()[0]
+
+    def previsao_rodada(self, fazenda, rodada):
+        cur = self.con.execute("SELECT * FROM previsoes WHERE fazenda = ? AND rodada = ? ORDER BY dia", (fazenda, rodada))
+        cols = [c[0] for c in cur.description]
+        return [dict(zip(cols, r)) for r in cur]
+
+    def evolucao_dia(self, fazenda, dia, janela_dias=30, campo='chuva'):
+        """Como a previsão de `campo` para `dia` mudou a cada rodada nos últimos `janela_dias`."""
+        if campo not in ('chuva', 'et0', 'temp_min', 'temp_med', 'temp_max', 'umid_med', 'umid_max', 'vpd', 'delta_t'):
+            raise ValueError(f"Campo inválido: {campo}")
+        desde = (datetime.now(timezone.utc) - timedelta(days=janela_dias)).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        return self.con.execute(
+            f"SELECT rodada, {campo} FROM previsoes WHERE fazenda = ? AND dia = ? AND rodada >= ? ORDER BY rodada",
+            (fazenda, dia, desde)).fetchall()
+
+    def observado_diario(self, fazenda, inicio, fim, corte_utc='T03:00'):
+        """
+        Melhor estimativa observada de cada dia passado: a última rodada emitida antes do início
+        do dia local (`corte_utc` = meia-noite de FUSO_BRASIL em UTC), que cobre o dia inteiro.
+        Sem ela, usa a rodada mais recente para o dia. Retorna {dia: (temp_min, temp_max)}.
+        """
+        cur = self.con.execute("""
+            SELECT p.dia, p.temp_min, p.temp_max FROM previsoes p
+            WHERE p.fazenda = ? AND p.dia BETWEEN ? AND ? AND p.rodada = COALESCE(
+                (SELECT MAX(rodada) FROM previsoes WHERE fazenda = p.fazenda AND dia = p.dia AND rodada < p.dia || ?),
+                (SELECT MAX(rodada) FROM previsoes WHERE fazenda = p.fazenda AND dia = p.dia))
+        """, (fazenda, inicio, fim, corte_utc))
+        return {dia: (t_min, t_max) for dia, t_min, t_max in cur}
+
+    # --- CADERNO DE CAMPO ---
+    def registrar_caderno(self, fazenda, data, manejo, temp_med=None, vpd=None, delta_t=None):
+        with self.con:
+            self.con.execute("INSERT INTO caderno VALUES (?,?,?,?,?,?,?)",
+                             (fazenda, data, agora_utc(), _num(temp_med), _num(vpd), _num(delta_t), manejo))
+
+    def caderno(self, fazenda, inicio=None, fim=None):
+        sql, args = "SELECT data, temp_med, vpd, delta_t, manejo FROM caderno WHERE fazenda = ?", [fazenda]
+        if inicio: sql, args = sql + " AND data >= ?", args + [inicio]
+        if fim: sql, args = sql + " AND data <= ?", args + [fim]
+        return self.con.execute(sql + " ORDER BY data, rowid", args).fetchall()
+
+    def importar_caderno_csv(self, caminho, fazenda):
+        """Importa o caderno_de_campo_master.csv legado (linhas com colunas irregulares e quebras de linha)."""
+        n = 0
+        for reg in CadernoCSV(caminho).registros():
+            self.registrar_caderno(fazenda, reg['data'], reg['manejo'], reg['temp_med'], reg['vpd'], reg['delta_t'])
+            n += 1
+        return n
+
+
+# --- ALERTA DE VOLATILIDADE ---
+def comparar_rodada(hist, fazenda, chuva_atual, referencia=None, limite=3.0, arq_legado=None):
+    """
+    Compara a chuva total prevista com a rodada de referência (padrão: a última gravada).
+    Sem histórico, usa o valor legado de `arq_legado` (memoria_chuva.txt), se existir.
+    """
+    rodada = referencia or hist.ultima_rodada(fazenda)
+    chuva_ant = hist.chuva_total_rodada(fazenda, rodada) if rodada else None
+    if chuva_ant is None:
+        chuva_ant = 0.0
+        if arq_legado and os.path.exists(arq_legado):
+            with open(arq_legado, 'r') as f:
+                try: chuva_ant = float(f.read().strip())
+                except ValueError: chuva_ant = 0.0
+    return abs(chuva_atual - chuva_ant) > limite, chuva_ant
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Consultas ao histórico agronômico")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("importar-caderno")
+    imp.add_argument("csv")
+    imp.add_argument("--fazenda", required=True)
+    ev = sub.add_parser("dia", help="Evolução da previsão de um dia ao longo das rodadas")
+    ev.add_argument("dia", help="AAAA-MM-DD")
+    ev.add_argument("--fazenda", required=True)
+    ev.add_argument("--janela", type=int, default=30)
+    ev.add_argument("--campo", default="chuva")
+    ap.add_argument("--db", default=ARQUIVO_HISTORICO)
+    args = ap.parse_args()
+
+    with HistoricoAgro(args.db) as hist:
+        if args.cmd == "importar-caderno":
+            print(f"{hist.importar_caderno_csv(args.csv, args.fazenda)} registros importados.")
+        else:
+            for rodada, valor in hist.evolucao_dia(args.fazenda, args.dia, args.janela, args.campo):
+                print(f"{rodada}  {valor}")
@@ -0,0 +1,155 @@
+from html import escape
+
+from metricas import coletor
+
+# ==============================================================================
+# RENDERIZADOR DO LAUDO
+# Tudo o que o laudo exibe é calculado antes (montar_contexto); renderizar é
+# só juntar partes literais com esses valores, em f-strings de módulo.
+# O CSS e o cabeçalho estático são compartilhados por todos os laudos do lote.
+# ==============================================================================
+CSS = """
+    <style>
+        body { font-family: 'Segoe UI', Arial, sans-serif; color: #333; line-height: 1.6; }
+        .header { background-color: #27ae60; color: white; padding: 15px; border-radius: 5px 5px 0 0; }
+        h2 { margin: 0; font-size: 22px; }
+        .meta { font-size: 14px; opacity: 0.9; }
+        .alerta { background-color: #fff3cd; border-left: 5px solid #ffc107; padding: 15px; margin: 20px 0; color: #856404; }
+        .danger { background-color: #f8d7da; border-left: 5px solid #dc3545; color: #721c24; }
+        table { width: 100%; border-collapse: collapse; margin-top: 10px; font-size: 14px; }
+        th { background-color: #f8f9fa; color: #2c3e50; padding: 10px; border-bottom: 2px solid #ddd; text-align: left; }
+        td { padding: 10px; border-bottom: 1px solid #eee; }
+        tr:nth-child(even) { background-color: #fafafa; }
+        .destaque { font-weight: bold; color: #27ae60; }
+        .radar-box { background-color: #f1f8e9; padding: 15px; border-radius: 5px; margin-top: 20px; }
+        .footer { font-size: 11px; color: #999; margin-top: 30px; text-align: center; border-top: 1px solid #eee; padding-top: 10px; }
+    </style>
+    """
+INICIO_HTML = f"""
+    <html>
+    <head>{CSS}</head>
+    <body>"""
+RODAPE_HTML = "<div class='footer'>Sistema Agro-Intel v8.0 | Precision Agriculture Module</div></body></html>"
+
+
+# --- PARTES DO LAUDO (f-strings sobre o contexto já calculado) ---
+def _alerta(chuva_ant, chuva_total):
+    return f"""
+        <div class="alerta danger">
+            ⚠️ <strong>ALERTA DE VOLATILIDADE CLIMÁTICA</strong><br>
+            A previsão de chuva acumulada mudou bruscamente de <strong>{chuva_ant:.1f}mm</strong> para <strong>{chuva_total:.1f}mm</strong> nas últimas horas. Revise o planejamento de campo.
+        </div>
+        """
+
+
+def _linha_previsao(p, etc):
+    return (f"<tr><td>{p['data']}</td><td>{p['temp_min']} / {p['temp']} / {p['temp_max']}°C</td><td>{p['chuva']}mm</td>"
+            f"<td>{etc}mm</td><td>{p['janelas_pulv']}</td></tr>")
+
+
+def _item_radar(nome, icone, descricao, temp):
+    return f"<li><strong>{nome}:</strong> {icone} {descricao} ({temp}°C)</li>"
+
+
+def _laudo(c):
+    return f"""
+        <div class="header">
+            <h2>💎 LAUDO TÉCNICO AGRO-INTEL</h2>
+            <div class="meta">📍 {c['nome']} (GPS: {c['lat']}, {c['lon']}) | 📅 {c['emitido']}</div>
+        </div>
+    {c['alerta']}<h3>📅 Microclima Semanal ({c['nome']})</h3><table><tr><th>Data</th><th>Temp (mín/méd/máx)</th><th>Chuva</th><th>Consumo (ETc)</th><th>Janelas Pulv. (3h)</th></tr>{c['linhas_previsao']}</table><h3>📝 Diário de Campo</h3><div style='background: #eee; padding: 10px; border-left: 3px solid #999;'><em>"{c['anotacao']}"</em></div>
+    <h3>🔬 Diagnóstico Fisiológico & Estratégico</h3>
+    <table>
+        <tr><th width="30%">PARÂMETRO</th><th width="20%">VALOR</th><th>INTERPRETAÇÃO TÉCNICA</th></tr>
+
+        <tr><td class="destaque">1. Termodinâmica (VPD)</td><td>{c['vpd']} kPa</td><td>{c['txt_vpd']}</td></tr>
+        <tr><td class="destaque">2. Pulverização (Delta T)</td><td>{c['delta_t']} °C</td><td>{c['txt_delta_t']}</td></tr>
+        <tr><td class="destaque">3. Balanço Hídrico (7d)</td><td>{c['balanco']:.1f} mm</td><td>{c['txt_balanco']}</td></tr>{c['linha_irrigacao']}
+        <tr><td class="destaque">4. Pressão Sanitária</td><td>{c['valor_sanitario']}</td><td>{c['txt_sanitario']}</td></tr>
+        <tr><td class="destaque">5. Nutrição (Fase)</td><td>Vegetativo</td><td><strong>Foco: N + Mg.</strong> Nitrogênio para síntese proteica e Magnésio para o centro da molécula de Clorofila.</td></tr>
+        <tr><td class="destaque">6. Maturação (GDA)</td><td>{c['gda']:.0f} GDA</td><td>Acúmulo térmico definindo a taxa de conversão enzimática de açúcares.</td></tr>
+    </table>
+    <div class='radar-box'><h3>🛰️ Radar Regional (Georreferenciado)</h3><ul>{c['itens_radar']}</ul><small><em>*Dados obtidos via satélite nas coordenadas exatas de cada localidade.</em></small></div>"""
+
+
+# --- CONTEXTO ---
+def _txt_vpd(vpd):
+    if 0.45 <= vpd <= 1.25: return "Equilíbrio termodinâmico perfeito. Estômatos abertos e fotossíntese ativa."
+    if vpd > 1.25: return "Atmosfera muito seca. Risco de fechamento estomático e cavitação."
+    return "Atmosfera saturada. Transpiração bloqueada. Risco de doenças."
+
+
+def _itens_radar(radar):
+    itens = []
+    for local in radar or []:
+        if local['status'] != "ok": continue
+        try:
+            r = local['dados']
+            desc = r['weather'][0]['description']
+            itens.append(_item_radar(local['nome'], "🌧️" if "chuva" in desc or r.get('rain') else "🌤️",
+                                     desc.capitalize(), r['main']['temp']))
+        except (KeyError, IndexError, TypeError) as e:
+            # Resposta fora do formato esperado: a estação sai do laudo, mas fica registrada
+            coletor().erro("radar_formato", e, estacao=local['nome'])
+            continue
+    pendentes = [r['nome'] for r in radar or [] if r['status'] != "ok"]
+    if pendentes:
+        itens.append(f"<li><em>Estações sem resposta: {', '.join(pendentes)}</em></li>")
+    return "".join(itens)
+
+
+def _linha_irrigacao(rec):
+    # rec: recomendação de balanco_hidrico.projetar_fazendas (None = laudo sem a linha)
+    if not rec:
+        return ""
+    if rec['dia_irrigacao']:
+        valor = f"{rec['lamina_bruta']:.0f} mm"
+        acao = (f"<strong>Irrigar {rec['lamina_bruta']:.0f} mm brutos ({rec['lamina']:.0f} mm líquidos) em {rec['dia_irrigacao']}</strong>"
+                f" para repor o solo à capacidade de campo.")
+    else:
+        valor = "—"
+        acao = "✅ Solo acima do limite de estresse em toda a previsão. Sem irrigação necessária."
+    return f"""
+        <tr><td class="destaque">3.1 Irrigação (FAO-56)</td><td>{valor}</td><td>Depleção do solo {rec['dr']:.1f} mm (RAW {rec['raw']:.1f} / TAW {rec['taw']:.1f} mm). {acao}</td></tr>"""
+
+
+def _sanitario(sanidade, janelas_umidas):
+    # sanidade: resumo de pressao_sanitaria.avaliar_fazendas (None = regra original: dias com UR média > 88%)
+    if not sanidade:
+        return (f"{janelas_umidas} Janelas",
+                '🚨 ALTO RISCO. Condições ideais para germinação de esporos fúngicos.' if janelas_umidas > 2 else
+                '✅ Baixo Risco. Ausência de molhamento foliar contínuo.')
+    icone = {"ALTO": "🚨", "MODERADO": "⚠️", "BAIXO": "✅"}
+    itens = [f"{icone[p['nivel']]} <strong>{p['alvo']}</strong> (<em>{p['agente']}</em>): índice {p['pressao_max']:.1f}, "
+             f"{p['consec_max']:.0f}h seguidas favoráveis" + (f", infecção prevista em {p['inicio']}" if p['inicio'] else "")
+             for p in sanidade['patogenos']]
+    return (f"{icone[sanidade['nivel']]} {sanidade['nivel'].capitalize()}",
+            f"Molhamento foliar máx. {sanidade['molhamento_max']:.0f}h em 24h.<br>" + "<br>".join(itens))
+
+
+def montar_contexto(previsoes, anotacao, mudanca, chuva_ant, fazenda, kc, gda_acum, radar, emitido, irrigacao=None, sanidade=None):
+    """Pré-calcula tudo o que o laudo exibe; `emitido` já formatado (dd/mm/AAAA HH:MM)."""
+    hoje = previsoes[0]
+    chuva_total = sum(p['chuva'] for p in previsoes)
+    balanco = chuva_total - sum(p['et0'] * kc for p in previsoes)
+    valor_sanitario, txt_sanitario = _sanitario(sanidade, sum(1 for p in previsoes if p['umid'] > 88))
+    return {
+        'nome': fazenda['nome'], 'lat': fazenda['lat'], 'lon': fazenda['lon'], 'emitido': emitido,
+        'alerta': _alerta(chuva_ant, chuva_total) if mudanca else "",
+        'linhas_previsao': "".join(_linha_previsao(p, round(p['et0'] * kc, 2)) for p in previsoes),
+        'anotacao': escape(anotacao, quote=False) if anotacao else 'Sem apontamentos manuais.',
+        'vpd': hoje['vpd'], 'txt_vpd': _txt_vpd(hoje['vpd']),
+        'delta_t': hoje['delta_t'],
+        'txt_delta_t': '✅ Ideal. Gota protegida contra evaporação.' if 2 <= hoje['delta_t'] <= 8 else '⚠️ Risco. Evite pulverizar sem adjuvantes.',
+        'balanco': balanco,
+        'txt_balanco': "Superávit Hídrico: Solo tende à saturação. Risco de asfixia radicular (anoxia)." if balanco > 0 else
+                       "Déficit Hídrico: Demanda maior que a oferta natural. Aumente a irrigação.",
+        'linha_irrigacao': _linha_irrigacao(irrigacao),
+        'valor_sanitario': valor_sanitario, 'txt_sanitario': txt_sanitario,
+        'gda': gda_acum,
+        'itens_radar': _itens_radar(radar)
+    }
+
+
+def renderizar_laudo(ctx):
+    return INICIO_HTML + _laudo(ctx) + RODAPE_HTML
@@ -0,0 +1,197 @@
+from datetime import date
+
+from fpdf import FPDF
+
+# ==============================================================================
+# LAUDO TÉCNICO EM PDF (FPDF2)
+# Faixa de KPIs, gráfico de climatologia desenhado com primitivas vetoriais
+# (sem dependência de exportação de imagens), tabela química e previsão
+# detalhada com quebra automática de página.
+# ==============================================================================
+VERDE = (0, 200, 117)
+AZUL = (2, 136, 209)
+VERMELHO = (211, 47, 47)
+CINZA = (100, 116, 139)
+ESCURO = (15, 23, 42)
+
+
+def _txt(valor):
+    # Fontes base do PDF são latin-1: emojis e símbolos fora dela são descartados
+    return str(valor).encode('latin-1', 'ignore').decode('latin-1').strip()
+
+
+class LaudoPDF(FPDF):
+    def header(self):
+        self.set_fill_color(*ESCURO)
+        self.rect(0, 0, self.w, 18, 'F')
+        self.set_xy(10, 5)
+        self.set_text_color(255, 255, 255)
+        self.set_font('Helvetica', 'B', 14)
+        self.cell(0, 8, 'AGRO-INTEL TITAN | LAUDO TÉCNICO')
+        self.set_draw_color(*VERDE)
+        self.set_line_width(1.2)
+        self.line(0, 18, self.w, 18)
+        self.set_line_width(0.2)
+        self.set_text_color(*ESCURO)
+        self.set_y(24)
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font('Helvetica', '', 8)
+        self.set_text_color(*CINZA)
+        self.cell(0, 6, f'Gerado por Agro-Intel System v25.0 em {date.today():%d/%m/%Y} | Página {self.page_no()}/{{nb}}', align='C')
+
+    def secao(self, titulo):
+        if self.get_y() > self.h - 40:
+            self.add_page()
+        self.ln(3)
+        self.set_font('Helvetica', 'B', 11)
+        self.set_text_color(*AZUL)
+        self.cell(0, 7, _txt(titulo).upper(), new_x='LMARGIN', new_y='NEXT')
+        self.set_text_color(*ESCURO)
+
+    def paragrafo(self, rotulo, texto):
+        self.set_font('Helvetica', 'B', 9)
+        self.cell(0, 5, _txt(rotulo), new_x='LMARGIN', new_y='NEXT')
+        self.set_font('Helvetica', '', 9)
+        self.multi_cell(0, 5, _txt(texto), new_x='LMARGIN', new_y='NEXT')
+
+    def kpis(self, itens):
+        largura = (self.w - self.l_margin - self.r_margin - 3 * 3) / 4
+        y = self.get_y()
+        for i, (rotulo, valor, nota) in enumerate(itens):
+            x = self.l_margin + i * (largura + 3)
+            self.set_draw_color(203, 213, 225)
+            self.rect(x, y, largura, 20)
+            self.set_xy(x + 2, y + 1.5)
+            self.set_font('Helvetica', 'B', 7)
+            self.set_text_color(*CINZA)
+            self.cell(largura - 4, 4, _txt(rotulo).upper())
+            self.set_xy(x + 2, y + 6)
+            self.set_font('Helvetica', 'B', 13)
+            self.set_text_color(*ESCURO)
+            self.cell(largura - 4, 7, _txt(valor))
+            self.set_xy(x + 2, y + 14)
+            self.set_font('Helvetica', '', 7)
+            self.set_text_color(*CINZA)
+            self.cell(largura - 4, 4, _txt(nota))
+        self.set_text_color(*ESCURO)
+        self.set_xy(self.l_margin, y + 24)
+
+    def grafico_balanco(self, rotulos, chuva, etc, altura=55):
+        """Barras de chuva + linha de ETc (mm/dia), com eixo Y comum."""
+        if self.get_y() + altura + 10 > self.h - 15:
+            self.add_page()
+        x0, y0 = self.l_margin + 10, self.get_y()
+        largura = self.w - self.l_margin - self.r_margin - 10
+        topo = max([1.0] + list(chuva) + list(etc)) * 1.15
+        escala = altura / topo
+        base = y0 + altura
+        self.set_draw_color(*CINZA)
+        self.line(x0, y0, x0, base)
+        self.line(x0, base, x0 + largura, base)
+        self.set_font('Helvetica', '', 7)
+        self.set_text_color(*CINZA)
+        for frac in (0, 0.5, 1):
+            self.set_xy(x0 - 10, base - altura * frac - 2)
+            self.cell(9, 4, f"{topo * frac:.0f}", align='R')
+        n = max(len(rotulos), 1)
+        passo = largura / n
+        self.set_fill_color(*AZUL)
+        for i, (rot, c) in enumerate(zip(rotulos, chuva)):
+            h = c * escala
+            if h > 0:
+                self.rect(x0 + i * passo + passo * 0.2, base - h, passo * 0.6, h, 'F')
+            self.set_xy(x0 + i * passo, base + 1)
+            self.cell(passo, 4, _txt(rot), align='C')
+        self.set_draw_color(*VERMELHO)
+        self.set_line_width(0.7)
+        pontos = [(x0 + i * passo + passo / 2, base - e * escala) for i, e in enumerate(etc)]
+        for a, b in zip(pontos, pontos[1:]):
+            self.line(*a, *b)
+        self.set_line_width(0.2)
+        self.set_xy(x0, base + 6)
+        self.set_text_color(*AZUL)
+        self.cell(40, 4, 'Barras: Precipitação (mm)')
+        self.set_text_color(*VERMELHO)
+        self.cell(50, 4, 'Linha: Evapotranspiração ETc (mm)')
+        self.set_text_color(*ESCURO)
+        self.set_xy(self.l_margin, base + 12)
+
+    def tabela(self, colunas, linhas, larguras=None):
+        larguras = larguras or [(self.w - self.l_margin - self.r_margin) / len(colunas)] * len(colunas)
+
+        def cabecalho():
+            self.set_font('Helvetica', 'B', 8)
+            self.set_fill_color(241, 245, 249)
+            for c, w in zip(colunas, larguras):
+                self.cell(w, 6, _txt(c), border='B', fill=True)
+            self.ln()
+            self.set_font('Helvetica', '', 8)
+
+        cabecalho()
+        for linha in linhas:
+            if self.get_y() > self.h - 20:
+                self.add_page()
+                cabecalho()
+            for v, w in zip(linha, larguras):
+                self.cell(w, 5.5, _txt(v), border='B')
+            self.ln()
+
+
+def gerar_laudo_pdf(destino, cultura, variedade, fase, dias, df, dados_fase, info_var, propriedade="Fazenda Progresso"):
+    """
+    Escreve o laudo diretamente em `destino` (arquivo binário ou BytesIO) e devolve `destino`.
+    `df` é o DataFrame diário de get_forecast (slots 3h opcionais em df.attrs['slots']).
+    """
+    pdf = LaudoPDF(format='A4')
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.alias_nb_pages()
+    pdf.add_page()
+
+    pdf.set_font('Helvetica', '', 9)
+    pdf.multi_cell(0, 5, _txt(f"Data: {date.today():%d/%m/%Y}   |   Propriedade: {propriedade}\n"
+                              f"Cultura: {cultura}   |   Variedade: {variedade}   |   Fase: {fase}   |   Idade: {dias} dias"),
+                   new_x='LMARGIN', new_y='NEXT')
+    pdf.ln(2)
+
+    hoje = df.iloc[0]
+    pdf.secao("Condições de hoje")
+    pdf.kpis([
+        ("Temperatura", f"{hoje['Temp']:.1f} °C", f"Umidade {hoje['Umid']}%"),
+        ("VPD", f"{hoje['VPD']} kPa", "Estresse" if hoje['VPD'] > 1.3 else "Ideal"),
+        ("ETc", f"{hoje['ETc']} mm", f"Kc {info_var['kc']}"),
+        ("Delta T", f"{hoje['Delta T']} °C", "Não aplicar" if hoje['Delta T'] < 2 or hoje['Delta T'] > 8 else "Aplicar"),
+    ])
+
+    pdf.secao(f"Climatologia - balanço hídrico ({len(df)} dias)")
+    pdf.grafico_balanco(list(df['Data']), list(df['Chuva']), list(df['ETc']))
+    pdf.set_font('Helvetica', '', 9)
+    pdf.cell(0, 5, _txt(f"Chuva acumulada: {df['Chuva'].sum():.1f} mm   |   Demanda (ETc): {df['ETc'].sum():.1f} mm   |   "
+                        f"Balanço: {df['Chuva'].sum() - df['ETc'].sum():.1f} mm"), new_x='LMARGIN', new_y='NEXT')
+
+    pdf.secao("Fisiologia & desenvolvimento")
+    pdf.paragrafo("Descrição da fase", dados_fase.get('desc', '-'))
+    pdf.paragrafo("Dinâmica fisiológica", dados_fase.get('fisiologia', '-'))
+    pdf.paragrafo(f"Genética ({variedade})", info_var.get('info', '-'))
+
+    pdf.secao("Estratégia de manejo")
+    pdf.paragrafo("Manejo cultural", dados_fase.get('manejo', '-'))
+    quimica = dados_fase.get('quimica', [])
+    if isinstance(quimica, list) and quimica:
+        pdf.ln(1)
+        pdf.tabela(["Alvo", "Ativo", "Grupo", "Tipo"], [[q['Alvo'], q['Ativo'], q['Grupo'], q['Tipo']] for q in quimica], [35, 65, 50, 40])
+
+    pdf.secao("Previsão diária")
+    cols = ['Data', 'Temp Min', 'Temp', 'Temp Max', 'Umid', 'VPD', 'Delta T', 'ETc', 'Chuva']
+    cols = [c for c in cols if c in df.columns]
+    pdf.tabela(cols, [list(linha) for linha in zip(*(df[c].tolist() for c in cols))])
+
+    slots = df.attrs.get('slots')
+    if slots is not None and not slots.empty:
+        pdf.secao("Janelas de pulverização (passos de 3h)")
+        pdf.tabela(["Hora", "Delta T (°C)", "VPD (kPa)", "Pulverizar"],
+                   [[h, dt, v, "Sim" if ok else "Não"] for h, dt, v, ok in slots[['Hora', 'Delta T', 'VPD', 'Pulverizar']].itertuples(index=False)])
+
+    pdf.output(destino)
+    return destino
@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import clima_alerta as ca
+from correio import DespachanteEmail, SinkArquivo
+from deposito_clima import ARQUIVO_DEPOSITO, DepositoClima, deposito_padrao
+from historico import HistoricoAgro
+from caderno import CadernoCSV, SEM_MANEJO
+from balanco_hidrico import projetar_fazendas
+from pressao_sanitaria import avaliar_fazendas
+from catalogo import CatalogoTitan
+from radar import buscar_radar
+from cliente_owm import ClienteOWM
+from grade_espacial import GRADE, PRECISAO_GEOHASH, GradeEspacial
+from metricas import coletor, ativar_por_ambiente
+
+# ==============================================================================
+# MODO LOTE: UM LAUDO POR FAZENDA
+# Lê a lista de propriedades, baixa as previsões em paralelo (uma por
+# célula da grade espacial), varre todas as estações de radar de uma vez e
+# envia um laudo por fazenda. Falhas ficam no relatório final, sem parar o lote.
+# ==============================================================================
+MAX_WORKERS = 16
+PRAZO_RADAR = 30.0
+
+
+def chave_coord(lat, lon):
+    # Mesma precisão (3 casas) das coordenadas enviadas à API
+    return round(float(lat), 3), round(float(lon), 3)
+
+
+def carregar_fazendas(caminho):
+    """
+    Arquivo JSON com uma lista de fazendas:
+    {"id", "nome", "lat", "lon", "kc", "data_plantio": "AAAA-MM-DD", "radar": [{"nome", "lat", "lon"}],
+     "destinatarios": [...], "arquivo_atividades": opcional, "caderno": CSV do caderno de campo (opcional),
+     "memoria_legada": opcional, "cultura", "variedade" (t_base e Kc do BANCO_TITAN quando não vêm),
+     "solo", "zr", "p" (balanco_hidrico)}
+    `id` é obrigatório e único: é a chave do histórico, do GDA e do balanço hídrico da fazenda.
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        lista = json.load(f)
+    fazendas, banco, ids = [], None, set()
+    for i, fz in enumerate(lista):
+        fz = dict(fz)
+        if not fz.get('id'):
+            raise ValueError(f"{caminho}: fazenda #{i + 1} ({fz.get('nome', '?')}) sem 'id'")
+        if fz['id'] in ids:
+            raise ValueError(f"{caminho}: 'id' repetido: {fz['id']}")
+        ids.add(fz['id'])
+        if fz.get('cultura') and ('t_base' not in fz or ('kc' not in fz and fz.get('variedade'))):
+            # O catálogo só é lido se alguma fazenda precisar do t_base ou do Kc da cultura
+            banco = banco or CatalogoTitan.carregar().banco
+            fz.setdefault('t_base', banco[fz['cultura']]['t_base'])
+            if 'kc' not in fz and fz.get('variedade'):
+                fz['kc'] = banco[fz['cultura']]['vars'][fz['variedade']]['kc']
+        fz.setdefault('kc', ca.KC_ATUAL)
+        fz['data_plantio'] = datetime.fromisoformat(fz['data_plantio']) if 'data_plantio' in fz else ca.DATA_PLANTIO
+        fz.setdefault('radar', [])
+        fz.setdefault('destinatarios', [ca.EMAIL_DESTINO])
+        fazendas.append(fz)
+    return fazendas
+
+
+# --- 1. COLETA CONCORRENTE ---
+def buscar_previsoes(fazendas, cliente, max_workers=MAX_WORKERS, deposito=None, grade=GRADE):
+    """
+    Baixa uma previsão por célula da grade (no centro da célula) e a distribui às fazendas.
+    Retorna {coord da fazenda: (previsoes, erro, segundos)}.
+    """
+    grupos = grade.agrupar(fazendas)
+
+    def baixar(c):
+        t0 = time.perf_counter()
+        try:
+            return ca.processar_previsao(ca.baixar_previsao(c[0], c[1], cliente=cliente, deposito=deposito)), None, time.perf_counter() - t0
+        except Exception as e:
+            return None, e, time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        por_celula = list(pool.map(baixar, [(la, lo) for la, lo, _ in grupos.values()]))
+    previsoes = {}
+    for res, (_, _, indices) in zip(por_celula, grupos.values()):
+        for i in indices:
+            previsoes[chave_coord(fazendas[i]['lat'], fazendas[i]['lon'])] = res
+    return previsoes
+
+
+def buscar_radares(fazendas, cliente, max_workers=MAX_WORKERS, deposito=None, grade=GRADE):
+    # Estações repetidas entre fazendas vizinhas (ou na mesma célula da grade) são consultadas uma única vez
+    estacoes = {}
+    for fz in fazendas:
+        for e in fz['radar']:
+            estacoes.setdefault(chave_coord(e['lat'], e['lon']), e)
+    res = buscar_radar(list(estacoes.values()), key=ca.OPENWEATHER_API_KEY, cliente=cliente,
+                       prazo_total=PRAZO_RADAR, max_workers=max_workers, deposito=deposito, grade=grade)
+    return {chave_coord(r['lat'], r['lon']): r for r in res}
+
+
+def radar_da_fazenda(fz, radares):
+    return [{**radares[chave_coord(e['lat'], e['lon'])], 'nome': e['nome']} for e in fz['radar']]
+
+
+def planejar_irrigacao(fazendas, previsoes, hist):
+    # Balanço hídrico da frota inteira numa simulação vetorizada -> {id da fazenda: recomendação}
+    validas = [fz for fz in fazendas if previsoes[chave_coord(fz['lat'], fz['lon'])][0]]
+    if not validas:
+        return {}
+    try:
+        with coletor().fase("irrigacao", fazendas=len(validas)):
+            recs = projetar_fazendas(validas, [previsoes[chave_coord(fz['lat'], fz['lon'])][0] for fz in validas], hist,
+                                     kc_padrao=ca.KC_ATUAL)
+    except Exception as e:
+        # Sem o balanço os laudos saem sem a linha de irrigação
+        coletor().erro("irrigacao", e)
+        return {}
+    return {fz['id']: r for fz, r in zip(validas, recs)}
+
+
+def avaliar_sanidade(fazendas, previsoes, hist):
+    # Pressão sanitária da frota num motor só (passos 3-horários de cada previsão) -> {id da fazenda: resumo}
+    validas = [fz for fz in fazendas if previsoes[chave_coord(fz['lat'], fz['lon'])][0]]
+    if not validas:
+        return {}
+    try:
+        with coletor().fase("sanidade", fazendas=len(validas)):
+            resumos = avaliar_fazendas(validas, [previsoes[chave_coord(fz['lat'], fz['lon'])][0].attrs['slots'] for fz in validas], hist)
+    except Exception as e:
+        # Sem o motor os laudos usam a contagem diária de umidade
+        coletor().erro("sanidade", e)
+        return {}
+    return {fz['id']: r for fz, r in zip(validas, resumos)}
+
+
+# --- 2. LAUDO POR FAZENDA ---
+def processar_fazenda(fz, previsoes, radares, despachante, hist, irrigacao=None, sanidade=None):
+    tempos = {}
+    prev, erro, tempos['previsao'] = previsoes[chave_coord(fz['lat'], fz['lon'])]
+    if erro is not None:
+        raise RuntimeError(f"previsão indisponível: {erro}")
+    if not prev:
+        raise RuntimeError("previsão vazia")
+
+    t0 = time.perf_counter()
+    mudou, c_ant = ca.gerenciar_memoria(prev, fazenda=fz, hist=hist)
+    anot = ""
+    if fz.get('arquivo_atividades') and os.path.exists(fz['arquivo_atividades']):
+        with open(fz['arquivo_atividades'], 'r', encoding='utf-8') as f: anot = f.read().strip()
+    html = ca.gerar_conteudo_html(prev, anot, mudou, c_ant, fazenda=fz, radar=radar_da_fazenda(fz, radares),
+                                 irrigacao=irrigacao, sanidade=sanidade)
+    if fz.get('caderno'):
+        # Caderno de campo da fazenda (append), como o clima_alerta.py faz para a Sede
+        hoje = prev[0]
+        CadernoCSV(fz['caderno']).registrar(hoje['dia'], hoje['temp'], hoje['vpd'], hoje['delta_t'], anot or SEM_MANEJO)
+    msg = ca.montar_email(html, mudou, fz, fz['destinatarios'])
+    tempos['render'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if despachante is not None:
+        despachante.enviar(msg)
+    tempos['envio'] = time.perf_counter() - t0
+    return tempos
+
+
+def executar_lote(fazendas, max_workers=MAX_WORKERS, despachante=None, deposito=None, grade=None):
+    # `despachante`: DespachanteEmail/SinkArquivo já aberto (uma sessão SMTP para o lote todo); None = não envia
+    # `deposito`: DepositoClima aquecido pelo aquecedor.py; a rede só é usada para o que faltar ou vencer
+    # `grade`: GradeEspacial própria do lote (estatística isolada); padrão: precisão PRECISAO_GEOHASH
+    grade = grade or GradeEspacial(PRECISAO_GEOHASH or None)
+    if deposito is not None and deposito.grade.precisao != grade.precisao:
+        # Depósito com outra grade guardaria/serviria respostas por células diferentes das buscadas
+        raise ValueError(f"depósito na grade {deposito.grade.precisao}, lote na grade {grade.precisao}")
+    cliente = ClienteOWM(ca.OPENWEATHER_API_KEY, pool=max_workers)   # pool, disjuntor e reservas do lote inteiro
+    t0 = time.perf_counter()
+    try:
+        previsoes = buscar_previsoes(fazendas, cliente, max_workers, deposito, grade)
+        radares = buscar_radares(fazendas, cliente, max_workers, deposito, grade)
+    finally:
+        cliente.fechar()
+    t_coleta = time.perf_counter() - t0
+
+    relatorio = []
+    with HistoricoAgro() as hist:
+        irrigacao = planejar_irrigacao(fazendas, previsoes, hist)
+        sanidade = avaliar_sanidade(fazendas, previsoes, hist)
+        for fz in fazendas:
+            item = {'fazenda': fz['nome'], 'status': 'ok', 'erro': None}
+            try:
+                item.update({k: round(v, 3) for k, v in processar_fazenda(fz, previsoes, radares, despachante, hist,
+                                                                                  irrigacao.get(fz['id']), sanidade.get(fz['id'])).items()})
+            except Exception as e:
+                coletor().erro("fazenda", e, fazenda=fz['id'])
+                item.update(status='falha', erro=str(e))
+            relatorio.append(item)
+    return {
+        'fazendas': len(fazendas),
+        'coordenadas_distintas': len(previsoes),
+        'estacoes_radar': len(radares),
+        'grade': grade.estatisticas(),
+        'coleta_s': round(t_coleta, 3),
+        'total_s': round(time.perf_counter() - t0, 3),
+        'falhas': sum(1 for r in relatorio if r['status'] != 'ok'),
+        'itens': relatorio
+    }
+
+
+def imprimir_relatorio(res):
+    print(f"Lote: {res['fazendas']} fazendas | {res['coordenadas_distintas']} coordenadas | "
+          f"{res['estacoes_radar']} estações | coleta {res['coleta_s']}s | total {res['total_s']}s")
+    g = res['grade']
+    print(f"Grade geohash-{g['precisao']}: {g['pedidos']} pontos -> {g['buscas']} buscas ({g['taxa_acerto']:.0%} compartilhados)")
+    for r in res['itens']:
+        if r['status'] == 'ok':
+            print(f"  ✅ {r['fazenda']}: previsão {r['previsao']}s, render {r['render']}s, envio {r['envio']}s")
+        else:
+            print(f"  ❌ {r['fazenda']}: {r['erro']}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Laudos Agro-Intel para várias fazendas")
+    ap.add_argument("arquivo", nargs="?", default="fazendas.json")
+    ap.add_argument("--workers", type=int, default=MAX_WORKERS)
+    ap.add_argument("--sem-envio", action="store_true", help="Gera os laudos sem enviar e-mail")
+    ap.add_argument("--dry-run", metavar="PASTA", help="Grava os e-mails como .eml em vez de enviar")
+    ap.add_argument("--smtp-local", metavar="HOST:PORTA", help="SMTP sem TLS/login (servidor local de testes)")
+    ap.add_argument("--relatorio", help="Grava o relatório do lote em JSON")
+    ap.add_argument("--deposito", metavar="DB", help=f"Depósito do aquecedor (padrão: {ARQUIVO_DEPOSITO}, se existir)")
+    ap.add_argument("--precisao-grade", type=int, default=PRECISAO_GEOHASH, help="Caracteres do geohash (0 = sem grade)")
+    ap.add_argument("--metricas", metavar="ARQ", help="Métricas da execução: .jsonl (uma linha por execução) ou .prom (padrão: $METRICAS_SAIDA)")
+    args = ap.parse_args()
+    ativar_por_ambiente("lote_fazendas", args.metricas)
+    grade = GradeEspacial(args.precisao_grade or None)
+    deposito = DepositoClima(args.deposito, grade=grade) if args.deposito else deposito_padrao(grade=grade)
+
+    if args.sem_envio:
+        despachante = None
+    elif args.dry_run:
+        despachante = SinkArquivo(args.dry_run)
+    elif args.smtp_local:
+        host, porta = args.smtp_local.rsplit(":", 1)
+        despachante = DespachanteEmail(host=host, porta=int(porta), ssl=False, max_por_minuto=None)
+    else:
+        despachante = DespachanteEmail(ca.EMAIL_DESTINO, ca.GMAIL_PASSWORD)
+
+    if despachante is None:
+        res = executar_lote(carregar_fazendas(args.arquivo), args.workers, deposito=deposito, grade=grade)
+    else:
+        with despachante:
+            res = executar_lote(carregar_fazendas(args.arquivo), args.workers, despachante, deposito, grade)
+    imprimir_relatorio(res)
+    destino = coletor().gravar()
+    if destino: print(f"📈 Métricas gravadas em {destino}")
+    if args.relatorio:
+        with open(args.relatorio, 'w', encoding='utf-8') as f: json.dump(res, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if res['falhas'] else 0)
@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# ==============================================================================
+# MÉTRICAS DE EXECUÇÃO (CRON / MODO LOTE)
+# Duração de cada fase (previsão, cada estação do radar, cálculo, render, SMTP,
+# gravação da memória), status HTTP, tentativas e tamanho das respostas.
+# Ao fim da execução vira uma linha JSON (.jsonl, uma por execução) ou um
+# arquivo no formato texto do Prometheus (.prom, textfile collector).
+# Desligado por padrão: o coletor nulo não mede nada e cada ponto de medição
+# custa uma chamada de método vazia.
+#
+#     METRICAS_SAIDA=metricas.jsonl python clima_alerta.py
+#     python lote_fazendas.py fazendas.json --metricas /var/lib/node_exporter/clima.prom
+# ==============================================================================
+VARIAVEL_AMBIENTE = "METRICAS_SAIDA"
+PREFIXO = "clima"
+
+
+class _FaseNula:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_FASE_NULA = _FaseNula()
+
+
+class ColetorNulo:
+    """Coletor desligado: mesma interface do ColetorMetricas, sem custo."""
+    ativo = False
+
+    def fase(self, nome, **rotulos):
+        return _FASE_NULA
+
+    def registrar_fase(self, nome, segundos, ok=True, **rotulos):
+        pass
+
+    def http(self, endpoint, resposta=None, erro=None):
+        pass
+
+    def contar(self, nome, n=1, **rotulos):
+        pass
+
+    def erro(self, fase, exc, **rotulos):
+        pass
+
+    def gravar(self, destino=None):
+        return None
+
+
+class _Fase:
+    __slots__ = ('coletor', 'nome', 'rotulos', 't0')
+
+    def __init__(self, coletor, nome, rotulos):
+        self.coletor, self.nome, self.rotulos = coletor, nome, rotulos
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, exc, tb):
+        self.coletor.registrar_fase(self.nome, time.perf_counter() - self.t0, ok=tipo is None, **self.rotulos)
+        return False
+
+
+class ColetorMetricas(ColetorNulo):
+    """
+    Coletor de uma execução (thread-safe: o radar mede as estações em paralelo).
+        with coletor().fase("render", fazenda=fz['id']): ...
+        coletor().http("forecast", resposta)
+        coletor().gravar()          # destino do construtor ou de METRICAS_SAIDA
+    """
+    ativo = True
+
+    def __init__(self, execucao="clima_alerta", destino=None):
+        self.execucao, self.destino = execucao, destino
+        self.inicio = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.eventos = []        # uma entrada por fase medida (com rótulos: fazenda, estação...)
+        self.http_status = {}    # (endpoint, status) -> respostas
+        self.tentativas = {}     # endpoint -> tentativas (1 + repetições feitas pelo adaptador)
+        self.bytes = {}          # endpoint -> bytes recebidos
+        self.contadores = {}     # (nome, rótulos ordenados) -> valor
+        self.erros = []
+
+    def fase(self, nome, **rotulos):
+        return _Fase(self, nome, rotulos)
+
+    def registrar_fase(self, nome, segundos, ok=True, **rotulos):
+        with self._lock:
+            self.eventos.append({'fase': nome, 's': round(segundos, 6), 'ok': ok, **rotulos})
+
+    def http(self, endpoint, resposta=None, erro=None):
+        if resposta is not None:
+            status = str(resposta.status_code)
+            retries = getattr(getattr(resposta, 'raw', None), 'retries', None)
+            tentativas = 1 + len(getattr(retries, 'history', None) or ())
+            tamanho = len(resposta.content or b"")
+        else:
+            status = "timeout" if "Timeout" in type(erro).__name__ else "erro"
+            tentativas, tamanho = 1, 0
+        with self._lock:
+            self.http_status[(endpoint, status)] = self.http_status.get((endpoint, status), 0) + 1
+            self.tentativas[endpoint] = self.tentativas.get(endpoint, 0) + tentativas
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + tamanho
+
+    def contar(self, nome, n=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + n
+
+    def erro(self, fase, exc, **rotulos):
+        with self._lock:
+            self.erros.append({'fase': fase, 'tipo': type(exc).__name__, 'mensagem': str(exc)[:300], **rotulos})
+
+    # --- RESUMO E SAÍDA ---
+    def fases(self):
+        """{fase: {n, total_s, max_s, falhas}} agregado sobre todos os eventos."""
+        with self._lock:
+            return _agregar_fases(self.eventos)
+
+    def resumo(self):
+        with self._lock:
+            return {
+                'execucao': self.execucao,
+                'inicio': datetime.fromtimestamp(self.inicio).isoformat(timespec='seconds'),
+                'duracao_s': round(time.perf_counter() - self._t0, 6),
+                'fases': _agregar_fases(self.eventos),
+                'http': [{'endpoint': ep, 'status': st, 'respostas': n} for (ep, st), n in sorted(self.http_status.items())],
+                'tentativas': dict(self.tentativas),
+                'bytes': dict(self.bytes),
+                'contadores': [{'nome': nome, **dict(rot), 'valor': v} for (nome, rot), v in sorted(self.contadores.items())],
+                'erros': list(self.erros),
+                'eventos': list(self.eventos)
+            }
+
+    def para_prometheus(self, prefixo=PREFIXO):
+        """Texto no formato de exposição do Prometheus. Sem rótulos por fazenda/estação (cardinalidade)."""
+        r = self.resumo()
+        linhas = [f"# HELP {prefixo}_fase_segundos Duração das fases da execução",
+                  f"# TYPE {prefixo}_fase_segundos summary"]
+        for fase, f in sorted(r['fases'].items()):
+            linhas += [f'{prefixo}_fase_segundos_sum{{fase="{_esc(fase)}"}} {f["total_s"]}',
+                       f'{prefixo}_fase_segundos_count{{fase="{_esc(fase)}"}} {f["n"]}']
+        linhas.append(f"# TYPE {prefixo}_fase_segundos_max gauge")
+        linhas += [f'{prefixo}_fase_segundos_max{{fase="{_esc(fase)}"}} {f["max_s"]}' for fase, f in sorted(r['fases'].items())]
+        linhas.append(f"# TYPE {prefixo}_fase_falhas_total counter")
+        linhas += [f'{prefixo}_fase_falhas_total{{fase="{_esc(fase)}"}} {f["falhas"]}' for fase, f in sorted(r['fases'].items())]
+        linhas.append(f"# TYPE {prefixo}_http_respostas_total counter")
+        linhas += [f'{prefixo}_http_respostas_total{{endpoint="{_esc(h["endpoint"])}",status="{h["status"]}"}} {h["respostas"]}'
+                   for h in r['http']]
+        linhas.append(f"# TYPE {prefixo}_http_tentativas_total counter")
+        linhas += [f'{prefixo}_http_tentativas_total{{endpoint="{_esc(ep)}"}} {n}' for ep, n in sorted(r['tentativas'].items())]
+        linhas.append(f"# TYPE {prefixo}_http_bytes_total counter")
+        linhas += [f'{prefixo}_http_bytes_total{{endpoint="{_esc(ep)}"}} {n}' for ep, n in sorted(r['bytes'].items())]
+        erros = {}
+        for e in r['erros']:
+            erros[(e['fase'], e['tipo'])] = erros.get((e['fase'], e['tipo']), 0) + 1
+        linhas.append(f"# TYPE {prefixo}_erros_total counter")
+        linhas += [f'{prefixo}_erros_total{{fase="{_esc(f)}",tipo="{_esc(t)}"}} {n}' for (f, t), n in sorted(erros.items())]
+        for c in r['contadores']:
+            rot = ",".join(f'{k}="{_esc(v)}"' for k, v in c.items() if k not in ('nome', 'valor'))
+            linhas.append(f'{prefixo}_{c["nome"]}_total{"{" + rot + "}" if rot else ""} {c["valor"]}')
+        linhas += [f"# TYPE {prefixo}_execucao_segundos gauge", f"{prefixo}_execucao_segundos {r['duracao_s']}",
+                   f"# TYPE {prefixo}_execucao_inicio_timestamp_seconds gauge", f"{prefixo}_execucao_inicio_timestamp_seconds {self.inicio:.0f}"]
+        return "\n".join(linhas) + "\n"
+
+    def gravar(self, destino=None):
+        """`.prom` substitui o arquivo (atômico, para o coletor não ler pela metade); o resto ganha uma linha JSON."""
+        destino = destino or self.destino or os.getenv(VARIAVEL_AMBIENTE)
+        if not destino:
+            return None
+        if destino.endswith(".prom"):
+            tmp = destino + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f: f.write(self.para_prometheus())
+            os.replace(tmp, destino)
+        else:
+            with open(destino, 'a', encoding='utf-8') as f: f.write(json.dumps(self.resumo(), ensure_ascii=False) + "\n")
+        return destino
+
+
+def _agregar_fases(eventos):
+    resumo = {}
+    for ev in eventos:
+        r = resumo.setdefault(ev['fase'], {'n': 0, 'total_s': 0.0, 'max_s': 0.0, 'falhas': 0})
+        r['n'] += 1
+        r['total_s'] += ev['s']
+        r['max_s'] = max(r['max_s'], ev['s'])
+        r['falhas'] += not ev['ok']
+    for r in resumo.values():
+        r['total_s'] = round(r['total_s'], 6)
+    return resumo
+
+
+def _esc(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# --- COLETOR DO PROCESSO ---
+_ATUAL = ColetorNulo()
+
+
+def coletor():
+    return _ATUAL
+
+
+def ativar(execucao="clima_alerta", destino=None):
+    """Liga a coleta no processo. Sem `destino`, usa METRICAS_SAIDA na hora de gravar."""
+    global _ATUAL
+    _ATUAL = ColetorMetricas(execucao, destino)
+    return _ATUAL
+
+
+def ativar_por_ambiente(execucao="clima_alerta", destino=None):
+    # Pontos de entrada (cron, lote) só pagam a coleta quando há onde gravar
+    if destino or os.getenv(VARIAVEL_AMBIENTE):
+        return ativar(execucao, destino)
+    return _ATUAL
+
+
+def desativar():
+    global _ATUAL
+    _ATUAL = ColetorNulo()
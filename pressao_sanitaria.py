@@ -0,0 +1,318 @@
+import argparse
+
+import numpy as np
+
+from agregacao import PASSO_HORAS, rotulo_slot
+
+# ==============================================================================
+# PRESSÃO SANITÁRIA (JANELAS DESLIZANTES SOBRE A SÉRIE 3-HORÁRIA)
+# Para cada talhão e patógeno, passo a passo:
+#     molhamento foliar (UR >= 90% ou chuva) nas últimas 24h e horas seguidas molhadas
+#     horas seguidas favoráveis (UR e temperatura na faixa do patógeno)
+#     índice de infecção: horas favoráveis seguidas, ponderadas pela temperatura
+#     (1 no ótimo, 0 fora da faixa), divididas pelas horas que o patógeno exige
+#     para infectar (>= 1: infecção)
+#     pressão: períodos de infecção completos nas últimas JANELA_HORAS (molhamento
+#     além do mínimo soma proporcionalmente) + o progresso do período em curso
+# As somas das janelas ficam num anel endereçado pelo horário do passo: cada passo
+# novo custa O(talhões x patógenos), sem reler a janela. O estado (passos já
+# ocorridos) fica no histórico; a previsão é projetada a partir dele a cada rodada.
+#
+#     python pressao_sanitaria.py fazendas.json
+# ==============================================================================
+LIMIAR_MOLHAMENTO = 90   # UR (%) a partir da qual a folha é considerada molhada (sem sensor de molhamento)
+JANELA_HORAS = 72
+JANELA_MOLHAMENTO_HORAS = 24
+NIVEIS = ((1.0, "ALTO"), (0.5, "MODERADO"), (0.0, "BAIXO"))   # pressão máxima na previsão -> nível
+
+# Patógenos dos alvos do BANCO_TITAN. umid: UR mínima; molhamento: exige água livre na folha
+# (False = oídio, que infecta com ar úmido e é inibido pela água livre); temperaturas (°C)
+# mínima/ótima/máxima da infecção; horas: molhamento/umidade contínuos para infectar no ótimo
+PATOGENOS = {
+    "Requeima": {'agente': "Phytophthora infestans", 'umid': 90, 'molhamento': True, 't_min': 7, 't_opt': 18, 't_max': 27, 'horas': 10},
+    "Botrytis": {'agente': "Botrytis cinerea", 'umid': 90, 'molhamento': True, 't_min': 10, 't_opt': 20, 't_max': 28, 'horas': 6},
+    "Ferrugem": {'agente': "Phakopsora pachyrhizi", 'umid': 90, 'molhamento': True, 't_min': 15, 't_opt': 22, 't_max': 28, 'horas': 6},
+    "Manchas": {'agente': "Cercospora / Septoria", 'umid': 90, 'molhamento': True, 't_min': 15, 't_opt': 25, 't_max': 32, 'horas': 12},
+    "Podridão": {'agente': "Botrytis / podridão ácida", 'umid': 90, 'molhamento': True, 't_min': 12, 't_opt': 22, 't_max': 30, 'horas': 8},
+    "Oídio": {'agente': "Erysiphales", 'umid': 70, 'molhamento': False, 't_min': 15, 't_opt': 24, 't_max': 30, 'horas': 6},
+}
+# O mesmo alvo em culturas diferentes pode ser outro patógeno
+AJUSTE_CULTURA = {
+    ("Café (Coffea arabica)", "Ferrugem"): {'agente': "Hemileia vastatrix", 't_min': 16, 't_opt': 23, 't_max': 28, 'horas': 8},
+    ("Amora Preta (Blackberry)", "Ferrugem"): {'agente': "Kuehneola / Phragmidium", 't_min': 10, 't_opt': 20, 't_max': 27, 'horas': 6},
+}
+
+ESQUEMA_PRESSAO = """
+CREATE TABLE IF NOT EXISTS pressao_sanitaria (
+    fazenda TEXT PRIMARY KEY,
+    assinatura TEXT NOT NULL,       -- MotorSanitario.assinatura() de quem gravou
+    estado BLOB NOT NULL,           -- linha float64 de MotorSanitario.estado() (passos já ocorridos)
+    pendente BLOB                   -- última série prevista (dt, temp, umid, chuva em float64): vira estado quando os passos passam
+);
+"""
+
+
+# --- 1. PATÓGENOS POR CULTURA ---
+def patogenos_da_cultura(cultura, banco=None):
+    """Alvos da cultura no BANCO_TITAN que têm modelo em PATOGENOS (sem cultura/banco: todos)."""
+    if not cultura or not banco or cultura not in banco:
+        return list(PATOGENOS)
+    alvos = []
+    for fase in banco[cultura]['fases'].values():
+        quimica = fase.get('quimica')
+        if not isinstance(quimica, list): continue
+        for item in quimica:
+            if item.get('Alvo') in PATOGENOS and item['Alvo'] not in alvos:
+                alvos.append(item['Alvo'])
+    return alvos
+
+
+def parametros(cultura, alvo):
+    return {**PATOGENOS[alvo], **AJUSTE_CULTURA.get((cultura, alvo), {})}
+
+
+def resposta_temperatura(t, t_min, t_opt, t_max):
+    """Peso da temperatura na infecção: 1 no ótimo, cai linearmente até 0 nos limites."""
+    return np.clip(np.minimum((t - t_min) / (t_opt - t_min), (t_max - t) / (t_max - t_opt)), 0.0, 1.0)
+
+
+# --- 2. MOTOR INCREMENTAL ---
+class MotorSanitario:
+    """
+    Índices de risco de `culturas` (um talhão por item) para os patógenos `alvos` (colunas).
+    avancar() consome um passo (mesmo horário para todos os talhões); talhões sem dado nesse
+    horário (NaN) ou que já passaram dele ficam parados. Passos pulados zeram as janelas.
+    """
+
+    def __init__(self, culturas, alvos=None, passo_horas=PASSO_HORAS, janela_horas=JANELA_HORAS):
+        self.culturas = list(culturas)
+        self.alvos = tuple(alvos or PATOGENOS)
+        self.passo = passo_horas
+        n, k = len(self.culturas), len(self.alvos)
+        p = [[parametros(c, a) for a in self.alvos] for c in self.culturas]
+        campo = lambda nome: np.array([[x[nome] for x in linha] for linha in p], dtype=float).reshape(n, k)
+        self.umid, self.t_min, self.t_opt, self.t_max, self.horas = (campo(c) for c in ('umid', 't_min', 't_opt', 't_max', 'horas'))
+        self.exige_molhamento = campo('molhamento').astype(bool)
+        self.ate = np.zeros(n, dtype=np.int64)               # dt (epoch) do último passo consumido por talhão
+        self.consec = np.zeros((n, k))                        # horas seguidas favoráveis
+        self.acum = np.zeros((n, k))                          # horas favoráveis ponderadas do período atual
+        self.anel = np.zeros((janela_horas // passo_horas, n, k))
+        self.soma = np.zeros((n, k))
+        self.molhado_consec = np.zeros(n)
+        self.anel_molh = np.zeros((JANELA_MOLHAMENTO_HORAS // passo_horas, n))
+        self.soma_molh = np.zeros(n)
+
+    def _zerar_lacunas(self, dt, ativo):
+        # Passos entre o último consumido e `dt` não chegaram: saem das janelas e interrompem os períodos
+        passo_s = self.passo * 3600
+        pulos = np.where(ativo & (self.ate > 0), (dt - self.ate) // passo_s - 1, 0)
+        if not pulos.any():
+            return
+        self.consec[pulos > 0] = 0
+        self.acum[pulos > 0] = 0
+        self.molhado_consec[pulos > 0] = 0
+        for anel, soma in ((self.anel, self.soma), (self.anel_molh, self.soma_molh)):
+            for j in range(1, min(int(pulos.max()), len(anel)) + 1):
+                s, m = (dt // passo_s - j) % len(anel), pulos >= j
+                soma[m] -= anel[s][m]
+                anel[s][m] = 0
+
+    def avancar(self, dt, temp, umid, chuva):
+        """Um passo: temp/umid/chuva com um valor por talhão (ou escalar). Retorna os índices após o passo."""
+        n = len(self.culturas)
+        temp, umid = np.broadcast_to(np.asarray(temp, dtype=float), (n,)), np.broadcast_to(np.asarray(umid, dtype=float), (n,))
+        chuva = np.nan_to_num(np.broadcast_to(np.asarray(chuva, dtype=float), (n,)))
+        dt = int(dt)
+        ativo = (dt > self.ate) & ~np.isnan(temp) & ~np.isnan(umid)
+        if ativo.any():
+            self._zerar_lacunas(dt, ativo)
+            h = self.passo
+            molhado = (umid >= LIMIAR_MOLHAMENTO) | (chuva > 0)
+            peso = resposta_temperatura(temp[:, None], self.t_min, self.t_opt, self.t_max)
+            umido = umid[:, None] >= self.umid
+            favoravel = np.where(self.exige_molhamento, umido | molhado[:, None], umido & ~molhado[:, None]) & (peso > 0)
+            a = ativo[:, None]
+            self.consec = np.where(a, np.where(favoravel, self.consec + h, 0.0), self.consec)
+            acum = np.where(favoravel, self.acum + h * peso, 0.0)
+            # Só entra na janela o período que completou a infecção (no passo em que completa, ele inteiro)
+            infecta = np.where(acum >= self.horas, acum - np.where(self.acum >= self.horas, self.acum, 0.0), 0.0) / self.horas
+            self.acum = np.where(a, acum, self.acum)
+            self.molhado_consec = np.where(ativo, np.where(molhado, self.molhado_consec + h, 0.0), self.molhado_consec)
+            s = dt // (h * 3600)
+            novo = np.where(a, infecta, self.anel[s % len(self.anel)])
+            self.soma += novo - self.anel[s % len(self.anel)]
+            self.anel[s % len(self.anel)] = novo
+            novo_m = np.where(ativo, molhado * float(h), self.anel_molh[s % len(self.anel_molh)])
+            self.soma_molh += novo_m - self.anel_molh[s % len(self.anel_molh)]
+            self.anel_molh[s % len(self.anel_molh)] = novo_m
+            self.ate = np.where(ativo, dt, self.ate)
+        return {'molhamento_24h': self.soma_molh.copy(), 'molhado_consec': self.molhado_consec.copy(),
+                'consec': self.consec.copy(), 'infeccao': self.acum / self.horas,
+                'pressao': np.maximum(self.soma, 0.0) + np.where(self.acum < self.horas, self.acum / self.horas, 0.0)}
+
+    def consumir(self, dt, temp, umid, chuva):
+        """Passos em ordem: dt (passos,), demais (passos, talhões) ou (passos,). Retorna cada índice empilhado (passos, ...)."""
+        saidas = [self.avancar(d, t, u, c) for d, t, u, c in zip(dt, temp, umid, chuva)]
+        if not saidas:
+            return {}
+        return {nome: np.stack([s[nome] for s in saidas]).astype(np.float32) for nome in saidas[0]}
+
+    def copia(self):
+        novo = object.__new__(MotorSanitario)
+        novo.__dict__ = {k: v.copy() if isinstance(v, np.ndarray) else v for k, v in self.__dict__.items()}
+        return novo
+
+    # --- ESTADO (UMA LINHA FLOAT64 POR TALHÃO) ---
+    def assinatura(self):
+        # Layout da linha de estado: estado gravado com outro passo, janela ou lista de patógenos é descartado
+        return f"{self.passo}|{len(self.anel)}|{','.join(self.alvos)}"
+
+    def estado(self):
+        """(talhões, L): ate, molhado_consec, anel_molh, consec, acum e anel de cada talhão numa linha."""
+        n = len(self.culturas)
+        return np.hstack([self.ate[:, None].astype(float), self.molhado_consec[:, None], self.anel_molh.T,
+                          self.consec, self.acum, self.anel.transpose(1, 0, 2).reshape(n, -1)])
+
+    def restaurar(self, linhas, estado):
+        """Carrega `estado` (saída de estado(), uma linha por item de `linhas`) nos talhões `linhas`."""
+        if not len(linhas):
+            return
+        w, wm, k = len(self.anel), len(self.anel_molh), len(self.alvos)
+        cortes = np.cumsum([1, 1, wm, k, k])
+        ate, molh, anel_m, consec, acum, anel = np.split(np.asarray(estado, dtype=float), cortes, axis=1)
+        self.ate[linhas] = ate[:, 0].astype(np.int64)
+        self.molhado_consec[linhas] = molh[:, 0]
+        self.anel_molh[:, linhas] = anel_m.T
+        self.consec[linhas], self.acum[linhas] = consec, acum
+        self.anel[:, linhas] = anel.reshape(len(linhas), w, k).transpose(1, 0, 2)
+        # Somas refeitas do anel: não acumulam erro de arredondamento entre execuções
+        self.soma[linhas] = self.anel[:, linhas].sum(axis=0)
+        self.soma_molh[linhas] = self.anel_molh[:, linhas].sum(axis=0)
+
+
+# --- 3. SÉRIES DE VÁRIAS FAZENDAS ---
+def alinhar(series):
+    """
+    Séries {dt, temp, umid, chuva} (uma por talhão, saída de extrair_serie) -> grade comum de horários
+    e matrizes (passos, talhões); horários ausentes num talhão ficam NaN (o motor não mexe nele).
+    """
+    grade = np.unique(np.concatenate([np.asarray(s['dt'], dtype=np.int64) for s in series] or [np.zeros(0, dtype=np.int64)]))
+    campos = {}
+    for nome in ('temp', 'umid', 'chuva'):
+        m = np.full((len(grade), len(series)), np.nan)
+        for i, s in enumerate(series):
+            m[np.searchsorted(grade, s['dt']), i] = s[nome]
+        campos[nome] = m
+    return grade, campos['temp'], campos['umid'], campos['chuva']
+
+
+def _serie_blob(s):
+    return np.vstack([np.asarray(s[k], dtype=float) for k in ('dt', 'temp', 'umid', 'chuva')]).tobytes()
+
+
+def _ler_serie(blob):
+    if not blob:
+        return None
+    dt, temp, umid, chuva = np.frombuffer(blob).reshape(4, -1)
+    return {'dt': dt.astype(np.int64), 'temp': temp, 'umid': umid, 'chuva': chuva}
+
+
+def _nivel(pressao):
+    return next(nome for limite, nome in NIVEIS if pressao >= limite)
+
+
+def avaliar_fazendas(fazendas, series, hist=None, banco=None):
+    """
+    Risco de todas as fazendas num motor só. `series`: passos 3-horários de cada fazenda (previsão atual).
+    Com `hist`, os passos da previsão anterior que já ocorreram entram no estado gravado antes da projeção,
+    e a previsão atual fica pendente para a próxima execução. Retorna um resumo por fazenda:
+    {'nivel', 'molhamento_max', 'patogenos': [{alvo, agente, nivel, pressao_max, consec_max, inicio}]} (mais grave primeiro).
+    """
+    if banco is None and any(fz.get('cultura') for fz in fazendas):
+        from catalogo import CatalogoTitan  # só quando alguma fazenda informa a cultura
+        banco = CatalogoTitan.carregar().banco
+    motor = MotorSanitario([fz.get('cultura') for fz in fazendas])
+    ids = [fz['id'] for fz in fazendas]
+    if hist is not None:
+        hist.con.executescript(ESQUEMA_PRESSAO)
+        assinatura, gravado = motor.assinatura(), {}
+        for i in range(0, len(ids), 500):   # limite de parâmetros do SQLite
+            lote = ids[i:i + 500]
+            gravado.update({f: (e, p) for f, a, e, p in hist.con.execute(
+                f"SELECT fazenda, assinatura, estado, pendente FROM pressao_sanitaria WHERE fazenda IN ({','.join('?' * len(lote))})",
+                lote) if a == assinatura})
+        linhas = [i for i, f in enumerate(ids) if f in gravado]
+        if linhas:
+            motor.restaurar(linhas, np.vstack([np.frombuffer(gravado[ids[i]][0]) for i in linhas]))
+        vazio = {k: np.zeros(0) for k in ('dt', 'temp', 'umid', 'chuva')}
+        ocorridos = []
+        for f, s in zip(ids, series):
+            pendente = _ler_serie(gravado.get(f, (None, None))[1])
+            # Da previsão anterior, só o que já passou (anterior ao primeiro passo da atual) vira estado
+            if pendente is None or not len(s['dt']):
+                ocorridos.append(vazio)
+            else:
+                corte = pendente['dt'] < s['dt'][0]
+                ocorridos.append({k: v[corte] for k, v in pendente.items()})
+        motor.consumir(*alinhar(ocorridos))
+        estado = motor.estado()
+        with hist.con:
+            hist.con.executemany("INSERT OR REPLACE INTO pressao_sanitaria VALUES (?,?,?,?)",
+                                 [(f, assinatura, estado[i].tobytes(), _serie_blob(s)) for i, (f, s) in enumerate(zip(ids, series))])
+
+    grade, temp, umid, chuva = alinhar(series)
+    proj = motor.copia().consumir(grade, temp, umid, chuva)
+    n, k = len(fazendas), len(motor.alvos)
+    if proj:
+        # Máximos e primeira infecção da previsão de cada fazenda (passos que ela não tem ficam de fora)
+        validos = ~np.isnan(temp)
+        v = validos[:, :, None]
+        pmax = np.where(v, proj['pressao'], 0.0).max(axis=0)
+        cmax = np.where(v, proj['consec'], 0.0).max(axis=0)
+        infec = v & (proj['infeccao'] >= 1)
+        inicio = np.where(infec.any(axis=0), infec.argmax(axis=0), -1)
+        molh = np.where(validos, proj['molhamento_24h'], 0.0).max(axis=0)
+    else:
+        pmax, cmax, inicio, molh = np.zeros((n, k)), np.zeros((n, k)), np.full((n, k), -1), np.zeros(n)
+    resumos = []
+    for i, fz in enumerate(fazendas):
+        pats = []
+        for alvo in patogenos_da_cultura(fz.get('cultura'), banco):
+            j = motor.alvos.index(alvo)
+            pats.append({'alvo': alvo, 'agente': parametros(fz.get('cultura'), alvo)['agente'], 'nivel': _nivel(pmax[i, j]),
+                         'pressao_max': float(pmax[i, j]), 'consec_max': float(cmax[i, j]),
+                         'inicio': rotulo_slot(grade[inicio[i, j]]) if inicio[i, j] >= 0 else None})
+        pats.sort(key=lambda p: -p['pressao_max'])
+        resumos.append({'nivel': pats[0]['nivel'] if pats else "BAIXO", 'patogenos': pats, 'molhamento_max': float(molh[i])})
+    return resumos
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Pressão sanitária (molhamento, umidade e infecção) da frota de fazendas")
+    ap.add_argument("arquivo", nargs="?", default="fazendas.json")
+    ap.add_argument("--sem-historico", action="store_true", help="Só projeta a previsão (não grava o estado)")
+    args = ap.parse_args()
+
+    # Imports do modo lote só na linha de comando: o laudo importa este módulo
+    import clima_alerta as ca
+    from cliente_owm import ClienteOWM
+    from historico import HistoricoAgro
+    from lote_fazendas import buscar_previsoes, carregar_fazendas, avaliar_sanidade
+    fazendas = carregar_fazendas(args.arquivo)
+    cliente = ClienteOWM(ca.OPENWEATHER_API_KEY)
+    try:
+        previsoes = buscar_previsoes(fazendas, cliente)
+    finally:
+        cliente.fechar()
+    if args.sem_historico:
+        riscos = avaliar_sanidade(fazendas, previsoes, None)
+    else:
+        with HistoricoAgro() as hist:
+            riscos = avaliar_sanidade(fazendas, previsoes, hist)
+    for fz in fazendas:
+        r = riscos.get(fz['id'])
+        if r is None:
+            print(f"❌ {fz['nome']:<30} sem previsão")
+            continue
+        pats = ", ".join(f"{p['alvo']} {p['pressao_max']:.1f}" + (f" (infecção {p['inicio']})" if p['inicio'] else "") for p in r['patogenos'])
+        print(f"🦠 {fz['nome']:<30} {r['nivel']:<9} molhamento máx {r['molhamento_max']:.0f}h/24h | {pats}")
@@ -0,0 +1,103 @@
+import math
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+
+from cliente_owm import ClienteOWM
+from metricas import coletor
+
+# --- 1. CONFIGURAÇÃO DO RADAR ---
+TIMEOUT_ESTACAO = 3.0   # segundos por estação (connect + read)
+PRAZO_TOTAL = 8.0       # prazo global da varredura, em segundos
+MAX_WORKERS = 16
+DIRECOES = ["Norte", "Nordeste", "Leste", "Sudeste", "Sul", "Sudoeste", "Oeste", "Noroeste"]
+
+
+def gerar_estacoes_virtuais(lat, lon, raio=0.15, n=4):
+    """Distribui n estações virtuais em círculo (raio em graus) ao redor da coordenada."""
+    estacoes = []
+    for i in range(n):
+        ang = 2 * math.pi * i / n
+        if n == 4 or n == 8:
+            nome = DIRECOES[i * (8 // n) % 8]
+        else:
+            nome = f"{round(math.degrees(ang)):03d}°"
+        estacoes.append({"nome": nome, "lat": lat + raio * math.cos(ang), "lon": lon + raio * math.sin(ang)})
+    return estacoes
+
+
+def _carregar_padrao(cliente, vencido_ok=True):
+    def carregar(estacao):
+        with coletor().fase("radar", estacao=estacao['nome']):
+            return cliente.buscar("weather", estacao['lat'], estacao['lon'], vencido_ok=vencido_ok)
+    return carregar
+
+
+def _expirou(exc):
+    # Read timeout que esgota as repetições do urllib3 chega como ConnectionError(MaxRetryError(ReadTimeoutError))
+    if isinstance(exc, (requests.Timeout, ReadTimeoutError)):
+        return True
+    causa = exc.args[0] if isinstance(exc, requests.ConnectionError) and exc.args else None
+    return isinstance(causa, MaxRetryError) and isinstance(causa.reason, ReadTimeoutError)
+
+
+# --- 2. VARREDURA CONCORRENTE ---
+def buscar_radar(estacoes, key=None, carregar=None, cliente=None,
+                 timeout_estacao=TIMEOUT_ESTACAO, prazo_total=PRAZO_TOTAL, max_workers=MAX_WORKERS, deposito=None, grade=None):
+    """
+    Consulta todas as estações em paralelo e devolve resultados parciais no prazo.
+    Cada item mantém a ordem de `estacoes` e traz 'status': 'ok' | 'timeout' | 'erro'.
+    `carregar(estacao)` substitui a requisição HTTP padrão (ex.: camada de cache).
+    `cliente` (ClienteOWM) compartilha pool, disjuntor e respostas guardadas; sem ele, um cliente
+    próprio com prazo `timeout_estacao` por estação.
+    `deposito` (DepositoClima) serve respostas já aquecidas antes de ir à rede.
+    `grade` (GradeEspacial): estações na mesma célula viram uma consulta, no centro da célula.
+    """
+    if not estacoes:
+        return []
+    if grade is not None:
+        grupos = grade.agrupar(estacoes)
+        # Rótulo com as estações da célula e o geohash: o relatório de tempos ainda diz quais estações demoraram
+        centros = [{"nome": f"{', '.join(estacoes[i]['nome'] for i in indices)} [{h}]", "lat": la, "lon": lo}
+                   for h, (la, lo, indices) in grupos.items()]
+        por_celula = buscar_radar(centros, key, carregar, cliente, timeout_estacao, prazo_total, max_workers, deposito)
+        resultados = [None] * len(estacoes)
+        for r, (_, _, indices) in zip(por_celula, grupos.values()):
+            for i in indices:
+                resultados[i] = {**estacoes[i], "status": r["status"], "dados": r["dados"], "erro": r["erro"]}
+        return resultados
+    if carregar is None:
+        cliente = cliente or ClienteOWM(key, timeout=(min(3.05, timeout_estacao), timeout_estacao), pool=max_workers)
+        # Com depósito, a reserva vencida é a dele (a do cliente seria gravada como nova)
+        carregar = _carregar_padrao(cliente, vencido_ok=deposito is None)
+    if deposito is not None:
+        carregar = deposito.carregador("weather", carregar)
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(estacoes)))
+    futuros = [pool.submit(carregar, e) for e in estacoes]
+    wait(futuros, timeout=prazo_total)
+    # Não bloqueia em estações atrasadas: elas ficam marcadas como timeout
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    resultados = []
+    for e, f in zip(estacoes, futuros):
+        item = {**e, "status": "ok", "dados": None, "erro": None}
+        if not f.done() or f.cancelled():
+            # Ainda na fila quando o prazo acabou (cancelada) ou em andamento: as duas são timeout
+            item["status"] = "timeout"
+        elif f.exception() is not None:
+            exc = f.exception()
+            item["status"] = "timeout" if _expirou(exc) else "erro"
+            item["erro"] = str(exc)
+        else:
+            item["dados"] = f.result()
+        coletor().contar("radar_estacoes", status=item["status"])
+        if item["status"] != "ok":
+            coletor().erro("radar", exc if item["erro"] else TimeoutError(f"sem resposta em {prazo_total}s"), estacao=e['nome'])
+        resultados.append(item)
+    return resultados
+
+
+def estacoes_pendentes(resultados):
+    return [r['nome'] for r in resultados if r['status'] != "ok"]
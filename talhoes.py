@@ -0,0 +1,302 @@
+import argparse
+import json
+import math
+import sqlite3
+import threading
+import time
+
+# ==============================================================================
+# CADASTRO DE TALHÕES (SQLITE + ÍNDICE ESPACIAL R*TREE)
+# Pontos e polígonos desenhados no mapa GIS ficam gravados entre sessões. O
+# retângulo envolvente de cada talhão vai para uma tabela R*Tree do próprio
+# SQLite: a janela visível do mapa, "em qual talhão estou" e "talhão mais
+# próximo" consultam só os candidatos do índice, sem varrer o cadastro. Com
+# muitos talhões na janela, o mapa recebe grupos (contagem por célula) em vez
+# de um marcador por talhão.
+#
+#     python talhoes.py importar desenho.geojson --fazenda ibicoara_sede
+#     python talhoes.py listar [--fazenda ID]
+# ==============================================================================
+ARQUIVO_TALHOES = 'talhoes.db'
+RAIO_TERRA_M = 6371000.0
+LIMITE_MARCADORES = 400     # acima disso, na janela, o mapa recebe grupos por célula
+CELULAS_GRUPO = 12          # células por lado da janela no agrupamento
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS talhoes (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    fazenda TEXT,
+    tipo TEXT NOT NULL,             -- 'ponto' | 'poligono'
+    coords TEXT,                    -- anel do polígono em GeoJSON ([[lon, lat], ...]); NULL para ponto
+    lat REAL NOT NULL,              -- ponto ou centróide do polígono
+    lon REAL NOT NULL,
+    area_ha REAL,
+    criado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_talhoes_fazenda ON talhoes (fazenda);
+CREATE VIRTUAL TABLE IF NOT EXISTS talhoes_idx USING rtree (id, lat_min, lat_max, lon_min, lon_max);
+"""
+
+
+# --- 1. GEOMETRIA ---
+def _metros_por_grau(lat):
+    # Projeção equiretangular local: suficiente na escala de um talhão
+    m = math.pi * RAIO_TERRA_M / 180
+    return m, m * math.cos(math.radians(lat))
+
+
+def anel_geojson(geometria):
+    """Geometria GeoJSON (Polygon ou Point, como exporta o Draw do folium) -> ('poligono', anel) ou ('ponto', (lon, lat))."""
+    tipo, coords = geometria['type'], geometria['coordinates']
+    if tipo == 'Point':
+        return 'ponto', (float(coords[0]), float(coords[1]))
+    if tipo == 'Polygon':
+        anel = [(float(x), float(y)) for x, y in coords[0]]
+        if anel[0] == anel[-1]:
+            anel = anel[:-1]
+        if len(anel) < 3:
+            raise ValueError("Polígono com menos de 3 vértices")
+        return 'poligono', anel
+    raise ValueError(f"Geometria não suportada: {tipo} (use Polygon ou Point)")
+
+
+def centroide_area(anel):
+    """Centróide (lat, lon) e área (ha) do anel [(lon, lat), ...] pela fórmula do laço (shoelace)."""
+    lat0 = sum(y for _, y in anel) / len(anel)
+    my, mx = _metros_por_grau(lat0)
+    a = cx = cy = 0.0
+    for (x1, y1), (x2, y2) in zip(anel, anel[1:] + anel[:1]):
+        c = x1 * y2 - x2 * y1
+        a += c
+        cx += (x1 + x2) * c
+        cy += (y1 + y2) * c
+    if abs(a) < 1e-18:
+        return lat0, sum(x for x, _ in anel) / len(anel), 0.0
+    return cy / (3 * a), cx / (3 * a), abs(a) / 2 * mx * my / 10000
+
+
+def dentro(lat, lon, anel):
+    """Ponto no polígono (cruzamento de raio); anel [(lon, lat), ...]."""
+    res = False
+    for (x1, y1), (x2, y2) in zip(anel, anel[1:] + anel[:1]):
+        if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+            res = not res
+    return res
+
+
+def distancia_m(lat1, lon1, lat2, lon2):
+    my, mx = _metros_por_grau((lat1 + lat2) / 2)
+    return math.hypot((lat2 - lat1) * my, (lon2 - lon1) * mx)
+
+
+def distancia_anel_m(lat, lon, anel):
+    """Distância (m) do ponto à borda do polígono; 0 se estiver dentro."""
+    if dentro(lat, lon, anel):
+        return 0.0
+    my, mx = _metros_por_grau(lat)
+    melhor = math.inf
+    for (x1, y1), (x2, y2) in zip(anel, anel[1:] + anel[:1]):
+        ax, ay, bx, by = (x1 - lon) * mx, (y1 - lat) * my, (x2 - lon) * mx, (y2 - lat) * my
+        dx, dy = bx - ax, by - ay
+        t = 0.0 if dx == dy == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / (dx * dx + dy * dy)))
+        melhor = min(melhor, math.hypot(ax + t * dx, ay + t * dy))
+    return melhor
+
+
+def janela_aproximada(lat, lon, zoom, largura_px=800, altura_px=500):
+    """Janela (sul, oeste, norte, leste) de um mapa Web Mercator centrado em (lat, lon) antes do navegador informar a real."""
+    graus_px = 360 / (256 * 2 ** zoom)
+    meia_lon, meia_lat = largura_px / 2 * graus_px, altura_px / 2 * graus_px * math.cos(math.radians(lat))
+    return lat - meia_lat, lon - meia_lon, lat + meia_lat, lon + meia_lon
+
+
+def janela_folium(bounds):
+    """`bounds` do st_folium ({'_southWest': {lat, lng}, '_northEast': {...}}) -> (sul, oeste, norte, leste) ou None."""
+    try:
+        so, ne = bounds['_southWest'], bounds['_northEast']
+        return float(so['lat']), float(so['lng']), float(ne['lat']), float(ne['lng'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+# --- 2. CADASTRO ---
+class RegistroTalhoes:
+    def __init__(self, caminho=ARQUIVO_TALHOES):
+        self.caminho = caminho
+        # check_same_thread=False: o dashboard compartilha o cadastro entre as sessões (cache_resource);
+        # a conexão sqlite3 não é segura entre threads, então todo uso passa pelo _lock
+        self.con = sqlite3.connect(caminho, check_same_thread=False)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.executescript(ESQUEMA)
+        self._lock = threading.Lock()
+
+    def fechar(self):
+        with self._lock:
+            self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # --- INCLUSÃO ---
+    def _inserir(self, nome, fazenda, tipo, anel, lat, lon, area, caixa):
+        with self._lock, self.con:
+            cur = self.con.execute("INSERT INTO talhoes (nome, fazenda, tipo, coords, lat, lon, area_ha, criado_em) VALUES (?,?,?,?,?,?,?,?)",
+                                   (nome, fazenda, tipo, json.dumps(anel) if anel else None, lat, lon, area, time.time()))
+            self.con.execute("INSERT INTO talhoes_idx VALUES (?,?,?,?,?)", (cur.lastrowid, *caixa))
+        return cur.lastrowid
+
+    def adicionar_ponto(self, nome, lat, lon, fazenda=None):
+        lat, lon = float(lat), float(lon)
+        return self._inserir(nome, fazenda, 'ponto', None, lat, lon, None, (lat, lat, lon, lon))
+
+    def adicionar_poligono(self, nome, anel, fazenda=None):
+        """`anel`: [(lon, lat), ...] (ordem GeoJSON), aberto ou fechado."""
+        anel = [(float(x), float(y)) for x, y in anel]
+        if anel[0] == anel[-1]:
+            anel = anel[:-1]
+        lat, lon, area = centroide_area(anel)
+        lats, lons = [y for _, y in anel], [x for x, _ in anel]
+        return self._inserir(nome, fazenda, 'poligono', anel, lat, lon, area, (min(lats), max(lats), min(lons), max(lons)))
+
+    def adicionar_geojson(self, geojson, nome=None, fazenda=None):
+        """Feature, FeatureCollection ou geometria (saída do Draw). Retorna os ids criados."""
+        if geojson.get('type') == 'FeatureCollection':
+            return [i for f in geojson['features'] for i in self.adicionar_geojson(f, nome, fazenda)]
+        props = geojson.get('properties') or {}
+        tipo, g = anel_geojson(geojson.get('geometry', geojson))
+        nome = nome or props.get('nome') or props.get('name') or f"Talhão {self.contar() + 1}"
+        if tipo == 'ponto':
+            return [self.adicionar_ponto(nome, g[1], g[0], fazenda)]
+        return [self.adicionar_poligono(nome, g, fazenda)]
+
+    def remover(self, ids):
+        ids = [int(i) for i in ids]
+        with self._lock, self.con:
+            self.con.executemany("DELETE FROM talhoes WHERE id = ?", [(i,) for i in ids])
+            self.con.executemany("DELETE FROM talhoes_idx WHERE id = ?", [(i,) for i in ids])
+
+    # --- CONSULTAS ---
+    def _linha(self, r):
+        return {'id': r[0], 'nome': r[1], 'fazenda': r[2], 'tipo': r[3], 'anel': json.loads(r[4]) if r[4] else None,
+                'lat': r[5], 'lon': r[6], 'area_ha': r[7]}
+
+    def _consultar(self, sql, args=()):
+        with self._lock:
+            return self.con.execute(sql, args).fetchall()
+
+    def contar(self, fazenda=None):
+        if fazenda is None:
+            return self._consultar("SELECT COUNT(*) FROM talhoes")[0][0]
+        return self._consultar("SELECT COUNT(*) FROM talhoes WHERE fazenda = ?", (fazenda,))[0][0]
+
+    def listar(self, fazenda=None):
+        sql, args = "SELECT id, nome, fazenda, tipo, coords, lat, lon, area_ha FROM talhoes", ()
+        if fazenda is not None:
+            sql, args = sql + " WHERE fazenda = ?", (fazenda,)
+        return [self._linha(r) for r in self._consultar(sql + " ORDER BY id", args)]
+
+    def na_janela(self, sul, oeste, norte, leste, limite=None):
+        """Talhões cujo retângulo cruza a janela (sul, oeste, norte, leste), pelo índice R*Tree."""
+        sql = """SELECT t.id, t.nome, t.fazenda, t.tipo, t.coords, t.lat, t.lon, t.area_ha
+                 FROM talhoes_idx i JOIN talhoes t ON t.id = i.id
+                 WHERE i.lat_max >= ? AND i.lat_min <= ? AND i.lon_max >= ? AND i.lon_min <= ?"""
+        args = (sul, norte, oeste, leste)
+        if limite is not None:
+            sql, args = sql + " LIMIT ?", args + (int(limite),)
+        return [self._linha(r) for r in self._consultar(sql, args)]
+
+    def contar_janela(self, sul, oeste, norte, leste):
+        return self._consultar("SELECT COUNT(*) FROM talhoes_idx WHERE lat_max >= ? AND lat_min <= ? AND lon_max >= ? AND lon_min <= ?",
+                               (sul, norte, oeste, leste))[0][0]
+
+    def agrupar(self, sul, oeste, norte, leste, celulas=CELULAS_GRUPO):
+        """Contagem de talhões por célula de uma grade celulas x celulas sobre a janela: [(lat, lon, n)] (posição média)."""
+        d_lat, d_lon = (norte - sul) / celulas or 1e-9, (leste - oeste) / celulas or 1e-9
+        cur = self._consultar("""
+            SELECT AVG(t.lat), AVG(t.lon), COUNT(*)
+            FROM talhoes_idx i JOIN talhoes t ON t.id = i.id
+            WHERE i.lat_max >= ? AND i.lat_min <= ? AND i.lon_max >= ? AND i.lon_min <= ?
+            GROUP BY CAST((t.lat - ?) / ? AS INTEGER), CAST((t.lon - ?) / ? AS INTEGER)""",
+                              (sul, norte, oeste, leste, sul, d_lat, oeste, d_lon))
+        return [(la, lo, n) for la, lo, n in cur]
+
+    def contendo(self, lat, lon):
+        """Polígonos que contêm o ponto (candidatos pelo índice, teste exato no anel)."""
+        return [t for t in self.na_janela(lat, lon, lat, lon) if t['tipo'] == 'poligono' and dentro(lat, lon, t['anel'])]
+
+    def _distancia(self, t, lat, lon):
+        return distancia_anel_m(lat, lon, t['anel']) if t['tipo'] == 'poligono' else distancia_m(lat, lon, t['lat'], t['lon'])
+
+    def mais_proximos(self, lat, lon, k=1, raio_inicial_m=200.0, raio_max_m=200000.0):
+        """
+        Os `k` talhões mais próximos (distância à borda; dentro = 0) -> [(talhão, metros)].
+        A busca no índice começa num quadrado de `raio_inicial_m` e dobra até que os k melhores
+        estejam a menos que o raio (nenhum talhão fora do quadrado pode estar mais perto).
+        """
+        raio = raio_inicial_m
+        while True:
+            my, mx = _metros_por_grau(lat)
+            d_lat, d_lon = raio / my, raio / max(mx, 1e-9)
+            candidatos = self.na_janela(lat - d_lat, lon - d_lon, lat + d_lat, lon + d_lon)
+            melhores = sorted(((t, self._distancia(t, lat, lon)) for t in candidatos), key=lambda x: x[1])[:k]
+            if (len(melhores) == k and melhores[-1][1] <= raio) or raio >= raio_max_m:
+                return [m for m in melhores if m[1] <= raio_max_m]
+            raio *= 2
+
+    def fazendas(self):
+        """Retângulo envolvente de cada fazenda: {fazenda: (sul, oeste, norte, leste)}."""
+        cur = self._consultar("""SELECT t.fazenda, MIN(i.lat_min), MIN(i.lon_min), MAX(i.lat_max), MAX(i.lon_max)
+                                 FROM talhoes_idx i JOIN talhoes t ON t.id = i.id GROUP BY t.fazenda""")
+        return {f: tuple(c) for f, *c in cur}
+
+
+# --- 3. CAMADA DO MAPA ---
+def camada_mapa(registro, janela, zoom, limite=LIMITE_MARCADORES):
+    """
+    FeatureGroup do folium só com o que está na janela: polígonos e marcadores agrupados
+    (MarkerCluster) ou, com mais de `limite` talhões, um círculo por célula com a contagem.
+    Retorna (camada, talhões na janela).
+    """
+    import folium  # o dashboard só importa o folium quando a aba do mapa abre
+    from folium.plugins import MarkerCluster
+    camada = folium.FeatureGroup(name="Talhões")
+    n = registro.contar_janela(*janela)
+    if n > limite:
+        for lat, lon, qtd in registro.agrupar(*janela):
+            folium.CircleMarker([lat, lon], radius=8 + 4 * math.log10(qtd), color='#f59e0b', fill=True, fill_opacity=0.7,
+                                tooltip=f"{qtd} talhões").add_to(camada)
+        return camada, n
+    grupo = MarkerCluster(disableClusteringAtZoom=17).add_to(camada)
+    for t in registro.na_janela(*janela):
+        rotulo = t['nome'] + (f" ({t['area_ha']:.1f} ha)" if t['area_ha'] else "")
+        if t['tipo'] == 'poligono':
+            folium.Polygon([(y, x) for x, y in t['anel']], color='#22c55e', weight=2, fill=True, fill_opacity=0.15,
+                           tooltip=rotulo).add_to(camada)
+        folium.Marker([t['lat'], t['lon']], popup=rotulo, tooltip=t['nome']).add_to(grupo)
+    return camada, n
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Cadastro de talhões (pontos e polígonos)")
+    ap.add_argument("--banco", default=ARQUIVO_TALHOES)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    im = sub.add_parser("importar", help="Importa um GeoJSON (exportado pelo Draw do mapa ou de outro GIS)")
+    im.add_argument("arquivo")
+    im.add_argument("--fazenda")
+    ls = sub.add_parser("listar")
+    ls.add_argument("--fazenda")
+    args = ap.parse_args()
+
+    with RegistroTalhoes(args.banco) as reg:
+        if args.cmd == "importar":
+            with open(args.arquivo, 'r', encoding='utf-8') as f:
+                ids = reg.adicionar_geojson(json.load(f), fazenda=args.fazenda)
+            print(f"{len(ids)} talhões importados ({reg.contar()} no cadastro)")
+        else:
+            for t in reg.listar(args.fazenda):
+                area = f"{t['area_ha']:8.2f} ha" if t['area_ha'] else " " * 11
+                print(f"{t['id']:6d} {t['nome']:<30} {t['tipo']:<9} {area} {t['lat']:.5f}, {t['lon']:.5f} {t['fazenda'] or ''}")
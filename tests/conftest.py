@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Módulos do projeto ficam na raiz (mesmo esquema dos benchmarks)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -0,0 +1,30 @@
+import numpy as np
+
+from agregacao import FUSO_BRASIL, PASSOS_DIA, agregar_diario, extrair_serie, previsao_diaria
+
+MEIA_NOITE_LOCAL = 1767236400    # 01/01/2026 00h em UTC-3
+
+
+def _payload(hora_inicio, passos=40, chuva=1.0):
+    dt0 = MEIA_NOITE_LOCAL + hora_inicio * 3600
+    return {'list': [{'dt': dt0 + 10800 * i, 'main': {'temp': 20.0, 'humidity': 70}, 'rain': {'3h': chuva}}
+                     for i in range(passos)]}
+
+
+def test_primeiro_dia_que_comeca_na_hora_da_rodada_e_escalado():
+    # Rodada das 15h: hoje tem só 3 passos (15h, 18h, 21h); amanhã em diante, 8
+    diario, _ = agregar_diario(extrair_serie(_payload(15)), fuso=FUSO_BRASIL)
+    assert list(diario['n_slots'][:2]) == [3, 8]
+    assert list(diario['parcial']) == [True] + [False] * (len(diario['dia']) - 1)
+    # 1 mm por passo: o total de hoje vale o dia inteiro, como os demais
+    np.testing.assert_allclose(diario['chuva'], PASSOS_DIA * 1.0)
+    np.testing.assert_allclose(diario['etc'][0], diario['etc'][1])
+    assert diario['temp_med'][0] == 20.0
+
+
+def test_rodada_a_meia_noite_nao_escala_e_laudo_recebe_a_marca():
+    diario, _ = agregar_diario(extrair_serie(_payload(0)), fuso=FUSO_BRASIL)
+    assert not diario['parcial'].any() and list(diario['n_slots']) == [8] * 5
+    prev = previsao_diaria(_payload(15))
+    assert prev[0]['parcial'] and not prev[1]['parcial'] and prev[0]['chuva'] == prev[1]['chuva'] == 8.0
+    assert prev[0]['dia'] == "2026-01-01" and len(prev) == 5   # 3 + 4x8 + 5: o último (5 passos) sai
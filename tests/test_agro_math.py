@@ -0,0 +1,37 @@
+import numpy as np
+
+from agro_math import FATOR_RAD, AgroMathVetorial
+from clima_alerta import calc_agro
+
+TEMP = np.round(np.linspace(-5.0, 45.0, 101), 1)
+UMID = np.linspace(5.0, 100.0, 20)
+
+
+def _grade():
+    t, u = np.meshgrid(TEMP, UMID)
+    return t.ravel(), u.ravel()
+
+
+def test_vpd_e_delta_t_iguais_ao_calculo_escalar():
+    t, u = _grade()
+    escalar = np.array([calc_agro(a, b) for a, b in zip(t, u)])
+    np.testing.assert_array_equal(AgroMathVetorial.calc_delta_t(t, u), escalar[:, 0])
+    np.testing.assert_array_equal(AgroMathVetorial.calc_vpd(t, u), escalar[:, 1])
+
+
+def test_etc_igual_ao_calculo_escalar():
+    # Mesma fórmula de AgroMath.calc_etc (app.py); lá a temperatura negativa nem chega
+    for temp in TEMP[TEMP >= 0]:
+        for kc in (0.4, 0.95, 1.15):
+            et0 = 0.0023 * (temp + 17.8) * (temp ** 0.5) * 0.408 * FATOR_RAD
+            assert AgroMathVetorial.calc_etc(temp, kc) == round(et0 * kc, 2)
+    assert np.all(AgroMathVetorial.calc_et0(TEMP[TEMP < 0]) == 0)
+
+
+def test_gda_e_lote_com_kc_por_talhao():
+    t = np.array([8.0, 10.0, 25.5])
+    np.testing.assert_array_equal(AgroMathVetorial.calc_gda(t, 10.0), [0.0, 0.0, 15.5])
+    lote = AgroMathVetorial.calc_lote(t, np.array([40.0, 60.0, 80.0]), np.array([0.5, 1.0, 1.2]), 10.0)
+    for i in range(3):
+        assert lote['ETc'][i] == AgroMathVetorial.calc_etc(t[i], [0.5, 1.0, 1.2][i])
+        assert lote['VPD'][i] == AgroMathVetorial.calc_vpd(t[i], [40.0, 60.0, 80.0][i])
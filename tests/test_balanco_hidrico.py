@@ -0,0 +1,53 @@
+import numpy as np
+
+from balanco_hidrico import FRACAO_CHUVA_MIN, resumo, simular
+
+
+def laco_python(et0, chuva, kc, taw, p):
+    """Mesmas equações de simular(), um talhão e um dia por vez (referência de benchmarks/bench_balanco.py)."""
+    dr_tudo, irrig_tudo = [], []
+    for t in range(len(kc)):
+        dr, serie_dr, serie_irrig = 0.0, [], []
+        for e, c in zip(et0[t], chuva[t]):
+            etc = kc[t] * e
+            p_dia = min(max(p[t] + 0.04 * (5.0 - etc), 0.1), 0.8)
+            raw = p_dia * taw[t]
+            ks = min(max((taw[t] - dr) / ((1.0 - p_dia) * taw[t]), 0.0), 1.0)
+            dr = dr - (c if c >= FRACAO_CHUVA_MIN * e else 0.0) + ks * etc
+            dr = min(max(dr, 0.0), taw[t])
+            lamina = dr if dr >= raw else 0.0
+            dr -= lamina
+            serie_dr.append(dr)
+            serie_irrig.append(lamina)
+        dr_tudo.append(serie_dr)
+        irrig_tudo.append(serie_irrig)
+    return np.array(dr_tudo), np.array(irrig_tudo)
+
+
+def _frota(n, dias, semente=7):
+    rng = np.random.default_rng(semente)
+    et0 = rng.uniform(2.0, 7.0, (n, dias))
+    chuva = np.where(rng.random((n, dias)) < 0.25, rng.exponential(12.0, (n, dias)), 0.0)
+    return et0, chuva, rng.uniform(0.4, 1.2, n), rng.uniform(30.0, 180.0, n), rng.uniform(0.3, 0.55, n)
+
+
+def test_vetorizado_igual_ao_laco_python():
+    et0, chuva, kc, taw, p = _frota(40, 120)
+    res = simular(et0, chuva, kc, taw, p)
+    dr, irrig = laco_python(et0, chuva, kc, taw, p)
+    # Saídas em float32: compara com a tolerância do tipo
+    np.testing.assert_allclose(res['dr'], dr, rtol=1e-5, atol=1e-4)
+    np.testing.assert_allclose(res['irrig'], irrig, rtol=1e-5, atol=1e-4)
+    np.testing.assert_array_equal(res['irrig'] > 0, irrig > 0)
+    tot = resumo(res)
+    np.testing.assert_allclose(tot['lamina_liquida'], irrig.sum(axis=1), rtol=1e-5)
+    np.testing.assert_array_equal(tot['irrigacoes'], (irrig > 0).sum(axis=1))
+
+
+def test_serie_comum_e_chuva_abaixo_do_minimo():
+    # Série (dias,) comum a todos os talhões; chuva fraca (< FRACAO_CHUVA_MIN x ET0) não repõe nada
+    et0 = np.full(10, 5.0)
+    chuva = np.full(10, FRACAO_CHUVA_MIN * 5.0 - 0.01)
+    res = simular(et0, chuva, 1.0, np.array([100.0, 100.0]), 0.5, irrigar=False)
+    assert res['dr'].shape == (2, 10)
+    np.testing.assert_allclose(res['dr'][:, -1], 50.0, atol=1e-4)
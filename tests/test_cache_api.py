@@ -0,0 +1,48 @@
+import time
+
+from cache_api import CacheTTL
+
+
+def test_expira_por_endpoint_e_idade():
+    cache = CacheTTL(ttls={"weather": 0.05, "forecast": 3600, "geo": None})
+    tempo, previsao, geo = CacheTTL.chave("weather", 1, 2), CacheTTL.chave("forecast", 1, 2), CacheTTL.chave("geo", "Ibicoara")
+    cache.put(tempo, {"t": 1})
+    cache.put(previsao, {"p": 1}, idade=3601)   # veio do depósito já vencido
+    cache.put(geo, [1])
+    assert cache.get(tempo) == {"t": 1} and cache.get(previsao) is None
+    time.sleep(0.06)
+    assert cache.get(tempo) is None and cache.get(geo) == [1]
+    assert len(cache) == 1 and (cache.hits, cache.misses) == (2, 2)
+
+
+def test_despejo_lru():
+    cache = CacheTTL(max_itens=3, ttls={"geo": None})
+    chaves = [CacheTTL.chave("geo", i) for i in range(4)]
+    for c in chaves[:3]:
+        cache.put(c, c)
+    cache.get(chaves[0])          # 0 passa a ser o mais recente; 1 é o próximo a sair
+    cache.put(chaves[3], chaves[3])
+    assert len(cache) == 3 and cache.get(chaves[1]) is None
+    assert all(cache.get(c) == c for c in (chaves[0], chaves[2], chaves[3]))
+
+
+def test_obter_carrega_uma_vez_e_nao_guarda_falha():
+    cache, chamadas = CacheTTL(ttls={"geo": None}), []
+
+    def carregar():
+        chamadas.append(1)
+        return {"ok": True}
+
+    chave = CacheTTL.chave("geo", "x")
+    assert cache.obter(chave, carregar) == cache.obter(chave, carregar) == {"ok": True}
+    assert len(chamadas) == 1
+
+    def falhar():
+        raise RuntimeError("fora do ar")
+
+    outra = CacheTTL.chave("geo", "y")
+    try:
+        cache.obter(outra, falhar)
+    except RuntimeError:
+        pass
+    assert cache.get(outra) is None
@@ -0,0 +1,51 @@
+import os
+from datetime import date, timedelta
+
+from caderno import SEM_MANEJO, CadernoCSV
+
+
+def _preencher(cad, inicio, dias):
+    for i in range(dias):
+        d = inicio + timedelta(days=i)
+        cad.registrar(d, 20 + i % 5, 0.8, 3.1, SEM_MANEJO if i % 2 else f"Manejo {i}")
+
+
+def test_indice_um_bloco_por_dia_e_leitura_por_periodo(tmp_path):
+    cad = CadernoCSV(str(tmp_path / "caderno.csv"))
+    _preencher(cad, date(2026, 1, 1), 40)
+    cad.registrar(date(2026, 2, 9), 25, 1.0, 4.0, "Segundo registro do dia")
+    with open(cad.caminho_indice, encoding='utf-8') as f:
+        indice = [l.split() for l in f]
+    assert len(indice) == 40 and indice[0][0] == "2026-01-01" and indice[-1][0] == "2026-02-09"
+    regs = list(cad.registros(inicio="2026-02-01"))
+    assert [r['data'] for r in regs] == [f"2026-02-{d:02d}" for d in range(1, 10)] + ["2026-02-09"]
+    assert regs[-1]['manejo'] == "Segundo registro do dia"
+    assert len(cad.ultimos(5, hoje=date(2026, 2, 9))) == 6
+    bloco = list(cad.blocos(inicio="2026-01-30", linhas=4))
+    assert [len(b['data']) for b in bloco] == [4, 4, 4] and str(bloco[0]['data'][0]) == "2026-01-30"
+
+
+def test_indice_reconstruido_apos_edicao_manual(tmp_path):
+    caminho = str(tmp_path / "caderno.csv")
+    _preencher(CadernoCSV(caminho), date(2026, 3, 1), 10)
+    # Edição manual no início desloca todos os offsets: o índice gravado fica inválido
+    with open(caminho, encoding='utf-8', newline='') as f:
+        linhas = f.readlines()
+    linhas.insert(1, "28/02/2026,19,0.7,2.9,Registro esquecido\r\n")
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(linhas)
+    cad = CadernoCSV(caminho)
+    assert [r['data'] for r in cad.registros()][:2] == ["2026-02-28", "2026-03-01"]
+    assert len(list(cad.registros(inicio="2026-03-05"))) == 6
+    os.remove(cad.caminho_indice)
+    cad = CadernoCSV(caminho)
+    assert len(list(cad.registros(inicio="2026-03-10"))) == 1 and os.path.exists(cad.caminho_indice)
+
+
+def test_compactar_mantem_leitura_completa(tmp_path):
+    cad = CadernoCSV(str(tmp_path / "caderno.csv"))
+    _preencher(cad, date(2026, 1, 1), 120)
+    arquivados = cad.compactar(manter_meses=2, hoje=date(2026, 4, 30))
+    assert arquivados == {"2026-01": 31, "2026-02": 28}
+    assert len(list(cad.registros())) == 120
+    assert len(list(cad.registros(arquivados=False))) == 61
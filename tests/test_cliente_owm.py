@@ -0,0 +1,58 @@
+import time
+
+import pytest
+import requests
+
+from cliente_owm import ClienteOWM
+
+
+class SessaoFalsa:
+    """Devolve as respostas/erros da fila, em ordem."""
+
+    def __init__(self, *respostas):
+        self.respostas = list(respostas)
+        self.chamadas = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.chamadas += 1
+        r = self.respostas.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        resp = requests.Response()
+        resp.status_code, resp._content = 200, r
+        return resp
+
+    def close(self):
+        pass
+
+
+def _cliente(sessao, **kw):
+    return ClienteOWM("k", sessao=sessao, ttls={"weather": 0.05}, **kw)
+
+
+def test_vencida_na_janela_responde_na_hora_e_revalida():
+    sessao = SessaoFalsa(b'{"v": 1}', b'{"v": 2}')
+    cli = _cliente(sessao)
+    assert cli.buscar("weather", 1.0, 2.0) == {"v": 1}
+    time.sleep(0.06)
+    assert cli.buscar("weather", 1.0, 2.0) == {"v": 1}      # vencida: servida já
+    assert cli.servidos_vencidos == 1
+    for _ in range(50):
+        if sessao.chamadas == 2:
+            break
+        time.sleep(0.01)
+    time.sleep(0.02)
+    assert cli.buscar("weather", 1.0, 2.0) == {"v": 2}
+    cli.fechar()
+
+
+def test_fora_da_janela_ou_sem_reserva_a_falha_sobe():
+    sessao = SessaoFalsa(b'{"v": 1}', requests.ConnectionError("fora"), requests.ConnectionError("fora"))
+    cli = _cliente(sessao, janela_vencida=0.05)
+    cli.buscar("weather", 1.0, 2.0)
+    time.sleep(0.11)
+    with pytest.raises(requests.ConnectionError):
+        cli.buscar("weather", 1.0, 2.0)
+    with pytest.raises(requests.ConnectionError):
+        cli.buscar("weather", 3.0, 4.0, vencido_ok=False)
+    cli.fechar()
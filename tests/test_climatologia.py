@@ -0,0 +1,78 @@
+import json
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+from climatologia import ATRASO_ARQUIVO, VARIAVEIS, CacheClimatologia, FonteCSV
+from grade_espacial import GradeEspacial
+from historico import id_local
+
+LAT, LON = -13.414, -41.285
+
+
+class FonteFalsa:
+    """Reanálise de mentira: valor = dia do ano; dias depois de `ultimo` vêm null (arquivo atrasado)."""
+    nome = "falsa"
+
+    def __init__(self, ultimo=None):
+        self.ultimo, self.pedidos = ultimo, []
+
+    def diario(self, lat, lon, inicio, fim):
+        self.pedidos.append((inicio, fim))
+        dias = [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+        valor = lambda d: None if self.ultimo and d > self.ultimo else float(d.timetuple().tm_yday)
+        return {'dia': [d.isoformat() for d in dias], **{v: [valor(d) for d in dias] for v in VARIAVEIS}}
+
+    def horario(self, lat, lon, inicio, fim):
+        return None
+
+
+def _cache(tmp_path, fonte):
+    return CacheClimatologia(str(tmp_path), fonte, grade=GradeEspacial(None))
+
+
+def test_um_npy_float32_por_ano_e_meta_emendada(tmp_path):
+    fonte = FonteFalsa()
+    clima = _cache(tmp_path, fonte)
+    assert clima.completar(LAT, LON, date(2023, 12, 1), date(2024, 1, 31), hoje=date(2025, 1, 1)) == 62
+    pasta = os.path.join(str(tmp_path), id_local(LAT, LON))
+    a23, a24 = np.load(os.path.join(pasta, "2023.npy")), np.load(os.path.join(pasta, "2024.npy"))
+    assert a23.dtype == np.float32 and a23.shape == (365, len(VARIAVEIS)) and a24.shape == (366, len(VARIAVEIS))
+    assert a23[334, 0] == 335 and np.isnan(a23[333]).all() and a24[30, 3] == 31 and np.isnan(a24[31]).all()
+
+    # Estender o ano de 2024 pede só o trecho novo e emenda o meta.json
+    assert clima.completar(LAT, LON, date(2024, 1, 1), date(2024, 3, 31), hoje=date(2025, 1, 1)) == 60
+    assert fonte.pedidos[-1] == (date(2024, 2, 1), date(2024, 3, 31))
+    with open(os.path.join(pasta, "meta.json"), encoding='utf-8') as f:
+        meta = json.load(f)
+    assert meta == {"2023": ["2023-12-01", "2023-12-31"], "2024": ["2024-01-01", "2024-03-31"], "fonte": "falsa"}
+    assert clima.completar(LAT, LON, date(2023, 12, 15), date(2024, 2, 15), hoje=date(2025, 1, 1)) == 0
+
+
+def test_atraso_do_arquivo_e_dias_vazios_pedidos_de_novo(tmp_path):
+    hoje = date(2025, 3, 20)
+    fonte = FonteFalsa(ultimo=date(2025, 3, 10))
+    clima = _cache(tmp_path, fonte)
+    assert clima.completar(LAT, LON, date(2025, 3, 1), hoje, hoje=hoje) == 15   # só até hoje - ATRASO_ARQUIVO
+    d = clima.diario(LAT, LON, date(2025, 3, 1), hoje, completar=False)
+    assert fonte.pedidos == [(date(2025, 3, 1), hoje - timedelta(days=ATRASO_ARQUIVO))]
+    assert d['t_min'][9] == 69 and np.isnan(d['t_min'][10:]).all()
+
+    # A reanálise alcançou os dias que vieram null: eles são pedidos de novo, os já guardados não
+    fonte.ultimo = None
+    clima.completar(LAT, LON, date(2025, 3, 1), hoje, hoje=hoje)
+    assert fonte.pedidos[-1] == (date(2025, 3, 11), date(2025, 3, 15))
+    d = clima.diario(LAT, LON, date(2025, 3, 1), date(2025, 3, 15), completar=False)
+    assert not np.isnan(d['t_min']).any()
+
+
+def test_fonte_csv_com_buracos(tmp_path):
+    csv = tmp_path / "estacao_{local}.csv"
+    caminho = str(csv).format(local=id_local(LAT, LON))
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write("data,chuva,et0,t_min,t_max\n01/01/2024,5.0,4.1,16,28\n2024-01-02,,4.0,15,29\n2024-01-04,1.2,3.9,17,30\n")
+    clima = CacheClimatologia(str(tmp_path / "cache"), FonteCSV(str(csv)), grade=GradeEspacial(None))
+    d = clima.diario(LAT, LON, date(2024, 1, 1), date(2024, 1, 4))
+    np.testing.assert_array_equal(d['t_max'], [28, 29, np.nan, 30])
+    assert np.isnan(d['chuva'][1]) and d['chuva'][0] == 5.0
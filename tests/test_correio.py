@@ -0,0 +1,64 @@
+import smtplib
+from email.message import EmailMessage
+
+import pytest
+
+from correio import DespachanteEmail, _transitorio
+
+
+class SMTPFalso:
+    """Conexão SMTP de mentira: `falhas` é a fila de exceções lançadas por send_message (None = envia)."""
+    conexoes = []
+
+    def __init__(self, host, porta, timeout=None):
+        self.enviadas, self.fechada = [], False
+        SMTPFalso.conexoes.append(self)
+
+    def send_message(self, msg):
+        erro = SMTPFalso.falhas.pop(0) if SMTPFalso.falhas else None
+        if erro is not None:
+            raise erro
+        self.enviadas.append(msg)
+
+    def quit(self):
+        self.fechada = True
+
+
+@pytest.fixture
+def despachante():
+    SMTPFalso.conexoes, SMTPFalso.falhas = [], []
+    return DespachanteEmail(fabrica=SMTPFalso, backoff=0.0, max_por_minuto=None)
+
+
+def _msg(para):
+    m = EmailMessage()
+    m["To"] = para
+    return m
+
+
+def test_classificacao_de_erros():
+    assert _transitorio(smtplib.SMTPServerDisconnected("caiu"))
+    assert _transitorio(ConnectionResetError())
+    assert _transitorio(smtplib.SMTPResponseException(421, b"ocupado"))
+    assert not _transitorio(smtplib.SMTPResponseException(550, b"nao"))
+    assert not _transitorio(smtplib.SMTPNotSupportedError("sem STARTTLS"))
+    assert not _transitorio(smtplib.SMTPException("permanente sem código"))
+    assert not _transitorio(smtplib.SMTPSenderRefused(553, b"remetente", "a@b"))
+
+
+def test_destinatario_recusado_mantem_a_conexao(despachante):
+    SMTPFalso.falhas = [smtplib.SMTPRecipientsRefused({"x@y": (550, b"nao existe")})]
+    res = despachante.enviar_lote([_msg("x@y"), _msg("a@b")])
+    assert isinstance(res[0][1], smtplib.SMTPRecipientsRefused) and res[1][1] is None
+    assert len(SMTPFalso.conexoes) == 1 and not SMTPFalso.conexoes[0].fechada
+    assert despachante.enviados == 1
+
+
+def test_erro_transitorio_reconecta_e_permanente_nao_repete(despachante):
+    SMTPFalso.falhas = [smtplib.SMTPServerDisconnected("caiu")]
+    despachante.enviar(_msg("a@b"))
+    assert len(SMTPFalso.conexoes) == 2 and despachante.enviados == 1
+    SMTPFalso.falhas = [smtplib.SMTPNotSupportedError("nao")]
+    with pytest.raises(smtplib.SMTPNotSupportedError):
+        despachante.enviar(_msg("a@b"))
+    assert len(SMTPFalso.conexoes) == 2
@@ -0,0 +1,28 @@
+import pytest
+
+from deposito_clima import DepositoClima, deposito_padrao
+from grade_espacial import GradeEspacial
+from lote_fazendas import executar_lote
+
+
+def test_grade_do_deposito_decide_o_compartilhamento(tmp_path):
+    fina = DepositoClima(str(tmp_path / "fina.db"), grade=GradeEspacial(6))
+    fina.gravar("forecast", -13.4140, -41.2850, {"p": 1})
+    # ~2 km ao lado: mesma célula geohash-5, células diferentes na geohash-6
+    assert fina.ler("forecast", -13.4140, -41.2650) is None
+    sem_grade = DepositoClima(str(tmp_path / "sem.db"), grade=GradeEspacial(None))
+    sem_grade.gravar("forecast", -13.4140, -41.2850, {"p": 1})
+    assert sem_grade.ler("forecast", -13.4141, -41.2850) is None
+    assert sem_grade.ler("forecast", -13.4140, -41.2850)[0] == {"p": 1}
+
+
+def test_deposito_padrao_usa_a_grade_pedida(tmp_path):
+    grade = GradeEspacial(6)
+    assert deposito_padrao(str(tmp_path / "d.db"), criar=True, grade=grade).grade is grade
+    assert deposito_padrao(str(tmp_path / "nao_existe.db")) is None
+
+
+def test_lote_recusa_deposito_em_outra_grade(tmp_path):
+    deposito = DepositoClima(str(tmp_path / "d.db"), grade=GradeEspacial(5))
+    with pytest.raises(ValueError):
+        executar_lote([], deposito=deposito, grade=GradeEspacial(6))
@@ -0,0 +1,65 @@
+import io
+import random
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from diagnostico_ia import ClienteFalso, PipelineDiagnostico
+
+
+def _foto(semente=0, lado=640, qualidade=90):
+    """Folha sintética: manchas aleatórias ampliadas (sementes diferentes têm dHash bem diferente)."""
+    rng = random.Random(semente)
+    base = Image.new('RGB', (16, 12))
+    base.putdata([(rng.randrange(30, 160), rng.randrange(80, 230), rng.randrange(20, 90)) for _ in range(16 * 12)])
+    buf = io.BytesIO()
+    base.resize((lado, lado * 3 // 4), Image.BILINEAR).save(buf, 'JPEG', quality=qualidade)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def pipe():
+    p = PipelineDiagnostico(ClienteFalso())
+    yield p
+    p.encerrar()
+
+
+def test_mesma_foto_sai_do_cache(pipe):
+    foto = _foto()
+    primeiro = pipe.submeter(foto, "Batata", "Tuberização").result(timeout=10)
+    fut = pipe.submeter(foto, "Batata", "Tuberização")
+    assert fut.done() and fut.result() == primeiro
+    assert pipe.enviados == 1 and len(pipe.cliente.chamadas) == 1
+    # Outra fase é outro diagnóstico
+    pipe.submeter(foto, "Batata", "Vegetativo").result(timeout=10)
+    assert pipe.enviados == 2
+
+
+def test_foto_recomprimida_reaproveita_pelo_hash_canonico(pipe):
+    original, reenviada = _foto(lado=640, qualidade=90), _foto(lado=480, qualidade=60)
+    assert original != reenviada
+    assert pipe.chave(original, "Café", "Florada") == pipe.chave(reenviada, "Café", "Florada")
+    pipe.submeter(original, "Café", "Florada").result(timeout=10)
+    assert pipe.submeter(reenviada, "Café", "Florada").done() and pipe.enviados == 1
+    assert pipe.chave(_foto(semente=3), "Café", "Florada") != pipe.chave(original, "Café", "Florada")
+
+
+def test_falha_do_modelo_nao_entra_no_cache():
+    pipe = PipelineDiagnostico(ClienteFalso(falhar=True))
+    foto = _foto()
+    with pytest.raises(RuntimeError):
+        pipe.submeter(foto, "Soja", "R1").result(timeout=10)
+    pipe.cliente.falhar = False
+    assert pipe.submeter(foto, "Soja", "R1").result(timeout=10).startswith("Diagnóstico simulado")
+    assert pipe.enviados == 2
+    pipe.encerrar()
+
+
+def test_lote_agrupa_arquivos_repetidos(pipe, tmp_path):
+    for nome, semente in (("a.jpg", 0), ("copia_de_a.JPG", 0), ("b.jpeg", 3), ("notas.txt", None)):
+        (tmp_path / nome).write_bytes(b"texto" if semente is None else _foto(semente))
+    itens = pipe.diagnosticar_pasta(str(tmp_path), "Morango", "Frutificação", timeout=10)
+    assert [i['arquivo'] for i in itens] == ["a.jpg", "b.jpeg", "copia_de_a.JPG"]
+    assert all(i['status'] == 'ok' for i in itens)
+    assert pipe.enviados == 2 and len(pipe.cliente.chamadas) == 2
@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from gda import GDA_DIA_PADRAO, AcumuladorGDA, estimativa_climatologica
+
+
+class ClimaFalso:
+    """Reanálise com t_min 14 / t_max 30 (GDA 12 com base 10) e os 2 últimos dias ainda sem dado."""
+
+    def __init__(self, ultimo):
+        self.ultimo = ultimo
+
+    def diario(self, lat, lon, inicio, fim):
+        dias = np.arange(np.datetime64(inicio, 'D'), np.datetime64(fim + timedelta(days=1), 'D'))
+        t_min = np.where(dias <= np.datetime64(self.ultimo, 'D'), 14.0, np.nan).astype(np.float32)
+        return {'dia': dias, 't_min': t_min, 't_max': t_min + 16}
+
+
+def test_dias_sem_rodada_vem_da_reanalise_e_depois_da_base_fixa(tmp_path):
+    plantio, hoje = date(2025, 1, 1), date(2025, 1, 11)
+    acc = AcumuladorGDA("fz", plantio, 10.0, caminho=str(tmp_path / "h.db"))
+    clima = estimativa_climatologica(ClimaFalso(date(2025, 1, 8)), -13.0, -41.0, 10.0)
+    assert acc.atualizar(ate=hoje, clima=clima) == 10
+    assert list(acc.gda) == [12.0] * 8 + [GDA_DIA_PADRAO] * 2
+    assert acc.acumulado() == 8 * 12.0 + 2 * GDA_DIA_PADRAO
+
+    # Gravado: outro acumulador lê os mesmos dias, sem refazer nada
+    outro = AcumuladorGDA("fz", plantio, 10.0, caminho=str(tmp_path / "h.db"))
+    assert outro.atualizar(ate=hoje) == 0
+    assert outro.acumulado(hoje) == acc.acumulado()
+
+
+def test_reanalise_com_falha_cai_na_base_fixa(tmp_path):
+    def quebrada(inicio, fim):
+        raise ConnectionError("sem rede")
+
+    acc = AcumuladorGDA("fz", date(2025, 1, 1), 10.0, caminho=str(tmp_path / "h.db"))
+    acc.atualizar(ate=date(2025, 1, 4), estimativa=5.0, clima=quebrada)
+    assert list(acc.gda) == [5.0, 5.0, 5.0]
+
+
+def test_acumulado_e_projecao():
+    acc = AcumuladorGDA("fz", date(2025, 1, 1), 10.0)
+    acc._anexar([10.0] * 10)
+    assert acc.acumulado(date(2025, 1, 4)) == 30.0
+    assert acc.projetar_data(95.0) == date(2025, 1, 10)
+    assert acc.projetar_data(120.0, previsao_gda=[5.0] * 4) == date(2025, 1, 14)
+
+
+def test_dado_real_posterior_substitui_a_base_fixa(tmp_path):
+    plantio, hoje, caminho = date(2025, 1, 1), date(2025, 1, 11), str(tmp_path / "h.db")
+    acc = AcumuladorGDA("fz", plantio, 10.0, caminho=caminho)
+    acc.atualizar(ate=hoje, clima=estimativa_climatologica(ClimaFalso(date(2025, 1, 8)), -13.0, -41.0, 10.0))
+    assert acc.fontes[-3:] == ['climatologia', 'estimado', 'estimado']
+
+    # Reanálise dos dois dias chegou; amanhã ainda sem dado fica pela base fixa
+    clima = estimativa_climatologica(ClimaFalso(date(2025, 1, 10)), -13.0, -41.0, 10.0)
+    assert acc.atualizar(ate=hoje + timedelta(days=1), clima=clima) == 1
+    assert list(acc.gda) == [12.0] * 10 + [GDA_DIA_PADRAO]
+    assert acc.acumulado() == 10 * 12.0 + GDA_DIA_PADRAO
+
+    relido = AcumuladorGDA("fz", plantio, 10.0, caminho=caminho)
+    assert relido.atualizar(ate=hoje + timedelta(days=1)) == 0
+    assert relido.acumulado() == acc.acumulado() and relido.fontes.count('estimado') == 1
@@ -0,0 +1,42 @@
+from laudo_html import montar_contexto, renderizar_laudo
+
+FAZENDA = {"nome": "Ibicoara (Sede)", "lat": "-13.414", "lon": "-41.285"}
+PREVISOES = [{'data': f"{18 + i}/10", 'temp': 21.5, 'temp_min': 15.2, 'temp_max': 27.9, 'umid': 91, 'umid_max': 97, 'vpd': 0.82,
+              'delta_t': 4.1, 'janelas_pulv': 4, 'chuva': 1.0, 'et0': 4.0} for i in range(5)]
+
+
+def _laudo(**kw):
+    args = dict(previsoes=PREVISOES, anotacao="Adubação <NPK>", mudanca=False, chuva_ant=0.0, fazenda=FAZENDA, kc=0.5,
+                gda_acum=812.4, radar=[], emitido="18/10/2026 06:00")
+    args.update(kw)
+    return renderizar_laudo(montar_contexto(**args))
+
+
+def test_laudo_basico():
+    html = _laudo()
+    assert html.startswith("\n    <html>") and html.endswith("</body></html>")
+    assert "Adubação &lt;NPK&gt;" in html
+    assert "<td>-5.0 mm</td>" in html and "Déficit Hídrico" in html
+    assert "812 GDA" in html
+    assert html.count("<td>1.0mm</td><td>2.0mm</td>") == 5
+    assert "5 Janelas" in html and "ALERTA DE VOLATILIDADE" not in html
+
+
+def test_alerta_irrigacao_e_radar():
+    irrigacao = {'dia_irrigacao': "20/10", 'lamina_bruta': 24.6, 'lamina': 20.9, 'dr': 31.0, 'raw': 30.0, 'taw': 60.0}
+    radar = [{"nome": "Mucugê", "status": "ok", "dados": {"weather": [{"description": "chuva leve"}], "main": {"temp": 20.4}}},
+             {"nome": "Piatã", "status": "timeout", "dados": None}]
+    html = _laudo(mudanca=True, chuva_ant=12.0, irrigacao=irrigacao, radar=radar)
+    assert "de <strong>12.0mm</strong> para <strong>5.0mm</strong>" in html
+    assert "Irrigar 25 mm brutos (21 mm líquidos) em 20/10" in html and "RAW 30.0 / TAW 60.0" in html
+    assert "<li><strong>Mucugê:</strong> 🌧️ Chuva leve (20.4°C)</li>" in html
+    assert "Estações sem resposta: Piatã" in html
+
+
+def test_contagem_sanitaria_sem_motor_usa_a_umidade_media():
+    # Noites úmidas (UR máx. > 88%) com média seca não disparam o alerta
+    noites_umidas = [{**p, 'umid': 72} for p in PREVISOES]
+    html = _laudo(previsoes=noites_umidas)
+    assert "0 Janelas" in html and "Baixo Risco" in html
+    html = _laudo(previsoes=noites_umidas[:2] + PREVISOES[2:])
+    assert "3 Janelas" in html and "ALTO RISCO" in html
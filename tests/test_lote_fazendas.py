@@ -0,0 +1,55 @@
+import json
+import os
+
+import pytest
+
+from lote_fazendas import carregar_fazendas
+
+
+def _arquivo(tmp_path, fazendas):
+    p = tmp_path / "fazendas.json"
+    p.write_text(json.dumps(fazendas), encoding='utf-8')
+    return str(p)
+
+
+def test_id_obrigatorio(tmp_path):
+    with pytest.raises(ValueError, match="sem 'id'"):
+        carregar_fazendas(_arquivo(tmp_path, [{"nome": "Sede", "lat": "-13.4", "lon": "-41.2"}]))
+
+
+def test_id_repetido_falha_mesmo_com_nomes_iguais(tmp_path):
+    fazendas = [{"id": "a", "nome": "São José", "lat": "-13.4", "lon": "-41.2"},
+                {"id": "a", "nome": "São José", "lat": "-12.9", "lon": "-41.0"}]
+    with pytest.raises(ValueError, match="repetido: a"):
+        carregar_fazendas(_arquivo(tmp_path, fazendas))
+    fazendas[1]["id"] = "b"
+    assert [fz["id"] for fz in carregar_fazendas(_arquivo(tmp_path, fazendas))] == ["a", "b"]
+
+
+def test_fazendas_do_repositorio_carregam():
+    fz = carregar_fazendas(os.path.join(os.path.dirname(__file__), "..", "fazendas.json"))[0]
+    assert fz["id"] == "ibicoara_sede" and fz["kc"] == 0.75 and len(fz["radar"]) == 4
+
+
+def test_t_base_da_cultura_chega_ao_acumulador(tmp_path, monkeypatch):
+    import clima_alerta
+
+    bases = []
+
+    class AcumuladorEspiao:
+        def __init__(self, fazenda, data_plantio, t_base):
+            bases.append(t_base)
+
+        def atualizar(self, **kw):
+            return 0
+
+        def acumulado(self):
+            return 0.0
+
+    fazendas = [{"id": "batata", "nome": "Batata", "lat": "-13.4", "lon": "-41.2", "cultura": "Batata (Solanum tuberosum)"},
+                {"id": "citros", "nome": "Citros", "lat": "-13.4", "lon": "-41.2", "cultura": "Citros (Limão/Laranja)", "kc": 0.7},
+                {"id": "manual", "nome": "Manual", "lat": "-13.4", "lon": "-41.2", "cultura": "Manga", "t_base": 11}]
+    monkeypatch.setattr(clima_alerta, "AcumuladorGDA", AcumuladorEspiao)
+    for fz in carregar_fazendas(_arquivo(tmp_path, fazendas)):
+        clima_alerta.calc_gda_acumulado(fz)
+    assert bases == [7, 13, 11]
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from agregacao import rotulo_slot
+from historico import HistoricoAgro
+from pressao_sanitaria import avaliar_fazendas
+
+T0 = 1767225600          # 2026-01-01 00:00 UTC, múltiplo de 3 h
+PASSO = 3 * 3600
+FAZENDA = {'id': 'fz', 'nome': 'Teste'}     # sem cultura: todos os patógenos
+
+
+def _serie(umid, inicio=0, temp=18.0):
+    """Passos 3-horários a partir do passo `inicio`; 18 °C é o ótimo da Requeima (10 h para infectar)."""
+    n = len(umid)
+    return {'dt': T0 + PASSO * np.arange(inicio, inicio + n), 'temp': np.full(n, temp),
+            'umid': np.asarray(umid, dtype=float), 'chuva': np.zeros(n)}
+
+
+def _requeima(resumo):
+    return next(p for p in resumo['patogenos'] if p['alvo'] == "Requeima")
+
+
+def test_niveis_pela_pressao_maxima():
+    # 3 h molhadas no ótimo = 0,3 do período de infecção; 6 h = 0,6; 12 h = infecção completa (1,2)
+    secas = [50] * 4
+    casos = {"BAIXO": [95] + secas, "MODERADO": [95, 95] + secas, "ALTO": [95] * 4 + secas}
+    for nivel, umid in casos.items():
+        r = _requeima(avaliar_fazendas([FAZENDA], [_serie(umid)])[0])
+        assert r['nivel'] == nivel, (nivel, r)
+    r = _requeima(avaliar_fazendas([FAZENDA], [_serie(casos["ALTO"])])[0])
+    assert r['pressao_max'] == pytest.approx(1.2, rel=1e-6) and r['consec_max'] == 12   # projeção em float32
+    seca = avaliar_fazendas([FAZENDA], [_serie([50] * 8)])[0]
+    assert seca['nivel'] == "BAIXO" and all(p['pressao_max'] == 0 for p in seca['patogenos'])
+
+
+def test_inicio_e_o_passo_em_que_a_infeccao_completa():
+    r = _requeima(avaliar_fazendas([FAZENDA], [_serie([50, 95, 95, 95, 95, 50])])[0])
+    assert r['inicio'] == rotulo_slot(T0 + 4 * PASSO)
+    # Fora da faixa de temperatura não há infecção
+    frio = _requeima(avaliar_fazendas([FAZENDA], [_serie([95] * 6, temp=5.0)])[0])
+    assert frio['inicio'] is None and frio['pressao_max'] == 0
+
+
+def test_periodo_molhado_continua_entre_rodadas(tmp_path):
+    with HistoricoAgro(str(tmp_path / "h.db")) as hist:
+        # 1ª rodada: passos 0-3 molhados. 2ª rodada começa no passo 2: os passos 0 e 1 já ocorreram
+        avaliar_fazendas([FAZENDA], [_serie([95, 95, 95, 95])], hist)
+        r = _requeima(avaliar_fazendas([FAZENDA], [_serie([95, 95, 50, 50], inicio=2)], hist)[0])
+    assert r['consec_max'] == 12 and r['nivel'] == "ALTO" and r['inicio'] == rotulo_slot(T0 + 3 * PASSO)
+    # Sem o estado gravado, a mesma previsão só enxerga 6 h
+    sem_estado = _requeima(avaliar_fazendas([FAZENDA], [_serie([95, 95, 50, 50], inicio=2)])[0])
+    assert sem_estado['consec_max'] == 6 and sem_estado['nivel'] == "MODERADO"
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from radar import buscar_radar, estacoes_pendentes, gerar_estacoes_virtuais
+
+
+def _estacoes(n):
+    return [{"nome": f"E{i}", "lat": -13.0 - i * 0.01, "lon": -41.0} for i in range(n)]
+
+
+def test_prazo_com_estacoes_na_fila_devolve_parciais():
+    # 6 estações, 2 workers, cada uma leva 0,3 s: no prazo de 0,5 s, 2 respondem e 4 ficam na fila (canceladas)
+    def carregar(e):
+        time.sleep(0.3)
+        return {"nome": e["nome"]}
+
+    t0 = time.perf_counter()
+    res = buscar_radar(_estacoes(6), carregar=carregar, max_workers=2, prazo_total=0.5)
+    assert time.perf_counter() - t0 < 1.0
+    assert [r["nome"] for r in res] == [f"E{i}" for i in range(6)]
+    assert [r["status"] for r in res[:2]] == ["ok", "ok"]
+    assert all(r["status"] == "timeout" for r in res[2:])
+    assert estacoes_pendentes(res) == ["E2", "E3", "E4", "E5"]
+
+
+def test_estacao_lenta_vira_timeout_e_erro_vira_erro():
+    liberar = threading.Event()
+
+    def carregar(e):
+        if e["nome"] == "E0":
+            liberar.wait(2)
+        if e["nome"] == "E1":
+            raise ValueError("resposta inválida")
+        return {"ok": True}
+
+    try:
+        res = buscar_radar(_estacoes(3), carregar=carregar, max_workers=3, prazo_total=0.2)
+    finally:
+        liberar.set()
+    assert [r["status"] for r in res] == ["timeout", "erro", "ok"]
+    assert res[1]["erro"] == "resposta inválida"
+    assert res[2]["dados"] == {"ok": True}
+
+
+def test_estacoes_virtuais_em_circulo():
+    est = gerar_estacoes_virtuais(-13.0, -41.0, raio=0.1, n=4)
+    assert [e["nome"] for e in est] == ["Norte", "Leste", "Sul", "Oeste"]
+    assert abs(est[0]["lat"] - (-12.9)) < 1e-9 and abs(est[0]["lon"] - (-41.0)) < 1e-9
+
+
+def test_grade_rotula_com_nomes_das_estacoes():
+    from grade_espacial import GradeEspacial
+
+    vistos = []
+
+    def carregar(e):
+        vistos.append(e["nome"])
+        return {"ok": True}
+
+    estacoes = [{"nome": "Mucugê", "lat": -13.0050, "lon": -41.3710}, {"nome": "Mucugê 2", "lat": -13.0051, "lon": -41.3711},
+                {"nome": "Piatã", "lat": -13.154, "lon": -41.773}]
+    res = buscar_radar(estacoes, carregar=carregar, grade=GradeEspacial(5))
+    assert any(v.startswith("Mucugê, Mucugê 2 [") for v in vistos) and any(v.startswith("Piatã [") for v in vistos)
+    assert [r["nome"] for r in res] == ["Mucugê", "Mucugê 2", "Piatã"] and all(r["status"] == "ok" for r in res)
+
+
+def test_read_timeout_apos_repeticoes_vira_timeout():
+    # Servidor que demora mais que o read timeout: depois das repetições o requests levanta ConnectionError
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from cliente_owm import criar_sessao
+
+    class Lento(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(0.5)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *a):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Lento)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    sessao = criar_sessao(2, tentativas=1, backoff=0)
+    try:
+        res = buscar_radar(_estacoes(1), carregar=lambda e: sessao.get(f"http://127.0.0.1:{srv.server_address[1]}/", timeout=(1, 0.1)).json(),
+                           prazo_total=5)
+    finally:
+        srv.shutdown()
+        srv.server_close()
+    assert res[0]["status"] == "timeout" and "Read timed out" in res[0]["erro"]
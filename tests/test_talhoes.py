@@ -0,0 +1,39 @@
+import threading
+
+from talhoes import RegistroTalhoes
+
+
+def test_sessoes_concorrentes_na_mesma_conexao(tmp_path):
+    # Como no dashboard: um RegistroTalhoes (cache_resource) usado por várias threads ao mesmo tempo
+    erros = []
+    with RegistroTalhoes(str(tmp_path / "t.db")) as reg:
+        largada = threading.Barrier(8)
+
+        def sessao(n):
+            try:
+                largada.wait()
+                for i in range(50):
+                    d = 0.001 * (i + 1)
+                    reg.adicionar_poligono(f"T{n}-{i}", [(-41.3 - d, -13.4 - d), (-41.3 + d, -13.4 - d), (-41.3 + d, -13.4 + d)], fazenda=f"fz{n}")
+                    reg.na_janela(-13.5, -41.4, -13.3, -41.2)
+                    reg.mais_proximos(-13.4, -41.3)
+            except Exception as e:
+                erros.append(e)
+
+        threads = [threading.Thread(target=sessao, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not erros
+        assert reg.contar() == 400 and reg.contar_janela(-13.5, -41.4, -13.3, -41.2) == 400
+        assert len(reg.fazendas()) == 8 and reg.contar("fz3") == 50
+
+
+def test_contendo_e_remover(tmp_path):
+    with RegistroTalhoes(str(tmp_path / "t.db")) as reg:
+        i = reg.adicionar_poligono("A", [(0, 0), (1, 0), (1, 1), (0, 1)])
+        reg.adicionar_ponto("P", 0.5, 0.5)
+        assert [t['id'] for t in reg.contendo(0.5, 0.5)] == [i]
+        reg.remover([i])
+        assert reg.contendo(0.5, 0.5) == [] and reg.contar() == 1
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from cliente_owm import criar_sessao
+from servidor_tiles import TAMANHO_TILE, OrigemTiles
+from tiles_satelite import CacheTiles, FalhaOrigem, ProxyTiles, ServidorTiles
+
+TILE = (14, 6217, 8755)
+
+
+@pytest.fixture
+def origem():
+    with OrigemTiles() as o:
+        yield o
+
+
+def _proxy(pasta, origem, limite_bytes=1 << 30):
+    return ProxyTiles(CacheTiles(str(pasta), limite_bytes), origem.url, sessao=criar_sessao(4, tentativas=0))
+
+
+def test_segundo_pedido_sai_do_disco_e_vencido_revalida(tmp_path, origem):
+    proxy = _proxy(tmp_path, origem)
+    primeiro = proxy.obter(*TILE)
+    assert primeiro['fonte'] == 'origem' and primeiro['corpo'] == origem.corpo(*TILE)
+    assert proxy.obter(*TILE)['fonte'] == 'cache' and origem.pedidos_por_tile[TILE] == 1
+
+    # Validade vencida: a origem responde 304 e nenhum byte de imagem passa de novo
+    with proxy.cache._lock, proxy.cache.con:
+        proxy.cache.con.execute("UPDATE tiles SET expira_em = 0")
+    bytes_antes = origem.bytes_enviados
+    assert proxy.obter(*TILE)['fonte'] == 'revalidado' and origem.bytes_enviados == bytes_antes
+    proxy.fechar()
+
+
+def test_origem_fora_serve_copia_vencida(tmp_path, origem):
+    proxy = _proxy(tmp_path, origem)
+    proxy.obter(*TILE)
+    with proxy.cache._lock, proxy.cache.con:
+        proxy.cache.con.execute("UPDATE tiles SET expira_em = 0")
+    origem.taxa_erro = 1.0          # 503 em tudo
+    tile = proxy.obter(*TILE)
+    assert tile['fonte'] == 'vencido' and tile['corpo'] == origem.corpo(*TILE)
+    # Sem cópia em disco a falha sobe
+    with pytest.raises(FalhaOrigem):
+        proxy.obter(TILE[0], TILE[1] + 1, TILE[2])
+    proxy.origem = "http://127.0.0.1:9"     # porta sem servidor
+    assert proxy.obter(*TILE)['fonte'] == 'vencido'
+    proxy.fechar()
+
+
+def test_cache_limitado_despeja_os_menos_usados(tmp_path, origem):
+    proxy = _proxy(tmp_path, origem, limite_bytes=6 * TAMANHO_TILE)
+    tiles = [(16, 24868 + i, 35020) for i in range(7)]
+    for t in tiles[:4]:
+        proxy.obter(*t)
+    proxy.obter(*tiles[0])      # relido: passa a ser dos mais recentes
+    for t in tiles[4:]:
+        proxy.obter(*t)
+    # 7 tiles estouram o limite de 6: saem os 2 acessados há mais tempo (folga de 90%)
+    assert proxy.cache.total_bytes <= 6 * TAMANHO_TILE and proxy.cache.despejados == 2
+    assert proxy.cache.ler(*tiles[1]) is None and proxy.cache.ler(*tiles[2]) is None
+    assert all(proxy.cache.ler(*t) is not None for t in (tiles[0], *tiles[3:]))
+    proxy.fechar()
+
+
+def test_endpoint_http_responde_304_ao_etag(tmp_path, origem):
+    proxy = _proxy(tmp_path, origem)
+    z, x, y = TILE
+    with ServidorTiles(proxy, porta=0, host="127.0.0.1") as srv:
+        r1 = requests.get(f"{srv.url}/tile/{z}/{y}/{x}", timeout=5)
+        r2 = requests.get(f"{srv.url}/tile/{z}/{y}/{x}", headers={"If-None-Match": r1.headers["ETag"]}, timeout=5)
+    assert r1.status_code == 200 and r1.content == origem.corpo(*TILE) and r2.status_code == 304
+    proxy.fechar()
@@ -0,0 +1,461 @@
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from cliente_owm import criar_sessao
+
+# ==============================================================================
+# PROXY LOCAL DE TILES DE SATÉLITE (ESRI WORLD IMAGERY) COM CACHE EM DISCO
+# O mapa GIS pede os tiles a este proxy, que roda no escritório da fazenda: o
+# que já foi baixado sai do disco sem usar o link rural/satélite. O cache tem
+# tamanho limitado (despejo do menos usado), respeita a validade enviada pela
+# origem e revalida com ETag (304 não baixa a imagem de novo). Pedidos
+# simultâneos do mesmo tile viram uma só ida à origem; tiles diferentes são
+# baixados em paralelo. O comando `semear` baixa antes todos os níveis de zoom
+# da área de cada fazenda cadastrada, fora do horário de uso.
+# Testável com benchmarks/servidor_tiles.py (origem simulada).
+#
+#     python tiles_satelite.py servir [--porta 8790] [--limite-mb 2048]
+#     python tiles_satelite.py semear [--zoom 10-17] [--margem-km 2]
+#     TILES_PROXY_URL=http://192.168.0.10:8790 streamlit run app.py
+# ==============================================================================
+# TILES_ORIGEM_URL troca a origem (outro espelho ou o servidor simulado dos benchmarks)
+URL_ORIGEM = os.getenv("TILES_ORIGEM_URL", "https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile").rstrip("/")
+URL_PROXY = os.getenv("TILES_PROXY_URL", "http://127.0.0.1:8790").rstrip("/")
+PASTA_TILES = os.getenv("TILES_PASTA", "tiles_cache")
+PORTA = 8790
+LIMITE_MB = 2048
+FOLGA_DESPEJO = 0.9          # despeja até 90% do limite: não despeja a cada tile gravado
+TTL_PADRAO = 7 * 24 * 3600   # origem sem Cache-Control/Expires: imagem de satélite muda pouco
+MAX_AGE_VENCIDO = 60         # tile vencido servido com a origem fora: o navegador pergunta de novo logo
+CONEXOES_ORIGEM = 8          # downloads simultâneos na origem (pool da sessão e do semeador)
+TIMEOUT = (3.05, 15)
+ZOOM_MAX = 22
+ZOOMS_SEMEAR = (10, 17)
+MARGEM_KM = 2.0
+LIMITE_SEMEADURA = 50000     # tiles por execução do semeador sem --forcar
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tiles (
+    z INTEGER NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    tipo TEXT,                      -- Content-Type da origem
+    etag TEXT,
+    expira_em REAL NOT NULL,        -- epoch (s): depois disso, revalida na origem
+    acesso_em REAL NOT NULL,        -- último uso (ordem do despejo)
+    PRIMARY KEY (z, x, y)
+);
+CREATE INDEX IF NOT EXISTS ix_tiles_acesso ON tiles (acesso_em);
+"""
+
+
+class FalhaOrigem(Exception):
+    """A origem não entregou o tile e não há cópia em disco. `status` = HTTP da origem (None: rede)."""
+
+    def __init__(self, msg, status=None):
+        super().__init__(msg)
+        self.status = status
+
+
+# --- 1. GEOMETRIA DOS TILES (WEB MERCATOR, XYZ) ---
+def tile_de(lat, lon, z):
+    """(x, y) do tile que contém o ponto no zoom z."""
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_da_caixa(sul, oeste, norte, leste, zooms):
+    """Todos os (z, x, y) que cobrem a caixa, zoom a zoom."""
+    for z in zooms:
+        x0, y0 = tile_de(norte, oeste, z)
+        x1, y1 = tile_de(sul, leste, z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield z, x, y
+
+
+def ampliar_caixa(caixa, margem_km):
+    sul, oeste, norte, leste = caixa
+    d_lat = margem_km / 111.32
+    d_lon = margem_km / (111.32 * max(math.cos(math.radians((sul + norte) / 2)), 1e-6))
+    return sul - d_lat, oeste - d_lon, norte + d_lat, leste + d_lon
+
+
+def _expiracao(headers, agora, ttl_padrao=TTL_PADRAO):
+    """Validade pela resposta da origem: Cache-Control (no-cache/max-age), Expires ou o padrão."""
+    cc = headers.get("Cache-Control", "").lower()
+    if "no-store" in cc or "no-cache" in cc:
+        return agora
+    m = re.search(r"max-age=(\d+)", cc)
+    if m:
+        return agora + int(m.group(1))
+    if headers.get("Expires"):
+        try:
+            return parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            return agora
+    return agora + ttl_padrao
+
+
+# --- 2. CACHE EM DISCO (ARQUIVOS + ÍNDICE SQLITE) ---
+class CacheTiles:
+    """
+    Um arquivo por tile (pasta/z/x/y) e uma linha no índice com tamanho, ETag, validade e último
+    acesso. Acima de `limite_bytes`, os tiles usados há mais tempo saem até sobrar a folga.
+    """
+
+    def __init__(self, pasta=PASTA_TILES, limite_bytes=LIMITE_MB * 1024 * 1024):
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        os.makedirs(pasta, exist_ok=True)
+        # Servidor e semeador podem usar a mesma pasta: conexão compartilhada entre threads, WAL entre processos
+        self.con = sqlite3.connect(os.path.join(pasta, "indice.db"), timeout=10, check_same_thread=False)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        self.con.executescript(ESQUEMA)
+        self._lock = threading.Lock()
+        self.total_bytes = self._somar()
+        self.despejados = 0
+
+    def _somar(self):
+        return self.con.execute("SELECT COALESCE(SUM(bytes), 0) FROM tiles").fetchone()[0]
+
+    def _arquivo(self, z, x, y):
+        return os.path.join(self.pasta, str(z), str(x), str(y))
+
+    def ler(self, z, x, y):
+        """{'corpo', 'tipo', 'etag', 'expira_em'} ou None; marca o acesso (ordem do despejo)."""
+        with self._lock:
+            r = self.con.execute("SELECT tipo, etag, expira_em FROM tiles WHERE z=? AND x=? AND y=?", (z, x, y)).fetchone()
+            if r is None:
+                return None
+            try:
+                with open(self._arquivo(z, x, y), 'rb') as f:
+                    corpo = f.read()
+            except FileNotFoundError:
+                # Arquivo apagado por fora: esquece a linha e baixa de novo
+                self._apagar([(z, x, y)])
+                self.con.commit()
+                return None
+            with self.con:
+                self.con.execute("UPDATE tiles SET acesso_em=? WHERE z=? AND x=? AND y=?", (time.time(), z, x, y))
+        return {'corpo': corpo, 'tipo': r[0], 'etag': r[1], 'expira_em': r[2]}
+
+    def gravar(self, z, x, y, corpo, tipo, etag, expira_em):
+        caminho = self._arquivo(z, x, y)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temp = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(corpo)
+        with self._lock:
+            os.replace(temp, caminho)     # leitor nunca vê tile pela metade
+            antigo = self.con.execute("SELECT bytes FROM tiles WHERE z=? AND x=? AND y=?", (z, x, y)).fetchone()
+            with self.con:
+                self.con.execute("INSERT OR REPLACE INTO tiles VALUES (?,?,?,?,?,?,?,?)",
+                                 (z, x, y, len(corpo), tipo, etag, expira_em, time.time()))
+            self.total_bytes += len(corpo) - (antigo[0] if antigo else 0)
+            if self.total_bytes > self.limite_bytes:
+                self._despejar()
+
+    def renovar(self, z, x, y, expira_em, etag=None):
+        """Origem respondeu 304: mesma imagem, nova validade."""
+        with self._lock, self.con:
+            self.con.execute("UPDATE tiles SET expira_em=?, etag=COALESCE(?, etag), acesso_em=? WHERE z=? AND x=? AND y=?",
+                             (expira_em, etag, time.time(), z, x, y))
+
+    def _apagar(self, chaves):
+        for z, x, y in chaves:
+            try:
+                os.remove(self._arquivo(z, x, y))
+            except FileNotFoundError:
+                pass
+        self.con.executemany("DELETE FROM tiles WHERE z=? AND x=? AND y=?", chaves)
+
+    def _despejar(self):
+        # Outro processo (semeador x servidor) pode ter gravado/despejado: confere o total real antes
+        self.total_bytes = self._somar()
+        alvo = self.limite_bytes * FOLGA_DESPEJO
+        while self.total_bytes > alvo:
+            lote = self.con.execute("SELECT z, x, y, bytes FROM tiles ORDER BY acesso_em LIMIT 256").fetchall()
+            if not lote:
+                break
+            saem = []
+            for z, x, y, b in lote:
+                if self.total_bytes <= alvo:
+                    break
+                saem.append((z, x, y))
+                self.total_bytes -= b
+            with self.con:
+                self._apagar(saem)
+            self.despejados += len(saem)
+
+    def contar(self):
+        return self.con.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def fechar(self):
+        self.con.close()
+
+
+# --- 3. PROXY (CACHE + ORIGEM) ---
+class ProxyTiles:
+    """
+    Uso:
+        proxy = ProxyTiles(CacheTiles())
+        tile = proxy.obter(z, x, y)        # {'corpo', 'tipo', 'etag', 'expira_em', 'fonte'}
+    `fonte`: 'cache' (válido em disco), 'origem' (baixado), 'revalidado' (304 da origem) ou
+    'vencido' (origem fora do ar: serve a cópia vencida em vez de falhar).
+    """
+
+    def __init__(self, cache, origem=URL_ORIGEM, sessao=None, conexoes=CONEXOES_ORIGEM, timeout=TIMEOUT, ttl_padrao=TTL_PADRAO):
+        self.cache = cache
+        self.origem = origem
+        self.sessao = sessao or criar_sessao(conexoes)
+        self.timeout = timeout
+        self.ttl_padrao = ttl_padrao
+        self._vagas = threading.BoundedSemaphore(conexoes)
+        self._em_voo = {}
+        self._lock = threading.Lock()
+        self.contagem = {'cache': 0, 'origem': 0, 'revalidado': 0, 'vencido': 0, 'falha': 0}
+
+    def _contar(self, fonte):
+        with self._lock:
+            self.contagem[fonte] += 1
+
+    def obter(self, z, x, y):
+        if not (0 <= z <= ZOOM_MAX and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise FalhaOrigem(f"tile fora da grade: {z}/{x}/{y}", status=404)
+        guardado = self.cache.ler(z, x, y)
+        if guardado is not None and guardado['expira_em'] > time.time():
+            self._contar('cache')
+            return {**guardado, 'fonte': 'cache'}
+        # Um download por tile: quem pede o mesmo tile enquanto ele está a caminho espera o mesmo resultado
+        chave = (z, x, y)
+        with self._lock:
+            futuro = self._em_voo.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._em_voo[chave] = Future()
+        if not dono:
+            return futuro.result()
+        try:
+            tile = self._buscar(z, x, y, guardado)
+            futuro.set_result(tile)
+            return tile
+        except Exception as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+
+    def _buscar(self, z, x, y, guardado):
+        cabecalhos = {"If-None-Match": guardado['etag']} if guardado and guardado['etag'] else {}
+        try:
+            with self._vagas:
+                r = self.sessao.get(f"{self.origem}/{z}/{y}/{x}", headers=cabecalhos, timeout=self.timeout)
+        except requests.RequestException as e:
+            return self._reserva(guardado, FalhaOrigem(f"origem inacessível: {e}"))
+        agora = time.time()
+        if r.status_code == 304 and guardado is not None:
+            expira = _expiracao(r.headers, agora, self.ttl_padrao)
+            self.cache.renovar(z, x, y, expira, r.headers.get("ETag"))
+            self._contar('revalidado')
+            return {**guardado, 'expira_em': expira, 'etag': r.headers.get("ETag") or guardado['etag'], 'fonte': 'revalidado'}
+        if r.status_code != 200:
+            falha = FalhaOrigem(f"origem respondeu {r.status_code} para {z}/{y}/{x}", status=r.status_code)
+            # 404 = sem imagem nesse ponto: não é falha da origem, não serve cópia antiga
+            return self._reserva(guardado if r.status_code >= 500 or r.status_code == 429 else None, falha)
+        tile = {'corpo': r.content, 'tipo': r.headers.get("Content-Type", "image/jpeg"), 'etag': r.headers.get("ETag"),
+                'expira_em': _expiracao(r.headers, agora, self.ttl_padrao)}
+        self.cache.gravar(z, x, y, **tile)
+        self._contar('origem')
+        return {**tile, 'fonte': 'origem'}
+
+    def _reserva(self, guardado, falha):
+        if guardado is None:
+            self._contar('falha')
+            raise falha
+        self._contar('vencido')
+        return {**guardado, 'fonte': 'vencido'}
+
+    def semear(self, tiles, paralelo=CONEXOES_ORIGEM, progresso=None):
+        """Garante em disco (válidos) todos os tiles; retorna a contagem por fonte desta semeadura."""
+        fontes = {}
+
+        def um(t):
+            try:
+                return self.obter(*t)['fonte']
+            except FalhaOrigem:
+                return 'falha'
+
+        with ThreadPoolExecutor(max_workers=paralelo, thread_name_prefix="semear") as pool:
+            for i, fonte in enumerate(pool.map(um, tiles), 1):
+                fontes[fonte] = fontes.get(fonte, 0) + 1
+                if progresso and i % 500 == 0:
+                    progresso(i, fontes)
+        return fontes
+
+    def estado(self):
+        with self._lock:
+            contagem = dict(self.contagem)
+        return {**contagem, 'tiles': self.cache.contar(), 'bytes': self.cache.total_bytes,
+                'limite_bytes': self.cache.limite_bytes, 'despejados': self.cache.despejados}
+
+    def fechar(self):
+        self.sessao.close()
+        self.cache.fechar()
+
+
+# --- 4. SERVIDOR HTTP (ENDPOINT DO MAPA) ---
+class ServidorTiles:
+    """
+    GET /tile/{z}/{y}/{x} (mesma ordem da URL da Esri) e GET /estado (contagens em JSON).
+    O navegador recebe Cache-Control com a validade restante e ETag: dentro da validade nem
+    chega a pedir; depois disso, pede com If-None-Match e leva 304 se o tile não mudou.
+    """
+
+    def __init__(self, proxy, porta=PORTA, host="0.0.0.0"):
+        self.proxy = proxy
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                partes = self.path.split("?")[0].strip("/").split("/")
+                if partes == ["estado"]:
+                    self._responder(200, json.dumps(proxy.estado()).encode(), "application/json")
+                    return
+                if len(partes) != 4 or partes[0] != "tile" or not all(p.isdigit() for p in partes[1:]):
+                    self._responder(404, b"", "text/plain")
+                    return
+                z, y, x = (int(p) for p in partes[1:])
+                try:
+                    tile = proxy.obter(z, x, y)
+                except FalhaOrigem as e:
+                    self._responder(404 if e.status == 404 else 502, str(e).encode(), "text/plain")
+                    return
+                idade = MAX_AGE_VENCIDO if tile['fonte'] == 'vencido' else max(int(tile['expira_em'] - time.time()), 0)
+                extra = {"Cache-Control": f"public, max-age={idade}", "X-Cache": tile['fonte']}
+                if tile['etag']:
+                    extra["ETag"] = tile['etag']
+                    if self.headers.get("If-None-Match") == tile['etag']:
+                        self._responder(304, b"", None, extra)
+                        return
+                self._responder(200, tile['corpo'], tile['tipo'], extra)
+
+            def _responder(self, status, corpo, tipo, extra=None):
+                self.send_response(status)
+                if tipo:
+                    self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.send_header("Access-Control-Allow-Origin", "*")
+                for k, v in (extra or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *a):
+                pass
+
+        class Servidor(ThreadingHTTPServer):
+            request_queue_size = 256        # o mapa pede dezenas de tiles de uma vez a cada movimento
+
+        self._http = Servidor((host, porta), Manipulador)
+        self._http.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._http.server_address[1]}"
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._http.shutdown()
+        self._http.server_close()
+
+
+def url_mapa(proxy_url=URL_PROXY, timeout=0.5):
+    """Modelo de URL para o TileLayer: o proxy se ele responde, senão a origem direto (o mapa não fica em branco)."""
+    try:
+        requests.get(f"{proxy_url}/estado", timeout=timeout).raise_for_status()
+        return f"{proxy_url}/tile/{{z}}/{{y}}/{{x}}", True
+    except requests.RequestException:
+        return f"{URL_ORIGEM}/{{z}}/{{y}}/{{x}}", False
+
+
+# --- 5. ÁREAS DAS FAZENDAS (SEMEADOR) ---
+def areas_fazendas(arquivo_fazendas=None, arquivo_talhoes=None, margem_km=MARGEM_KM):
+    """
+    {nome: (sul, oeste, norte, leste)}: retângulo dos talhões cadastrados de cada fazenda e, para
+    fazendas sem talhão, a sede do fazendas.json; tudo ampliado em `margem_km`.
+    """
+    caixas = {}
+    if arquivo_talhoes and os.path.exists(arquivo_talhoes):
+        from talhoes import RegistroTalhoes
+        with RegistroTalhoes(arquivo_talhoes) as reg:
+            caixas.update({f or "sem fazenda": c for f, c in reg.fazendas().items()})
+    if arquivo_fazendas and os.path.exists(arquivo_fazendas):
+        from historico import id_local
+        with open(arquivo_fazendas, 'r', encoding='utf-8') as f:
+            for fz in json.load(f):
+                lat, lon = float(fz['lat']), float(fz['lon'])
+                if id_local(lat, lon) not in caixas:
+                    caixas[fz.get('nome') or id_local(lat, lon)] = (lat, lon, lat, lon)
+    return {nome: ampliar_caixa(c, margem_km) for nome, c in caixas.items()}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Proxy local de tiles de satélite com cache em disco")
+    ap.add_argument("--pasta", default=PASTA_TILES)
+    ap.add_argument("--limite-mb", type=float, default=LIMITE_MB)
+    ap.add_argument("--origem", default=URL_ORIGEM)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sv = sub.add_parser("servir", help="Serve /tile/{z}/{y}/{x} para o mapa do dashboard")
+    sv.add_argument("--porta", type=int, default=PORTA)
+    sm = sub.add_parser("semear", help="Baixa antes todos os zooms da área de cada fazenda")
+    sm.add_argument("--fazendas", default="fazendas.json")
+    sm.add_argument("--talhoes", default="talhoes.db")
+    sm.add_argument("--zoom", default=f"{ZOOMS_SEMEAR[0]}-{ZOOMS_SEMEAR[1]}", help="Faixa de zoom, ex.: 10-17")
+    sm.add_argument("--margem-km", type=float, default=MARGEM_KM)
+    sm.add_argument("--paralelo", type=int, default=CONEXOES_ORIGEM)
+    sm.add_argument("--forcar", action="store_true", help=f"Permite mais de {LIMITE_SEMEADURA} tiles")
+    args = ap.parse_args()
+
+    proxy = ProxyTiles(CacheTiles(args.pasta, int(args.limite_mb * 1024 * 1024)), args.origem)
+    if args.cmd == "servir":
+        with ServidorTiles(proxy, args.porta) as srv:
+            print(f"🛰️ Proxy de tiles em {srv.url}/tile/{{z}}/{{y}}/{{x}} (origem {args.origem}, Ctrl+C para sair)")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+    else:
+        z0, _, z1 = args.zoom.partition("-")
+        zooms = range(int(z0), int(z1 or z0) + 1)
+        areas = areas_fazendas(args.fazendas, args.talhoes, args.margem_km)
+        # Caixas de fazendas vizinhas se sobrepõem: cada tile entra uma vez
+        tiles = sorted({t for caixa in areas.values() for t in tiles_da_caixa(*caixa, zooms)})
+        print(f"🌱 {len(areas)} áreas, zoom {zooms.start}-{zooms.stop - 1}: {len(tiles)} tiles")
+        if len(tiles) > LIMITE_SEMEADURA and not args.forcar:
+            raise SystemExit(f"❌ Mais de {LIMITE_SEMEADURA} tiles: reduza o zoom/margem ou use --forcar")
+        t0 = time.perf_counter()
+        fontes = proxy.semear(tiles, args.paralelo, progresso=lambda i, f: print(f"   {i}/{len(tiles)} {f}"))
+        est = proxy.estado()
+        print(f"✅ {fontes} em {time.perf_counter() - t0:.1f} s | cache: {est['tiles']} tiles, {est['bytes'] / 1e6:.1f} MB")
+    proxy.fechar()